@@ -0,0 +1,48 @@
+import argparse
+import time
+
+import numpy as np
+
+from symulacja_mpk.core.fleet import create_default_routes, create_fleet
+from symulacja_mpk.core.fleet_state import FleetState
+from symulacja_mpk.core.maintenance import Maintenance
+from symulacja_mpk.core.simulation import Simulation, DEFAULT_DT
+
+def make_vehicles(count: int): # flota o zadanej liczbie pojazdów - domyślne trasy powtórzone tyle razy, ile trzeba
+    routes = create_default_routes()
+    routes = routes * (count // 3 // len(routes) + 1)
+    vehicles = create_fleet(routes)[:count]
+    return routes, vehicles
+
+def bench_objects(count: int, steps: int) -> float: # pojazdy*kroki na sekundę dla pętli po obiektach
+    routes, vehicles = make_vehicles(count)
+    simulation = Simulation(routes, vehicles, Maintenance(rng=np.random.default_rng(0)))
+    start = time.perf_counter()
+    for _ in range(steps):
+        simulation.step()
+    return count * steps / (time.perf_counter() - start)
+
+def bench_fleet_state(count: int, steps: int) -> float: # pojazdy*kroki na sekundę dla FleetState
+    _, vehicles = make_vehicles(count)
+    fleet = FleetState(vehicles, rng=np.random.default_rng(0))
+    current_time = 0.0
+    start = time.perf_counter()
+    for _ in range(steps):
+        current_time += DEFAULT_DT / 1000.0
+        fleet.step(DEFAULT_DT, current_time)
+    return count * steps / (time.perf_counter() - start)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark: pętla po obiektach vs FleetState")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--steps", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    print(f"{'pojazdy':>10} {'obiekty [poj/s]':>18} {'FleetState [poj/s]':>20} {'przyspieszenie':>15}")
+    for count in args.sizes:
+        objects = bench_objects(count, args.steps)
+        vectorized = bench_fleet_state(count, args.steps)
+        print(f"{count:>10} {objects:>18,.0f} {vectorized:>20,.0f} {vectorized / objects:>14.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from symulacja_mpk.core.fleet import create_default_routes, create_fleet
+
+def fleet_memory(count: int) -> float: # bajty na pojazd (razem z kierowcą i CostTrackerem) zaalokowane przy tworzeniu floty; trasy są tworzone przed pomiarem
+    routes = create_default_routes()
+    routes = routes * (count // 3 // len(routes) + 1)
+    gc.collect()
+    tracemalloc.start()
+    vehicles = create_fleet(routes)[:count]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del vehicles
+    return allocated / count
+
+def object_size(obj) -> int: # rozmiar obiektu razem z jego __dict__ (bez wspólnych wartości atrybutów)
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+def component_sizes() -> dict: # rozmiary obiektów jednego pojazdu w bajtach
+    v = create_fleet(create_default_routes())[0]
+    return {'pojazd': object_size(v), 'kierowca': object_size(v.driver), 'koszty': object_size(v.cost_tracker)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark: pamięć na pojazd (pojazd, kierowca, CostTracker)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args(argv)
+
+    sizes = component_sizes()
+    print("obiekty jednego pojazdu: " + ", ".join(f"{name} {size} B" for name, size in sizes.items()))
+    print(f"{'pojazdy':>10} {'B/pojazd':>10} {'razem [MB]':>11}")
+    for count in args.sizes:
+        per_vehicle = fleet_memory(count)
+        print(f"{count:>10} {per_vehicle:>10,.0f} {per_vehicle * count / 2**20:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from symulacja_mpk.benchmarks.fleet_state import make_vehicles
+from symulacja_mpk.core.fleet import Y_BASE
+from symulacja_mpk.core.fleet_state import FleetState
+from symulacja_mpk.core.maintenance import Maintenance
+from symulacja_mpk.core.simulation import Simulation, DEFAULT_DT
+from symulacja_mpk.utils.cost_export import CsvCostSink, BinaryCostSink
+from symulacja_mpk.utils.random_streams import BufferedRandom
+
+DEFAULT_SIZES = (12, 1_000, 10_000, 100_000)
+WORK_PER_RUN = 200_000 # pojazdokroków na jeden pomiar; przy dużych flotach mniej kroków, ale co najmniej MIN_STEPS
+MIN_STEPS = 3
+REPEATS = 3 # wynik to najlepszy z pomiarów (najmniej zakłóceń od innych procesów)
+REGRESSION_THRESHOLD = 0.10 # spadek o więcej niż 10% względem bazy to regresja
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json") # zapisywana przez --save-baseline na maszynie, na której się porównuje (poza repozytorium)
+
+def _active_fleet(count: int): # flota z pojazdami już na trasie
+    routes, vehicles = make_vehicles(count)
+    for v in vehicles:
+        v.active = True
+    return routes, vehicles
+
+def bench_vehicle_update(count: int): # Vehicle.update dla całej floty
+    _, vehicles = _active_fleet(count)
+    state = {'time': 0.0}
+    def run(steps: int):
+        for _ in range(steps):
+            state['time'] += DEFAULT_DT / 1000.0
+            for v in vehicles:
+                v.update(DEFAULT_DT, 1.5, state['time'])
+    return run
+
+def bench_check_failure(count: int): # Maintenance.check_failure
+    _, vehicles = _active_fleet(count)
+    maintenance = Maintenance(rng=BufferedRandom(np.random.default_rng(0)))
+    def run(steps: int):
+        for _ in range(steps):
+            for v in vehicles:
+                maintenance.check_failure(v, DEFAULT_DT)
+    return run
+
+def bench_cost_update(count: int): # CostTracker.update
+    _, vehicles = _active_fleet(count)
+    pairs = [(v.cost_tracker, v) for v in vehicles]
+    def run(steps: int):
+        for _ in range(steps):
+            for tracker, v in pairs:
+                v.x += 1.0
+                tracker.update(v, DEFAULT_DT)
+    return run
+
+def _bench_cost_sink(sink_class):
+    def setup(count: int): # write_snapshot wszystkich pojazdów i zapis pliku (close) w każdym pomiarze
+        _, vehicles = _active_fleet(count)
+        trackers = [v.cost_tracker for v in vehicles]
+        directory = tempfile.TemporaryDirectory(prefix="mpk_bench_") # usuwany razem z run
+        def run(steps: int):
+            path = os.path.join(directory.name, "koszty")
+            if os.path.exists(path):
+                os.remove(path)
+            sink = sink_class(path)
+            for k in range(steps):
+                sink.write_snapshot(float(k), trackers)
+            sink.close()
+        return run
+    return setup
+
+def bench_simulation_step(count: int): # Simulation.step - pętla po obiektach (awarie, ruch, przystanki, koszty)
+    routes, vehicles = _active_fleet(count)
+    simulation = Simulation(routes, vehicles, Maintenance(rng=BufferedRandom(np.random.default_rng(0))))
+    def run(steps: int):
+        for _ in range(steps):
+            simulation.step()
+    return run
+
+def bench_fleet_state(count: int): # FleetState.step - tryb wektorowy
+    _, vehicles = _active_fleet(count)
+    fleet = FleetState(vehicles, rng=np.random.default_rng(0))
+    state = {'time': 0.0}
+    def run(steps: int):
+        for _ in range(steps):
+            state['time'] += DEFAULT_DT / 1000.0
+            fleet.step(DEFAULT_DT, state['time'])
+    return run
+
+def bench_gui_draw(count: int): # pełna klatka GUI (trasy, pojazdy, panel) na powierzchni poza ekranem, sterownik SDL "dummy"
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from symulacja_mpk.gui.sprites import set_vehicle_images
+    from symulacja_mpk.gui import display
+    from symulacja_mpk.utils.constants import GREEN, SCREEN_WIDTH, SCREEN_HEIGHT, VEHICLE_IMAGE_WIDTH, VEHICLE_IMAGE_HEIGHT
+
+    pygame.display.init()
+    pygame.font.init()
+    set_vehicle_images(pygame.Surface((VEHICLE_IMAGE_WIDTH, VEHICLE_IMAGE_HEIGHT), pygame.SRCALPHA), pygame.Surface((VEHICLE_IMAGE_WIDTH, VEHICLE_IMAGE_HEIGHT), pygame.SRCALPHA))
+    routes, vehicles = _active_fleet(count)
+    for i, v in enumerate(vehicles):
+        v.y = Y_BASE[i // 3 % len(Y_BASE)]
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    y_base = [Y_BASE[j % len(Y_BASE)] for j in range(len(routes))]
+    def run(steps: int):
+        for _ in range(steps):
+            screen.fill(GREEN)
+            display.draw_routes(screen, routes, y_base)
+            for v in vehicles:
+                v.x += 1.0
+                display.draw_vehicle(screen, v)
+            display.draw_info_panel(screen, vehicles)
+    return run
+
+BENCHMARKS: Dict[str, Callable] = { # nazwa -> funkcja przygotowująca dane dla floty o danej liczbie pojazdów i zwracająca run(steps)
+    'vehicle_update': bench_vehicle_update,
+    'check_failure': bench_check_failure,
+    'cost_update': bench_cost_update,
+    'cost_export_csv': _bench_cost_sink(CsvCostSink),
+    'cost_export_binary': _bench_cost_sink(BinaryCostSink),
+    'simulation_step': bench_simulation_step,
+    'fleet_state_step': bench_fleet_state,
+    'gui_draw': bench_gui_draw,
+}
+
+def measure(setup: Callable, count: int, repeats: int = REPEATS, work: int = WORK_PER_RUN) -> float: # pojazdokroki na sekundę (najlepszy z repeats pomiarów); przygotowanie danych nie jest mierzone
+    run = setup(count)
+    steps = max(MIN_STEPS, work // count)
+    run(1) # rozgrzewka (pierwsze alokacje, pamięć podręczna)
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(steps)
+        best = max(best, count * steps / (time.perf_counter() - start))
+    return best
+
+def run_suite(sizes=DEFAULT_SIZES, names: Optional[List[str]] = None, repeats: int = REPEATS, work: int = WORK_PER_RUN, progress: Optional[Callable[[str], None]] = None) -> Dict[str, float]: # wyniki jako {"nazwa/pojazdy": pojazdokroki na sekundę}
+    results = {}
+    for name in names or list(BENCHMARKS):
+        for count in sizes:
+            results[f"{name}/{count}"] = measure(BENCHMARKS[name], count, repeats, work)
+            if progress is not None:
+                progress(f"{name:>20} {count:>8} {results[f'{name}/{count}']:>16,.0f}")
+    return results
+
+def environment() -> dict: # opis maszyny i wersji - bazy z innego środowiska są porównywane z ostrzeżeniem
+    import pygame
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pygame': pygame.version.ver, 'machine': platform.machine(), 'system': platform.system(), 'processor': platform.processor() or platform.machine()}
+
+def save_baseline(results: Dict[str, float], path: str = BASELINE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'environment': environment(), 'created': time.strftime("%Y-%m-%d %H:%M:%S"), 'results': results}, f, indent=2, sort_keys=True)
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float = REGRESSION_THRESHOLD) -> List[dict]: # wiersz na pomiar obecny w obu zestawach: zmiana względem bazy i ocena
+    rows = []
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        change = value / baseline[key] - 1.0
+        status = "REGRESJA" if change < -threshold else ("POPRAWA" if change > threshold else "OK")
+        name, count = key.rsplit("/", 1)
+        rows.append({'benchmark': name, 'pojazdy': int(count), 'obecnie': value, 'baza': baseline[key], 'zmiana': change, 'ocena': status})
+    return rows
+
+def report(rows: List[dict]) -> str:
+    lines = [f"{'benchmark':>20} {'pojazdy':>8} {'baza [poj/s]':>16} {'obecnie [poj/s]':>16} {'zmiana':>8}  ocena"]
+    for row in rows:
+        lines.append(f"{row['benchmark']:>20} {row['pojazdy']:>8} {row['baza']:>16,.0f} {row['obecnie']:>16,.0f} {row['zmiana']:>+8.1%}  {row['ocena']}")
+    regressions = sum(row['ocena'] == "REGRESJA" for row in rows)
+    lines.append(f"regresje: {regressions} z {len(rows)}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki gorących ścieżek symulacji z porównaniem do zapisanej bazy")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=None, help="uruchom tylko wybrane benchmarki")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE_PATH, default=None, help="zapisz wyniki jako bazę (domyślnie benchmarks/baseline.json)")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, default=None, help="porównaj z zapisaną bazą")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="względny spadek uznawany za regresję")
+    parser.add_argument("--fail-on-regression", action="store_true", help="kod wyjścia 1, jeśli jest regresja (np. w nocnych przebiegach)")
+    args = parser.parse_args(argv)
+    if args.compare and args.compare != args.save_baseline and not os.path.exists(args.compare): # przed pomiarami, które trwają kilka minut
+        parser.error(f"brak bazy {args.compare}; baza zależy od maszyny, więc nie ma jej w repozytorium - zapisz ją najpierw na tej maszynie: python -m symulacja_mpk.benchmarks.suite --save-baseline")
+
+    print(f"{'benchmark':>20} {'pojazdy':>8} {'poj/s':>16}")
+    results = run_suite(args.sizes, args.only, args.repeats, progress=print)
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+        print(f"Zapisano bazę: {args.save_baseline}")
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline['environment'] != environment():
+            print(f"Uwaga: baza z innego środowiska ({baseline['environment']})")
+        rows = compare(results, baseline['results'], args.threshold)
+        print(report(rows))
+        if args.fail_on_regression and any(row['ocena'] == "REGRESJA" for row in rows):
+            sys.exit(1)
+    return results
+
+if __name__ == "__main__":
+    main()
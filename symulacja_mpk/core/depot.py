@@ -0,0 +1,215 @@
+import heapq
+import math
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from symulacja_mpk.core.vehicles import Vehicle, GOOD, BROKEN
+
+DEPOT_BAYS = 4 # domyślna liczba stanowisk naprawczych
+REPAIR_COST_PER_SECOND = 1.0 # koszt sekundy pracy stanowiska (jak w CostTracker.add_repair_cost)
+SERVICE_CONDITION = 3 # przegląd, gdy kondycja spadnie do tej wartości (0 - bez przeglądów z powodu kondycji)
+SERVICE_HOURS = 8.0 # przegląd co tyle godzin jazdy od poprzedniego (0 - bez przeglądów z powodu przebiegu)
+SERVICE_DURATION = 8.0 # czas przeglądu na stanowisku w s
+INSPECTION_INTERVAL = 60.0 # co ile sekund symulacji zajezdnia sprawdza, które pojazdy potrzebują przeglądu
+WAIT_WINDOW = 10_000 # ile ostatnich czasów oczekiwania trzymać dla percentyla
+DEPOT_PRIORITIES = ("line", "wait") # kolejność w kolejce: ważniejsza linia, potem czas oczekiwania / tylko czas oczekiwania
+
+IN_SERVICE, SERVICE_DUE, BROKEN_DOWN, IN_BAY = range(4) # stan pojazdu z punktu widzenia zajezdni
+REPAIR, SERVICE = 0, 1 # rodzaj zlecenia; naprawy po awarii mają pierwszeństwo przed przeglądami
+
+def line_name(vehicle: Vehicle) -> str: # linia pojazdu jak 'linia' w CostLedger; line_number jest numerem pojazdu, linię wyznacza trasa
+    stops = vehicle.route.get_stops()
+    return f"{stops[0]} - {stops[-1]}"
+
+class Depot: # zajezdnia ze skończoną liczbą stanowisk: pojazd po awarii dociera do niej po czasie awarii (breakdown_duration) i czeka w kolejce priorytetowej na wolne stanowisko, gdzie naprawa trwa repair_duration; pojazdy z niską kondycją lub dużym przebiegiem są kierowane na przegląd. Kolejka, przyjazdy i zwolnienia stanowisk to kopce, więc krok kosztuje O(zmian * log n), a przegląd floty jest robiony raz na inspection_interval
+    def __init__(self, vehicles: List[Vehicle], bays: int = DEPOT_BAYS, priority: str = "line", line_priority: Optional[Dict[str, float]] = None, service_condition: int = SERVICE_CONDITION, service_hours: float = SERVICE_HOURS, service_duration: float = SERVICE_DURATION, inspection_interval: float = INSPECTION_INTERVAL, cost_per_second: float = REPAIR_COST_PER_SECOND):
+        if bays < 1:
+            raise ValueError("zajezdnia potrzebuje co najmniej jednego stanowiska")
+        if priority not in DEPOT_PRIORITIES:
+            raise ValueError(f"nieznany priorytet kolejki: {priority} (dostępne: {', '.join(DEPOT_PRIORITIES)})")
+        self.vehicles = vehicles
+        self.bays = bays # liczba stanowisk
+        self.priority = priority # "line" - ważniejsze linie pierwsze, potem dłużej czekające; "wait" - kolejność przyjazdu
+        lines = [line_name(v) for v in vehicles]
+        if line_priority is None: # wagi linii według nazw jak w CostLedger ('pierwszy - ostatni przystanek'); domyślnie liczba pojazdów na trasie
+            line_priority = {}
+            for line in lines:
+                line_priority[line] = line_priority.get(line, 0) + 1
+        self.weight = np.array([line_priority.get(line, 0.0) for line in lines], dtype=float) # waga linii każdego pojazdu
+        self.service_condition = service_condition # kondycja, przy której pojazd jedzie na przegląd
+        self.service_hours = service_hours # godziny jazdy od ostatniego przeglądu, po których pojazd jedzie na przegląd
+        self.service_duration = service_duration # czas przeglądu w s
+        self.inspection_interval = inspection_interval # co ile s sprawdzać, kto potrzebuje przeglądu
+        self.cost_per_second = cost_per_second # koszt sekundy na stanowisku
+        self.fleet = None # FleetState w trybie wektorowym (ustawia Simulation)
+        self._index = {v: i for i, v in enumerate(vehicles)} # klucze to same pojazdy (nie id), więc indeks działa po wczytaniu punktu kontrolnego
+        self.status = np.full(len(vehicles), IN_SERVICE, dtype=np.int8)
+        self.serviced_hours = np.zeros(len(vehicles)) # godziny jazdy przy ostatnim przeglądzie lub naprawie
+        self._ticket = np.full(len(vehicles), -1, dtype=np.int64) # numer ważnego zlecenia przeglądu pojazdu w kolejce
+
+        self._reported = [] # awarie zgłoszone w bieżącym kroku (indeksy pojazdów)
+        self._arrivals = [] # kopiec (czas dotarcia do zajezdni, pojazd, czas naprawy, chwila awarii)
+        self._queue = [] # kopiec (rodzaj, -waga linii, czas wejścia do kolejki, kolejny numer, pojazd, czas pracy, początek przestoju)
+        self._bays = [] # kopiec (koniec pracy, pojazd, rodzaj, początek przestoju)
+        self._stale = 0 # nieaktualne zlecenia przeglądów w kolejce (pojazd zepsuł się w trakcie czekania)
+        self._seq = 0
+        self._next_inspection = 0.0
+        self.time = 0.0
+
+        self.repairs = 0 # zakończone naprawy po awarii
+        self.services = 0 # zakończone przeglądy
+        self.max_queue = 0
+        self.queue_time = 0.0 # całka długości kolejki po czasie
+        self.busy_time = 0.0 # całka zajętych stanowisk po czasie
+        self.wait_total = [0.0, 0.0] # suma czasów oczekiwania na stanowisko w s (naprawy, przeglądy)
+        self.downtime_total = 0.0 # suma czasów od awarii do powrotu na trasę w s
+        self.recent_waits = deque(maxlen=WAIT_WINDOW)
+
+    @property
+    def queue_length(self) -> int: # pojazdy w zajezdni czekające na stanowisko
+        return len(self._queue) - self._stale
+
+    @property
+    def busy_bays(self) -> int:
+        return len(self._bays)
+
+    def attach(self, fleet): # tryb wektorowy: stan pojazdów jest w tablicach FleetState
+        self.fleet = fleet
+        fleet.depot = self
+
+    def report(self, vehicle: Vehicle): # Maintenance.break_down: pojazd uległ awarii (koszt naprawy nalicza zajezdnia)
+        self._reported.append(self._index[vehicle])
+
+    def report_many(self, indices: np.ndarray): # FleetState.check_failures: indeksy pojazdów, które uległy awarii
+        self._reported.extend(indices.tolist())
+
+    def _get(self, name: str, i: int):
+        return getattr(self.fleet, name)[i] if self.fleet is not None else getattr(self.vehicles[i], name)
+
+    def _set(self, i: int, **values): # ustawia pola pojazdu w obiekcie albo w tablicach FleetState
+        if self.fleet is not None:
+            for name, value in values.items():
+                getattr(self.fleet, name)[i] = value
+        else:
+            v = self.vehicles[i]
+            for name, value in values.items():
+                setattr(v, name, value)
+
+    def _hold(self, i: int): # pojazd zostaje w stanie awarii, dopóki zajezdnia go nie wypuści
+        self._set(i, repair_duration=math.inf)
+
+    def _take_out(self, i: int): # zjazd na przegląd: poza trasą jak przy awarii; kondycja 0 wyłącza losowanie awarii na stanowisku
+        if self.fleet is not None:
+            self._set(i, broken=True, condition=0, time_broken=0.0, breakdown_duration=0.0, repair_duration=math.inf)
+        else:
+            self._set(i, state=BROKEN, condition=0, time_broken=0.0, breakdown_duration=0.0, repair_duration=math.inf)
+
+    def _release(self, i: int): # koniec pracy na stanowisku - jak koniec naprawy w Vehicle.update
+        if self.fleet is not None:
+            self._set(i, broken=False, time_broken=0.0, condition=10)
+        else:
+            self._set(i, state=GOOD, time_broken=0.0, condition=10)
+        self.serviced_hours[i] = self._get('hours_driven', i)
+        self.status[i] = IN_SERVICE
+
+    def _charge(self, i: int, seconds: float):
+        if self.fleet is not None:
+            if self.fleet.has_tracker[i]:
+                self.fleet.repair_cost[i] += seconds * self.cost_per_second
+        elif self.vehicles[i].cost_tracker:
+            self.vehicles[i].cost_tracker.add_repair_cost(seconds, self.cost_per_second)
+
+    def _enqueue(self, kind: int, i: int, now: float, work: float, since: float):
+        weight = -float(self.weight[i]) if self.priority == "line" else 0.0
+        heapq.heappush(self._queue, (kind, weight, now, self._seq, i, work, since))
+        self._seq += 1
+
+    def _inspect(self): # pojazdy na trasie, które potrzebują przeglądu
+        if self.fleet is not None:
+            good, condition, hours, active = ~self.fleet.broken, self.fleet.condition, self.fleet.hours_driven, self.fleet.active
+        else:
+            vehicles = self.vehicles
+            good = np.array([v.state is GOOD for v in vehicles], dtype=bool)
+            condition = np.array([v.condition for v in vehicles], dtype=np.int64)
+            hours = np.array([v.hours_driven for v in vehicles], dtype=float)
+            active = np.array([v.active for v in vehicles], dtype=bool)
+        due = np.zeros(len(self.vehicles), dtype=bool)
+        if self.service_condition > 0:
+            due |= condition <= self.service_condition
+        if self.service_hours > 0:
+            due |= hours - self.serviced_hours >= self.service_hours
+        return np.flatnonzero(due & good & active & (self.status == IN_SERVICE))
+
+    def step(self, now: float): # po ruchu pojazdów w kroku kończącym się w chwili now (w s): przyjazdy, zwolnienia stanowisk, przeglądy i przydział stanowisk
+        elapsed = now - self.time
+        self.queue_time += self.queue_length * elapsed
+        self.busy_time += len(self._bays) * elapsed
+        self.time = now
+
+        for i in self._reported:
+            if self.status[i] == SERVICE_DUE:
+                self._stale += 1 # zlecenie przeglądu zostaje w kopcu i jest pomijane
+                self._ticket[i] = -1
+            self.status[i] = BROKEN_DOWN
+            heapq.heappush(self._arrivals, (now + float(self._get('breakdown_duration', i)), i, float(self._get('repair_duration', i)), now))
+            self._hold(i)
+        self._reported.clear()
+
+        arrivals = self._arrivals
+        while arrivals and arrivals[0][0] <= now:
+            arrived, i, work, broke = heapq.heappop(arrivals)
+            self._enqueue(REPAIR, i, arrived, work, broke)
+
+        bays = self._bays
+        while bays and bays[0][0] <= now:
+            _, i, kind, since = heapq.heappop(bays)
+            self._release(i)
+            if kind == REPAIR:
+                self.repairs += 1
+                self.downtime_total += now - since
+            else:
+                self.services += 1
+
+        if now >= self._next_inspection:
+            self._next_inspection = now + self.inspection_interval
+            for i in self._inspect().tolist():
+                self.status[i] = SERVICE_DUE
+                self._ticket[i] = self._seq
+                self._enqueue(SERVICE, i, now, self.service_duration, now)
+
+        queue = self._queue
+        while queue and len(bays) < self.bays:
+            kind, _, queued, seq, i, work, since = heapq.heappop(queue)
+            if kind == SERVICE:
+                if self._ticket[i] != seq:
+                    self._stale -= 1
+                    continue
+                self._take_out(i)
+            self.status[i] = IN_BAY
+            self.wait_total[kind] += now - queued
+            self.recent_waits.append(now - queued)
+            self._charge(i, work)
+            heapq.heappush(bays, (now + work, i, kind, since))
+        self.max_queue = max(self.max_queue, self.queue_length)
+
+    def statistics(self) -> dict: # obciążenie zajezdni od początku przebiegu
+        hours = self.time / 3600.0
+        started = self.repairs + self.services + len(self._bays)
+        repairs_started = self.repairs + sum(1 for bay in self._bays if bay[2] == REPAIR)
+        return {
+            'stanowiska': self.bays,
+            'naprawy': self.repairs,
+            'przeglądy': self.services,
+            'w_kolejce': self.queue_length,
+            'na_stanowiskach': len(self._bays),
+            'maks_kolejka': self.max_queue,
+            'śr_kolejka': round(self.queue_time / self.time, 3) if self.time else 0.0,
+            'wykorzystanie': round(self.busy_time / (self.bays * self.time), 3) if self.time else 0.0,
+            'przepustowość_h': round((self.repairs + self.services) / hours, 1) if hours else 0.0,
+            'śr_oczekiwanie_s': round(sum(self.wait_total) / started, 1) if started else 0.0,
+            'p95_oczekiwanie_s': round(float(np.percentile(self.recent_waits, 95)), 1) if self.recent_waits else 0.0,
+            'śr_oczekiwanie_naprawa_s': round(self.wait_total[REPAIR] / repairs_started, 1) if repairs_started else 0.0,
+            'śr_przestój_s': round(self.downtime_total / self.repairs, 1) if self.repairs else 0.0,
+        }
@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
 
 class Driver(ABC):  # abstrakcyjna klasa kierowcy danego pojazdu - ma imię i wypłatę
+    __slots__ = ('name', 'salary', 'speed_multiplier', 'failure_risk_multiplier')
     def __init__(self, name: str, salary: float):
         self.name = name
         self.salary = salary
+        self.speed_multiplier = self.get_speed_multiplier() # mnożniki nie zmieniają się, więc są liczone raz; Maintenance i pojazdy czytają atrybuty zamiast wywoływać metody w każdej klatce
+        self.failure_risk_multiplier = self.get_failure_risk_multiplier()
 
     @abstractmethod
     def get_speed_multiplier(self) -> float:
@@ -14,6 +17,7 @@ class Driver(ABC):  # abstrakcyjna klasa kierowcy danego pojazdu - ma imię i wy
         pass
 
 class NormalDriver(Driver): # bazowa prędkość i ryzyko awarii
+    __slots__ = ()
     def __init__(self, name: str, salary: float):
         super().__init__(name, salary)
 
@@ -25,6 +29,7 @@ class NormalDriver(Driver): # bazowa prędkość i ryzyko awarii
 
 
 class CarefulDriver(Driver): # wolniejszy-mniejsze ryzyko
+    __slots__ = ()
     def __init__(self, name: str, salary: float):
         super().__init__(name, salary)
 
@@ -36,6 +41,7 @@ class CarefulDriver(Driver): # wolniejszy-mniejsze ryzyko
 
 
 class AggressiveDriver(Driver): # szybszy-większe ryzyko
+    __slots__ = ()
     def __init__(self, name: str, salary: float):
         super().__init__(name, salary)
 
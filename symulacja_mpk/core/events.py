@@ -0,0 +1,260 @@
+import heapq
+import math
+from enum import IntEnum
+from typing import Callable, List, Optional
+
+from symulacja_mpk.core.maintenance import Maintenance
+from symulacja_mpk.core.passengers import PassengerDemand
+from symulacja_mpk.core.route import Route
+from symulacja_mpk.core.simulation import DEFAULT_DT
+from symulacja_mpk.core.traffic import next_period_change
+from symulacja_mpk.core.vehicles import Vehicle, GOOD, BROKEN
+from symulacja_mpk.utils.cost_ledger import CostLedger
+from symulacja_mpk.utils.profiling import PhaseProfiler
+from symulacja_mpk.utils.constants import TRACK_LEFT_BOUND, TRACK_RIGHT_LIMIT
+
+STOP_WAIT_TIME = 5.0 # czas postoju na przystanku w s (jak w Vehicle.update)
+
+class EventType(IntEnum): # rodzaje zdarzeń w kolejce
+    ACTIVATE = 1 # pojazd wyjeżdża na trasę
+    ARRIVE = 2 # przyjazd na przystanek
+    DEPART = 3 # odjazd z przystanku
+    TERMINUS = 4 # zmiana kierunku na pętli
+    FAILURE = 5 # spadek kondycji o 1; przy kondycji 0 pojazd się psuje
+    REPAIRED = 6 # koniec awarii i naprawy
+    TRAFFIC = 7 # zmiana pory dnia - nowe opóźnienia dla jadących pojazdów
+    LEDGER = 8 # koniec okna księgi kosztów - rozliczenie wszystkich pojazdów
+
+EVENT_PHASES = {EventType.ACTIVATE: "wyjazd", EventType.ARRIVE: "przyjazd", EventType.DEPART: "odjazd", EventType.TERMINUS: "pętla",
+                EventType.FAILURE: "awaria", EventType.REPAIRED: "naprawa", EventType.TRAFFIC: "pora dnia", EventType.LEDGER: "księga"} # nazwy faz profilera dla rodzajów zdarzeń
+
+
+class EventSimulation: # symulacja zdarzeń dyskretnych - czasy przyjazdów, odjazdów, awarii i napraw są liczone analitycznie, więc stojące pojazdy nie kosztują nic
+    def __init__(self, routes: List[Route], vehicles: List[Vehicle], maintenance: Optional[Maintenance] = None, reference_dt: float = DEFAULT_DT, passengers: Optional[PassengerDemand] = None, ledger: Optional[CostLedger] = None, profiler: Optional[PhaseProfiler] = None):
+        self.routes = routes
+        self.vehicles = vehicles
+        self.maintenance = maintenance if maintenance is not None else Maintenance()
+        self.passengers = passengers # model pasażerów jak w Simulation
+        self.ledger = ledger # księga kosztów jak w Simulation; koszty są rozliczane leniwie, więc na końcu okna rozliczane są wszystkie pojazdy
+        self.profiler = profiler # czasy obsługi zdarzeń każdego rodzaju
+        self.steps_per_second = 1000.0 / reference_dt # reference_dt - klatka w ms, dla której Vehicle.speed oznacza przesunięcie na klatkę
+        self.current_time = 0.0 # obecny czas symulacji w s
+        self.events_processed = 0
+
+        self._queue = [] # kopiec (czas, numer kolejny, rodzaj, indeks pojazdu, wersja)
+        self._sequence = 0 # numer kolejny zdarzenia - przy równych czasach decyduje kolejność planowania (zwykła liczba, więc stan da się zapisać w punkcie kontrolnym)
+        n = len(vehicles)
+        self._motion_version = [0] * n # zdarzenia ruchu z nieaktualną wersją (np. przerwane awarią) są pomijane
+        self._moving = [False] * n
+        self._move_start_time = [0.0] * n
+        self._move_start_x = [float(v.x) for v in vehicles]
+        self._move_velocity = [0.0] * n # prędkość (px/s) ustalona na początku ruchu; zmienia się tylko na przystankach i przy zmianie pory dnia
+        self._depart_time = [None] * n # czas odjazdu z przystanku, jeśli pojazd stoi na przystanku
+        self._remaining_wait = [None] * n # pozostały postój zapamiętany na czas awarii
+        self._last_touch = [0.0] * n # czas ostatniego rozliczenia kosztów i godzin pracy
+
+        for i, v in enumerate(vehicles):
+            if not v.active:
+                self._schedule(v.activation_time, EventType.ACTIVATE, i)
+            elif v.state is BROKEN:
+                self._remaining_wait[i] = v.wait_timer if v.wait_timer > 0 else None
+            elif v.wait_timer > 0:
+                self._wait(i, 0.0, v.wait_timer)
+            else:
+                self._start_motion(i, 0.0)
+            if v.state is BROKEN:
+                if v.active:
+                    self._schedule_repair(i, 0.0)
+            else:
+                self._schedule_failure(i, 0.0)
+
+        if any(len({tuple(d) for d in r.get_traffic().period_delays}) > 1 for r in routes): # opóźnienia zależą od pory dnia
+            self._schedule(next_period_change(0.0), EventType.TRAFFIC, -1)
+        if ledger is not None:
+            self._schedule(ledger.next_window(), EventType.LEDGER, -1)
+
+    def _schedule(self, time: float, kind: EventType, i: int, version: int = 0):
+        self._sequence += 1
+        heapq.heappush(self._queue, (time, self._sequence, kind, i, version))
+
+    def _velocity(self, v: Vehicle, now: float) -> float: # prędkość w px/s przy współczynniku opóźnienia w chwili now na obecnym odcinku trasy
+        return v.speed / v.route.get_delay_factor(now, v.current_segment()) * self.steps_per_second
+
+    def _schedule_failure(self, i: int, now: float): # planuje kolejny spadek kondycji (Maintenance.sample_time_to_failure)
+        delay = self.maintenance.sample_time_to_failure(self.vehicles[i])
+        if delay != math.inf:
+            self._schedule(now + delay, EventType.FAILURE, i)
+
+    def _schedule_repair(self, i: int, now: float): # koniec awarii i naprawy; czas awarii biegnie tylko, gdy pojazd jest na trasie (jak w Vehicle.update), więc pojazd zepsuty przed wyjazdem dostaje zdarzenie przy ACTIVATE
+        v = self.vehicles[i]
+        self._schedule(now + v.breakdown_duration + v.repair_duration - v.time_broken, EventType.REPAIRED, i)
+
+    def _touch(self, i: int, now: float): # rozlicza przesunięcie, godziny pracy i koszty pojazdu od ostatniego zdarzenia do now
+        v = self.vehicles[i]
+        elapsed = now - self._last_touch[i]
+        if elapsed <= 0:
+            return
+        self._last_touch[i] = now
+        if v.condition > 0:
+            v.hours_driven += elapsed / 60.0 / 60.0
+        if not v.active:
+            return
+        if self._moving[i]:
+            v.x = self._move_start_x[i] + v.direction * self._move_velocity[i] * (now - self._move_start_time[i])
+        if self._depart_time[i] is not None:
+            v.wait_timer = self._depart_time[i] - now
+        if v.state is BROKEN:
+            v.time_broken += elapsed
+        if v.cost_tracker:
+            v.cost_tracker.update(v, elapsed * 1000.0)
+
+    def _reached(self, v: Vehicle, stop_x: float) -> bool:
+        return (v.direction == 1 and v.x >= stop_x) or (v.direction == -1 and v.x <= stop_x)
+
+    def _start_motion(self, i: int, now: float): # pojazd rusza z obecnej pozycji; planuje przyjazd na najbliższy przystanek albo na pętlę
+        v = self.vehicles[i]
+        self._motion_version[i] += 1
+        self._depart_time[i] = None
+        v.wait_timer = 0.0
+        bound = TRACK_RIGHT_LIMIT if v.direction == 1 else TRACK_LEFT_BOUND
+        distance = abs(bound - v.x)
+        kind = EventType.TERMINUS
+        if 0 <= v.next_stop_index < len(v.stop_positions):
+            stop_x = v.stop_positions[v.next_stop_index]
+            if self._reached(v, stop_x):
+                self._arrive(i, now)
+                return
+            if abs(stop_x - v.x) < distance: # przy przystanku na samej pętli najpierw następuje zmiana kierunku
+                distance = abs(stop_x - v.x)
+                kind = EventType.ARRIVE
+
+        self._moving[i] = True
+        self._move_start_time[i] = now
+        self._move_start_x[i] = v.x
+        velocity = self._velocity(v, now)
+        self._move_velocity[i] = velocity
+        if velocity > 0:
+            self._schedule(now + distance / velocity, kind, i, self._motion_version[i])
+
+    def _stop_motion(self, i: int, now: float): # zatrzymuje pojazd w miejscu, w którym jest w chwili now
+        self._touch(i, now)
+        self._moving[i] = False
+        self._motion_version[i] += 1
+
+    def _arrive(self, i: int, now: float):
+        v = self.vehicles[i]
+        self._stop_motion(i, now)
+        v.x = v.stop_positions[v.next_stop_index] # Upewnij się, że pojazd jest dokładnie na przystanku
+        v.next_stop_index += v.direction
+        if self.passengers is not None:
+            self._wait(i, now, self.passengers.serve(i, v.next_stop_index - v.direction, v.direction, now))
+        else:
+            self._wait(i, now, STOP_WAIT_TIME)
+
+    def _wait(self, i: int, now: float, duration: float):
+        v = self.vehicles[i]
+        v.wait_timer = duration
+        self._depart_time[i] = now + duration
+        self._schedule(now + duration, EventType.DEPART, i, self._motion_version[i])
+
+    def _terminus(self, i: int, now: float):
+        v = self.vehicles[i]
+        self._stop_motion(i, now)
+        v.x = TRACK_RIGHT_LIMIT if v.direction == 1 else TRACK_LEFT_BOUND
+        v.direction = -v.direction
+        v.next_stop_index = v.route.next_stop_index(v.x, v.direction)
+        self._start_motion(i, now)
+
+    def _failure(self, i: int, now: float):
+        v = self.vehicles[i]
+        self._touch(i, now)
+        v.condition -= 1
+        if v.condition > 0:
+            self._schedule_failure(i, now)
+            return
+
+        waiting = self._depart_time[i] is not None # postój na przystanku zostaje wstrzymany na czas awarii
+        self._stop_motion(i, now)
+        self._remaining_wait[i] = self._depart_time[i] - now if waiting else None
+        self._depart_time[i] = None
+        self.maintenance.break_down(v)
+        if v.active:
+            self._schedule_repair(i, now)
+
+    def _repaired(self, i: int, now: float):
+        v = self.vehicles[i]
+        self._touch(i, now)
+        v.state = GOOD
+        v.time_broken = 0.0
+        v.condition = 10
+        self._schedule_failure(i, now)
+        if self._remaining_wait[i] is not None:
+            self._wait(i, now, self._remaining_wait[i])
+            self._remaining_wait[i] = None
+        else:
+            self._start_motion(i, now)
+
+    def _traffic(self, now: float): # przelicza ruch pojazdów, których prędkość zmieniła się wraz z porą dnia
+        for i, v in enumerate(self.vehicles):
+            if self._moving[i] and self._velocity(v, now) != self._move_velocity[i]:
+                self._stop_motion(i, now)
+                self._start_motion(i, now)
+        self._schedule(next_period_change(now), EventType.TRAFFIC, -1)
+
+    def _process(self, kind: EventType, i: int, now: float):
+        if kind == EventType.TRAFFIC:
+            self._traffic(now)
+            return
+        if kind == EventType.LEDGER:
+            self.sync_vehicles()
+            self.ledger.advance(now)
+            self._schedule(self.ledger.next_window(), EventType.LEDGER, -1)
+            return
+        v = self.vehicles[i]
+        if kind == EventType.FAILURE:
+            self._failure(i, now)
+        elif kind == EventType.REPAIRED:
+            self._repaired(i, now)
+        elif kind == EventType.ACTIVATE:
+            self._touch(i, now)
+            v.active = True
+            if v.state is BROKEN:
+                self._schedule_repair(i, now)
+            else:
+                self._start_motion(i, now)
+        elif kind == EventType.ARRIVE:
+            self._arrive(i, now)
+        elif kind == EventType.DEPART:
+            self._touch(i, now)
+            self._start_motion(i, now)
+        elif kind == EventType.TERMINUS:
+            self._terminus(i, now)
+
+    def advance_to(self, until: float): # przetwarza wszystkie zdarzenia do czasu until (w s) i ustawia tam czas symulacji
+        queue = self._queue
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin()
+        while queue and queue[0][0] <= until:
+            time, _, kind, i, version = heapq.heappop(queue)
+            if kind in (EventType.ARRIVE, EventType.DEPART, EventType.TERMINUS) and version != self._motion_version[i]:
+                continue
+            self.current_time = time
+            self._process(kind, i, time)
+            self.events_processed += 1
+            if profiler is not None:
+                profiler.lap(EVENT_PHASES[kind]) # razem ze zdjęciem z kolejki (i nieaktualnych zdarzeń przed nim)
+        self.current_time = max(self.current_time, until)
+
+    def sync_vehicles(self): # rozlicza wszystkie pojazdy do obecnego czasu (pozycje, liczniki, koszty), np. przed zapisem kosztów lub rysowaniem
+        for i in range(len(self.vehicles)):
+            self._touch(i, self.current_time)
+
+    def run(self, until: float, on_step: Optional[Callable[["EventSimulation"], None]] = None, interval: float = 1.0): # Symuluje do czasu until (w s). Jeśli podano on_step, jest wywoływana co interval sekund symulacji (np. CostExporter)
+        if on_step is None:
+            self.advance_to(until)
+        else:
+            while self.current_time < until:
+                self.advance_to(min(until, self.current_time + interval))
+                on_step(self)
+        self.sync_vehicles()
@@ -0,0 +1,69 @@
+import random
+from typing import List, Optional
+
+from symulacja_mpk.core.traffic import Traffic, TimePeriod
+from symulacja_mpk.core.route import Route
+from symulacja_mpk.core.drivers import NormalDriver, CarefulDriver, AggressiveDriver, Driver
+from symulacja_mpk.core.vehicles import Bus, Tram, Vehicle
+from symulacja_mpk.utils.cost_tracker import CostTracker
+from symulacja_mpk.utils.random_streams import choice, shuffle
+
+VEHICLES_PER_ROUTE = 3
+Y_BASE = [100, 200, 300, 400] # domyślne pozycje pionowe dla trasy danej
+
+def create_default_routes() -> List[Route]: # nazwy przystanków, poszczególne trasy oraz warunki - długość i natężenie z porą dnia
+    return [
+        Route(["Dworzec Główny", "Rynek", "Opera", "Narodowe Forum Muzyki"], 12, Traffic(4, TimePeriod.MORNING)),
+        Route(["Park Południowy", "Aquapark", "Dworzec Autobusowy", "Plac Świebodzki"], 10, Traffic(3, TimePeriod.MIDDAY)),
+        Route(["Swojczyce", "Pasaż Grunwaldzki", "Zoo", "Krzyki"], 11, Traffic(5, TimePeriod.AFTERNOON)),
+        Route(["Metalowców", "Stadion Olimpijski", "Na Ostatnim Groszu", "Grabiszyński Park"], 13, Traffic(6, TimePeriod.EVENING)),
+    ]
+
+DRIVER_TYPES = [CarefulDriver, NormalDriver, AggressiveDriver]
+
+def create_random_drivers_pool(num_drivers: int, rng=None, weights: Optional[List[float]] = None, base_salary: float = 3000, salary_step: float = 50) -> List[Driver]: # tworzy pule kierowców z losowym wynagrodzeniem i stylem jazdy; rng - źródło losowości (random.Random lub numpy.random.Generator, domyślnie moduł random), weights - udział typów z DRIVER_TYPES (domyślnie równy)
+    rng = rng if rng is not None else random
+    drivers = []
+
+    for i in range(num_drivers):
+        chosen_driver_class = choice(rng, DRIVER_TYPES, weights)
+        salary = base_salary + i * salary_step
+
+        driver_name = f"{chosen_driver_class.__name__.replace('Driver', '')} {i + 1}"
+
+        driver = chosen_driver_class(driver_name, salary)
+        drivers.append(driver)
+
+    shuffle(rng, drivers)
+    return drivers
+
+def create_vehicle(is_tram: bool, line_number: str, route: Route, driver: Driver, consumption: float, speed: float) -> Vehicle: # autobus lub tramwaj razem z jego CostTrackerem
+    if is_tram:
+        vehicle = Tram(line_number=line_number, route=route, driver=driver, electricity_consumption=consumption, speed=speed)
+    else:
+        vehicle = Bus(line_number=line_number, route=route, driver=driver, fuel_consumption=consumption, speed=speed)
+    vehicle.cost_tracker = CostTracker(vehicle.line_number, driver.salary, consumption, is_tram=is_tram)
+    return vehicle
+
+def create_fleet(routes: List[Route], y_base: List[int] = Y_BASE, rng=None) -> List[Vehicle]: # tworzenie pojazdów i właściwości; pierwsze dwie trasy obsługują autobusy, pozostałe tramwaje. rng - źródło losowości puli kierowców
+    drivers_pool = create_random_drivers_pool(len(routes) * VEHICLES_PER_ROUTE, rng)
+    vehicles = []
+
+    for line_index, route in enumerate(routes):
+        for i in range(VEHICLES_PER_ROUTE):
+
+            if drivers_pool:
+                driver = drivers_pool.pop(0)  # pierwszy kierowaca z puli
+            else:
+                driver = NormalDriver(f"Default Driver {line_index * 3 + i}", 3000) # jeżeli brak kierowców w puli to deafult
+
+            if line_index < 2: # autobusy mają 2 pierwsze trasy
+                vehicle = create_vehicle(False, f"B{line_index * 3 + i + 1}", route, driver, 0.3 + i * 0.05, 0.7 + i * 0.05)
+            else:
+                vehicle = create_vehicle(True, f"T{(line_index - 2) * 3 + i + 1}", route, driver, 0.4 + i * 0.03, 0.8 + i * 0.05)
+
+            vehicle.y = y_base[line_index % len(y_base)]  # domyślny Y dla pojazdu
+            vehicle.activation_time = i * 15  # aktywacja po starcie symulacji kolejnych pojazdów na linii
+            vehicles.append(vehicle)
+
+    return vehicles
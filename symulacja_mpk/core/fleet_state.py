@@ -0,0 +1,195 @@
+from typing import List
+import numpy as np
+
+from symulacja_mpk.core.vehicles import Vehicle, GOOD, BROKEN
+from symulacja_mpk.core.maintenance import MAX_BREAKDOWN_SECONDS
+from symulacja_mpk.core.traffic import PERIODS, SLOT_PERIOD, time_slot
+from symulacja_mpk.utils.constants import TRACK_LEFT_BOUND, TRACK_RIGHT_LIMIT, REFERENCE_DT
+
+STOP_WAIT_TIME = 5.0 # czas postoju na przystanku w s (jak w Vehicle.update)
+REPAIR_DRAW_LOW = np.array([5.0, 5.0]) # zakresy losowania czasu awarii i czasu naprawy (jak w Maintenance.break_down)
+REPAIR_DRAW_HIGH = np.array([31.0, 15.0])
+
+class FleetState: # stan całej floty jako tablice NumPy (struct-of-arrays); jeden krok liczy awarie, ruch, przystanki, pętle i koszty dla wszystkich pojazdów naraz
+    depot = None # Depot, któremu zgłaszane są awarie (jak Maintenance.depot)
+    def __init__(self, vehicles: List[Vehicle], base_failure_chance: float = 0.01, rng=None, repair_rng=None): # Argumenty: vehicles - pojazdy, z których kopiowany jest stan, base_failure_chance - jak w Maintenance, rng/repair_rng - generatory NumPy (lub BufferedRandom) dla losowania awarii oraz czasów awarii i naprawy
+        self.vehicles = vehicles
+        self.n = len(vehicles)
+        self.base_failure_chance = base_failure_chance
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.repair_rng = repair_rng if repair_rng is not None else self.rng
+
+        self.x = np.array([v.x for v in vehicles], dtype=float)
+        self.direction = np.array([v.direction for v in vehicles], dtype=np.int64)
+        self.speed = np.array([v.speed for v in vehicles], dtype=float)
+        # opóźnienia wszystkich tras: route_delays[trasa, pora dnia, odcinek]; w każdym kroku wybierany jest jeden element na pojazd
+        routes = list({id(v.route): v.route for v in vehicles}.values())
+        route_index = {id(r): j for j, r in enumerate(routes)}
+        period_delays = [r.get_traffic().period_delays for r in routes]
+        self.route_index = np.array([route_index[id(v.route)] for v in vehicles], dtype=np.int64)
+        self.route_delays = np.ones((len(routes), len(PERIODS), max([len(d[0]) for d in period_delays], default=1)), dtype=float)
+        for j, delays in enumerate(period_delays):
+            self.route_delays[j, :, :len(delays[0])] = delays
+        self.n_segments = np.array([len(period_delays[route_index[id(v.route)]][0]) for v in vehicles], dtype=np.int64)
+        self.delay_factor = np.array([v.route.get_delay_factor() for v in vehicles], dtype=float)
+        self.risk_multiplier = np.array([v.driver.failure_risk_multiplier for v in vehicles], dtype=float)
+        self.condition = np.array([v.condition for v in vehicles], dtype=np.int64)
+        self.broken = np.array([v.state is BROKEN for v in vehicles], dtype=bool)
+        self.hours_driven = np.array([v.hours_driven for v in vehicles], dtype=float)
+        self.time_broken = np.array([v.time_broken for v in vehicles], dtype=float)
+        self.breakdown_duration = np.array([v.breakdown_duration for v in vehicles], dtype=float)
+        self.repair_duration = np.array([v.repair_duration for v in vehicles], dtype=float)
+        self.wait_timer = np.array([v.wait_timer for v in vehicles], dtype=float)
+        self.active = np.array([v.active for v in vehicles], dtype=bool)
+        self.activation_time = np.array([v.activation_time for v in vehicles], dtype=float)
+
+        # przystanki tras w kolejności trasy (jak Route.get_stop_positions), dopełnione nieskończonością; pojazd wskazuje wiersz przez route_index
+        self.n_stops = np.array([len(v.stop_positions) for v in vehicles], dtype=np.int64)
+        self.route_stops = np.full((len(routes), max([len(r.get_stop_positions()) for r in routes], default=1)), np.inf)
+        for j, r in enumerate(routes):
+            self.route_stops[j, :len(r.get_stop_positions())] = r.get_stop_positions()
+        self.next_stop_index = np.array([v.next_stop_index for v in vehicles], dtype=np.int64)
+
+        self.has_tracker = np.array([v.cost_tracker is not None for v in vehicles], dtype=bool)
+        trackers = [v.cost_tracker for v in vehicles]
+        self.salary_per_hour = np.array([t.driver_salary_per_hour if t else 0.0 for t in trackers], dtype=float)
+        self.consumption_per_km = np.array([t.consumption_per_km if t else 0.0 for t in trackers], dtype=float)
+        self.salary = np.array([t.salary if t else 0.0 for t in trackers], dtype=float)
+        self.fuel_electricity_cost = np.array([t.fuel_electricity_cost if t else 0.0 for t in trackers], dtype=float)
+        self.repair_cost = np.array([t.repair_cost if t else 0.0 for t in trackers], dtype=float)
+        self.last_x = np.array([t.last_x if t else 0.0 for t in trackers], dtype=float)
+        self.arrived = np.empty(0, dtype=np.int64)
+
+    def check_failures(self, dt: float): # odpowiednik Maintenance.check_failure dla całej floty; losuje jedną liczbę na pojazd z kondycją > 0, w kolejności floty
+        seconds = dt / 1000.0
+        idx = np.flatnonzero(self.condition > 0)
+        self.hours_driven[idx] += dt / 1000.0 / 60.0 / 60.0
+        risk_multiplier = (11 - self.condition[idx]) * self.risk_multiplier[idx]
+        failure_chance = self.base_failure_chance * risk_multiplier
+        if self.repair_rng is self.rng:
+            failing, draws = self._draw_shared(idx, failure_chance * seconds)
+            failed = idx[failing]
+        else:
+            failed = idx[self.rng.random(idx.size) < failure_chance * seconds]
+        if failed.size == 0:
+            return
+
+        self.condition[failed] -= 1
+        new_broken = failed[self.condition[failed] <= 0]
+        if new_broken.size == 0:
+            return
+
+        if self.repair_rng is not self.rng:
+            draws = self.repair_rng.uniform(REPAIR_DRAW_LOW, REPAIR_DRAW_HIGH, size=(new_broken.size, 2)) # dla każdego pojazdu: czas awarii, czas naprawy
+        self.broken[new_broken] = True
+        self.time_broken[new_broken] = 0.0
+        self.breakdown_duration[new_broken] = np.minimum(np.floor(draws[:, 0]), MAX_BREAKDOWN_SECONDS)
+        self.repair_duration[new_broken] = draws[:, 1]
+        if self.depot is not None:
+            self.depot.report_many(new_broken)
+            return
+        charged = new_broken[self.has_tracker[new_broken]]
+        self.repair_cost[charged] += draws[self.has_tracker[new_broken], 1] * 1.0
+
+    def _draw_shared(self, idx: np.ndarray, chance: np.ndarray): # jeden strumień dla awarii i czasów naprawy: jak w Maintenance.check_failure zaraz po liczbie pojazdu, który się psuje, idą jego dwie liczby czasów; zwraca (czy pojazd z idx ma awarię, czasy psujących się)
+        u = self.rng.random(idx.size)
+        failing = np.zeros(idx.size, dtype=bool)
+        draws = []
+        start = used = 0 # pierwszy pojazd bez wyniku i liczby zużyte przez pojazdy przed nim
+        while start < idx.size:
+            remaining = idx.size - start
+            hit = u[used:used + remaining] < chance[start:]
+            breaking = np.flatnonzero(hit & (self.condition[idx[start:]] == 1))
+            if breaking.size == 0:
+                failing[start:] = hit
+                break
+            k = int(breaking[0])
+            failing[start:start + k + 1] = hit[:k + 1]
+            end = used + k + 1
+            missing = end + 2 + remaining - k - 1 - u.size # liczby z bloku za tym pojazdem to jego czasy awarii i naprawy; brakujące dla dalszych pojazdów są dolosowane
+            if missing > 0:
+                u = np.concatenate((u, self.rng.random(missing)))
+            draws.append(REPAIR_DRAW_LOW + (REPAIR_DRAW_HIGH - REPAIR_DRAW_LOW) * u[end:end + 2]) # ten sam wzór co uniform
+            used, start = end + 2, start + k + 1
+        return failing, np.array(draws).reshape(-1, 2)
+
+    def update(self, dt: float, current_time: float): # odpowiednik Vehicle.update dla całej floty (aktywacja, awarie, postoje, ruch, pętle, przystanki)
+        seconds = dt / 1000.0
+        self.active |= current_time >= self.activation_time
+        live = self.active
+
+        broken = live & self.broken
+        self.time_broken[broken] += seconds
+        repaired = broken & ~(self.time_broken < self.breakdown_duration + self.repair_duration)
+        self.broken[repaired] = False
+        self.time_broken[repaired] = 0.0
+        self.condition[repaired] = 10
+
+        waiting = live & ~broken & (self.wait_timer > 0)
+        self.wait_timer[waiting] -= seconds
+
+        moving = live & ~broken & ~waiting
+        segment = np.clip(np.where(self.direction == 1, self.next_stop_index - 1, self.next_stop_index), 0, self.n_segments - 1) # odcinek jak w Vehicle.current_segment
+        self.delay_factor = self.route_delays[self.route_index, SLOT_PERIOD[time_slot(current_time)], segment]
+        self.x[moving] += self.direction[moving] * (self.speed[moving] / self.delay_factor[moving]) * (dt / REFERENCE_DT) # jak w Vehicle.update
+
+        right = moving & (self.direction == 1) & (self.x >= TRACK_RIGHT_LIMIT) # zmiana kierunku przy pętli
+        left = moving & (self.direction == -1) & (self.x <= TRACK_LEFT_BOUND)
+        self.direction[right] = -1
+        self.x[right] = TRACK_RIGHT_LIMIT
+        self.direction[left] = 1
+        self.x[left] = TRACK_LEFT_BOUND
+        turned = np.flatnonzero(right | left) # jak Route.next_stop_index: pierwszy przystanek >= x albo ostatni <= x
+        if turned.size:
+            stops = self.route_stops[self.route_index[turned]]
+            x = self.x[turned, None]
+            self.next_stop_index[turned] = np.where(self.direction[turned] == 1, (stops < x).sum(axis=1), (stops <= x).sum(axis=1) - 1)
+
+        has_stop = moving & (self.next_stop_index >= 0) & (self.next_stop_index < self.n_stops) # obsługa przystanków
+        stop_x = self.route_stops[self.route_index, np.clip(self.next_stop_index, 0, self.route_stops.shape[1] - 1)]
+        arrived = has_stop & (((self.direction == 1) & (self.x >= stop_x)) | ((self.direction == -1) & (self.x <= stop_x)))
+        self.x[arrived] = stop_x[arrived]
+        self.wait_timer[arrived] = STOP_WAIT_TIME
+        self.next_stop_index[arrived] += self.direction[arrived]
+        self.arrived = np.flatnonzero(arrived) # pojazdy, które w tym kroku zatrzymały się na przystanku
+
+    def return_before_stops(self, idx: np.ndarray): # odpowiednik Vehicle.return_before_stop dla pojazdów idx cofniętych przez SpacingIndex
+        served = self.next_stop_index[idx] - self.direction[idx]
+        valid = (served >= 0) & (served < self.n_stops[idx])
+        stop_x = self.route_stops[self.route_index[idx], np.where(valid, served, 0)]
+        back = idx[valid & (self.direction[idx] * (stop_x - self.x[idx]) > 0)]
+        self.next_stop_index[back] -= self.direction[back]
+        self.wait_timer[back] = 0.0
+
+    def update_costs(self, dt: float): # odpowiednik CostTracker.update dla aktywnych pojazdów z trackerem
+        seconds = dt / 1000.0
+        tracked = self.active & self.has_tracker
+        self.salary[tracked] += (self.salary_per_hour[tracked] / 3600.0) * seconds
+        distance_moved = np.abs(self.x[tracked] - self.last_x[tracked]) / 1000.0
+        self.fuel_electricity_cost[tracked] += self.consumption_per_km[tracked] * distance_moved
+        self.last_x[tracked] = self.x[tracked]
+
+    def step(self, dt: float, current_time: float): # pełny krok symulacji w tej samej kolejności co pętla po obiektach
+        self.check_failures(dt)
+        self.update(dt, current_time)
+        self.update_costs(dt)
+
+    def write_back(self): # przepisuje stan z tablic do obiektów Vehicle/CostTracker (np. dla GUI i zapisu kosztów)
+        for i, v in enumerate(self.vehicles):
+            v.x = float(self.x[i])
+            v.direction = int(self.direction[i])
+            v.condition = int(self.condition[i])
+            v.state = BROKEN if self.broken[i] else GOOD
+            v.hours_driven = float(self.hours_driven[i])
+            v.time_broken = float(self.time_broken[i])
+            v.breakdown_duration = float(self.breakdown_duration[i])
+            v.repair_duration = float(self.repair_duration[i])
+            v.wait_timer = float(self.wait_timer[i])
+            v.active = bool(self.active[i])
+            v.next_stop_index = int(self.next_stop_index[i])
+            t = v.cost_tracker
+            if t is not None:
+                t.salary = float(self.salary[i])
+                t.fuel_electricity_cost = float(self.fuel_electricity_cost[i])
+                t.repair_cost = float(self.repair_cost[i])
+                t.last_x = float(self.last_x[i])
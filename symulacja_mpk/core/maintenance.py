@@ -1,24 +1,75 @@
+import math
 import random
-from symulacja_mpk.core.vehicles import Vehicle
+from symulacja_mpk.core.vehicles import Vehicle, BROKEN
+
+MAX_BREAKDOWN_SECONDS = 30 # najdłuższy czas samej awarii; uniform(5, 31) może przez zaokrąglenie zwrócić 31
 
 class Maintenance: # odpowiedzialna za awarie i kondycje pojazdów
-    def __init__(self, base_failure_chance_per_second: float = 0.01): # konstruktor, base_failrue..., czyli podstawowa szansa na awarię
+    depot = None # Depot, któremu zgłaszane są awarie (ustawia Simulation); bez niego naprawa zaczyna się od razu po awarii
+    def __init__(self, base_failure_chance_per_second: float = 0.01, rng=None, repair_rng=None): # konstruktor, base_failrue..., czyli podstawowa szansa na awarię; rng - źródło losowości awarii (obiekt z metodami random() i uniform(a, b), np. random.Random lub numpy.random.Generator), repair_rng - źródło losowości czasów awarii i naprawy (domyślnie to samo co rng)
         self.base_failure_chance = base_failure_chance_per_second
+        self.rng = rng if rng is not None else random
+        self.repair_rng = repair_rng if repair_rng is not None else self.rng
+
+    def failure_rate(self, vehicle: Vehicle) -> float: # intensywność spadku kondycji (na sekundę); im niższa kondycja i bardziej ryzykowny kierowca, tym większa
+        risk_multiplier = (11 - vehicle.condition) * vehicle.driver.failure_risk_multiplier
+        return self.base_failure_chance * risk_multiplier
+
+    def sample_time_to_failure(self, vehicle: Vehicle) -> float: # czas (w s) do kolejnego spadku kondycji; intensywność jest stała do tego momentu, więc ma on rozkład wykładniczy
+        rate = self.failure_rate(vehicle)
+        if rate <= 0:
+            return math.inf
+        return -math.log(1.0 - self.rng.random()) / rate
+
+    def break_down(self, vehicle: Vehicle): # pojazd o kondycji 0 przechodzi w stan awarii; losowanie czasów awarii i naprawy oraz naliczenie kosztu
+        vehicle.state = BROKEN
+        vehicle.time_broken = 0.0
+        vehicle.breakdown_duration = min(int(self.repair_rng.uniform(5, 31)), MAX_BREAKDOWN_SECONDS) # Czas samej awarii (całkowity, 5-30 s)
+        vehicle.repair_duration = self.repair_rng.uniform(5.0, 15.0) # Czas, w którym pojazd jest naprawiany po awarii
+        if self.depot is not None: # czas i koszt naprawy zależą od kolejki do stanowisk
+            self.depot.report(vehicle)
+        elif vehicle.cost_tracker: # dodanie kosztów do "trackera" kosztów
+            vehicle.cost_tracker.add_repair_cost(vehicle.repair_duration)
 
     def check_failure(self, vehicle: Vehicle, dt: float): # Metoda sprawdza, czy pojazd uległ awarii i aktualizuję stan. Im niższa kondycja, tym większa szansa na awarię. Argumenty to vehicle, czyli pojazd do sprawdzenia oraz dt, czyli czas, jaki upłynął od ostatniej aktualizacji w ms
         if vehicle.condition > 0:
             vehicle.hours_driven += dt / 1000.0 / 60.0 / 60.0
-            risk_multiplier = (11 - vehicle.condition) * vehicle.driver.get_failure_risk_multiplier()
-            failure_chance = self.base_failure_chance * risk_multiplier
-            if random.random() < failure_chance * (dt / 1000.0):
+            failure_chance = self.failure_rate(vehicle)
+            if self.rng.random() < failure_chance * (dt / 1000.0):
                 vehicle.condition -= 1
                 if vehicle.condition <= 0:
-                    vehicle.state = "Broken"
-                    vehicle.time_broken = 0.0
-                    vehicle.breakdown_duration = random.randint(5, 30) # Czas samej awarii
-                    vehicle.repair_duration = random.uniform(5.0, 15.0) # Czas, w którym pojazd jest naprawiany po awarii
-                    if vehicle.cost_tracker: # dodanie kosztów do "trackera" kosztów
-                        vehicle.cost_tracker.add_repair_cost(vehicle.repair_duration)
-
-        elif vehicle.state == "Broken":
-            pass
\ No newline at end of file
+                    self.break_down(vehicle)
+
+        elif vehicle.state is BROKEN:
+            pass
+
+
+class ExponentialMaintenance(Maintenance): # ten sam model awarii, ale zamiast losowania w każdej klatce losuje raz czas do kolejnego spadku kondycji i tylko odlicza go w kolejnych wywołaniach
+    def __init__(self, base_failure_chance_per_second: float = 0.01, rng=None, repair_rng=None):
+        super().__init__(base_failure_chance_per_second, rng, repair_rng)
+        self._time_to_failure = {} # pojazd -> [pozostały czas w s, kondycja, dla której go wylosowano]
+        self.samples_drawn = 0
+
+    def check_failure(self, vehicle: Vehicle, dt: float):
+        if vehicle.condition <= 0:
+            return
+        vehicle.hours_driven += dt / 1000.0 / 60.0 / 60.0
+
+        entry = self._time_to_failure.get(vehicle)
+        if entry is None or entry[1] != vehicle.condition: # nowy pojazd lub kondycja zmieniona poza tym modelem (np. po naprawie) - rozkład jest bez pamięci, więc można losować od nowa
+            entry = [self.sample_time_to_failure(vehicle), vehicle.condition]
+            self._time_to_failure[vehicle] = entry
+            self.samples_drawn += 1
+
+        entry[0] -= dt / 1000.0
+        if entry[0] > 0:
+            return
+
+        vehicle.condition -= 1
+        if vehicle.condition <= 0:
+            del self._time_to_failure[vehicle]
+            self.break_down(vehicle)
+        else:
+            entry[0] += self.sample_time_to_failure(vehicle) # nadwyżka z tej klatki przechodzi na kolejny okres
+            entry[1] = vehicle.condition
+            self.samples_drawn += 1
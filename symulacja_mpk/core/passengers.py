@@ -0,0 +1,169 @@
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from symulacja_mpk.core.route import Route
+from symulacja_mpk.core.traffic import TimePeriod, PERIODS, SLOT_PERIOD, TRAFFIC_TABLE_STEP, TRAFFIC_TABLE_SLOTS, SIMULATION_START_HOUR
+from symulacja_mpk.core.vehicles import Vehicle
+
+DEFAULT_ARRIVAL_RATE = 60.0 # pasażerów na godzinę na przystanek
+DEMAND_PROFILE = {TimePeriod.MORNING: 1.6, TimePeriod.MIDDAY: 0.8, TimePeriod.AFTERNOON: 1.4, TimePeriod.EVENING: 0.4} # mnożnik natężenia przyjść w porach dnia
+DWELL_BASE = 3.0 # czas postoju bez wymiany pasażerów (otwarcie i zamknięcie drzwi), s
+BOARDING_TIME = 1.0 # s na wsiadającego
+ALIGHTING_TIME = 0.6 # s na wysiadającego
+WAIT_BIN = 30.0 # szerokość przedziału histogramu czasu oczekiwania, s
+WAIT_BINS = 240 # ostatni przedział zbiera oczekiwania dłuższe niż 2 h
+
+class PassengerDemand: # pasażerowie jako liczby, nie obiekty: przyjścia na przystanki (proces Poissona, losowany dopiero przy odjeździe pojazdu), kolejki FIFO grup o wspólnym czasie przyjścia, obciążenie pojazdów i statystyki przystanków
+    def __init__(self, routes: List[Route], vehicles: List[Vehicle], rates_per_hour: Optional[List[List[float]]] = None, rng=None, profile: Dict[TimePeriod, float] = DEMAND_PROFILE): # rates_per_hour[trasa][przystanek] - natężenie przyjść (domyślnie DEFAULT_ARRIVAL_RATE), rng - numpy.random.Generator, profile - mnożniki dla pór dnia
+        self.routes = routes
+        self.vehicles = vehicles
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        route_index = {id(r): j for j, r in enumerate(routes)}
+        self.stop_counts = [len(r.get_stops()) for r in routes]
+        self.stop_offsets = [0]
+        for count in self.stop_counts:
+            self.stop_offsets.append(self.stop_offsets[-1] + count)
+        if rates_per_hour is None:
+            rates_per_hour = [[DEFAULT_ARRIVAL_RATE] * count for count in self.stop_counts]
+        self.rate = [rate / 3600.0 for rates in rates_per_hour for rate in rates] # pasażerów na sekundę
+        # odsetek przychodzących, którzy jadą w kierunku 1: cele są równomiernie rozłożone na pozostałych przystankach trasy
+        self.p_forward = [(count - 1 - k) / (count - 1) if count > 1 else 0.0 for count in self.stop_counts for k in range(count)]
+        self.profile = [profile[p] for p in PERIODS]
+        self.slot_period = SLOT_PERIOD
+        self._slot_offset = int(SIMULATION_START_HOUR * 3600 // TRAFFIC_TABLE_STEP) # minuta doby odpowiadająca czasowi 0
+
+        n = self.stop_offsets[-1]
+        self.last_arrival_time = [0.0] * n # do tej chwili przyjścia na przystanek są już wylosowane
+        # kolejka q = 2 * przystanek + (0 dla kierunku 1, 1 dla kierunku -1); w kolejce grupy [czas przyjścia, liczba osób, minuta]
+        self._queues = [deque() for _ in range(2 * n)]
+        self.waiting = [0] * (2 * n)
+        self.arrived = [0] * (2 * n)
+        self.boarded = [0] * (2 * n)
+        self.alighted = [0] * (2 * n)
+        self.left_behind = [0] * (2 * n) # pasażerowie, którzy nie zmieścili się do odjeżdżającego pojazdu (liczeni przy każdym odjeździe)
+        self.departures = [0] * (2 * n)
+        self.load_total = [0] * (2 * n) # suma obciążeń pojazdów odjeżdżających z przystanku
+        self.load_max = [0] * (2 * n)
+        self.wait_total = [0.0] * (2 * n)
+        self.wait_histogram = np.zeros((2 * n, WAIT_BINS), dtype=np.int64)
+
+        self.vehicle_route = [route_index[id(v.route)] for v in vehicles]
+        self.capacity = [v.capacity for v in vehicles]
+        self.load = [0] * len(vehicles)
+        self.direction = [v.direction for v in vehicles] # kierunek przy ostatnim postoju; po zmianie kierunku na pętli wszyscy wysiadają
+
+    @staticmethod
+    def _enqueue(queue: deque, bucket: int, arrival: float, count: int): # przyjścia z tej samej minuty łączą się w jedną grupę (ze średnim czasem przyjścia), więc kolejka ma najwyżej jeden element na minutę
+        if queue and queue[-1][2] == bucket:
+            group = queue[-1]
+            group[0] = (group[0] * group[1] + arrival * count) / (group[1] + count)
+            group[1] += count
+        else:
+            queue.append([arrival, count, bucket])
+
+    def _generate(self, g: int, now: float): # losuje przyjścia na przystanek g od ostatniego losowania do now, osobno dla każdej minuty (natężenie zależy od pory dnia); zwykle to jedna-dwie minuty, więc pojedyncze losowania są szybsze niż tablice
+        t = self.last_arrival_time[g]
+        if now <= t:
+            return
+        self.last_arrival_time[g] = now
+        rng, rate, p_forward = self.rng, self.rate[g], self.p_forward[g]
+        forward_queue, backward_queue = self._queues[2 * g], self._queues[2 * g + 1]
+        forward_total = backward_total = 0
+        while t < now:
+            bucket = int(t // TRAFFIC_TABLE_STEP)
+            end = min((bucket + 1) * TRAFFIC_TABLE_STEP, now)
+            count = int(rng.poisson(rate * self.profile[self.slot_period[(bucket + self._slot_offset) % TRAFFIC_TABLE_SLOTS]] * (end - t)))
+            if count:
+                forward = count if p_forward == 1.0 else (0 if p_forward == 0.0 else int(rng.binomial(count, p_forward)))
+                arrival = (t + end) / 2 # czas przyjścia grupy - środek przedziału (dokładność do pół minuty)
+                if forward:
+                    self._enqueue(forward_queue, bucket, arrival, forward)
+                    forward_total += forward
+                if count - forward:
+                    self._enqueue(backward_queue, bucket, arrival, count - forward)
+                    backward_total += count - forward
+            t = end
+        for q, total in ((2 * g, forward_total), (2 * g + 1, backward_total)):
+            self.waiting[q] += total
+            self.arrived[q] += total
+
+    def serve(self, i: int, stop_index: int, direction: int, now: float) -> float: # pojazd i stoi na przystanku stop_index (w kolejności trasy) jadąc w kierunku direction; wysiadanie, wsiadanie do pojemności. Zwraca czas postoju w s
+        r = self.vehicle_route[i]
+        g = self.stop_offsets[r] + stop_index
+        self._generate(g, now)
+        q = 2 * g + (0 if direction == 1 else 1)
+        ahead = self.stop_counts[r] - 1 - stop_index if direction == 1 else stop_index # przystanki przed pojazdem
+
+        load = self.load[i]
+        turned = direction != self.direction[i] # pojazd zawrócił na pętli - to koniec trasy dla wszystkich w środku
+        self.direction[i] = direction
+        if turned or ahead == 0:
+            alight = load
+        else:
+            alight = int(self.rng.binomial(load, 1.0 / (ahead + 1))) if load else 0 # cel każdego pasażera jest równomierny na pozostałych przystankach
+        load -= alight
+        board = min(self.waiting[q], self.capacity[i] - load) if ahead > 0 else 0
+
+        queue, left = self._queues[q], board
+        while left: # najdłużej czekający wsiadają pierwsi
+            group = queue[0]
+            take = min(group[1], left)
+            wait = now - group[0]
+            self.wait_histogram[q, min(int(wait // WAIT_BIN), WAIT_BINS - 1)] += take
+            self.wait_total[q] += wait * take
+            group[1] -= take
+            left -= take
+            if group[1] == 0:
+                queue.popleft()
+
+        load += board
+        self.load[i] = load
+        self.waiting[q] -= board
+        self.boarded[q] += board
+        self.alighted[q] += alight
+        self.left_behind[q] += self.waiting[q] if ahead > 0 else 0
+        self.departures[q] += 1
+        self.load_total[q] += load
+        self.load_max[q] = max(self.load_max[q], load)
+        return DWELL_BASE + BOARDING_TIME * board + ALIGHTING_TIME * alight
+
+    def settle(self, now: float): # losuje przyjścia na wszystkie przystanki do chwili now (np. przed statystykami)
+        for g in range(len(self.last_arrival_time)):
+            self._generate(g, now)
+
+    def wait_percentile(self, q: int, p: float) -> float: # górna granica przedziału histogramu, w którym wypada p-ty percentyl czasu oczekiwania w kolejce q
+        histogram = self.wait_histogram[q]
+        total = int(histogram.sum())
+        if total == 0:
+            return 0.0
+        return (int(np.searchsorted(np.cumsum(histogram), p / 100.0 * total)) + 1) * WAIT_BIN
+
+    def statistics(self, now: Optional[float] = None) -> List[dict]: # wiersz na przystanek i kierunek: przyjścia, wsiadający, wysiadający, oczekiwanie i obciążenie pojazdów
+        if now is not None:
+            self.settle(now)
+        rows = []
+        for r, route in enumerate(self.routes):
+            stops = route.get_stops()
+            for k, name in enumerate(stops):
+                g = self.stop_offsets[r] + k
+                for q, direction in ((2 * g, 1), (2 * g + 1, -1)):
+                    boarded, departures = self.boarded[q], self.departures[q]
+                    rows.append({
+                        'trasa': f"{stops[0]} - {stops[-1]}",
+                        'przystanek': name,
+                        'kierunek': stops[-1] if direction == 1 else stops[0],
+                        'przyszli': self.arrived[q],
+                        'wsiedli': boarded,
+                        'wysiedli': self.alighted[q],
+                        'czekają': self.waiting[q],
+                        'nie_zmieścili_się': self.left_behind[q],
+                        'śr_oczekiwanie_s': round(self.wait_total[q] / boarded, 1) if boarded else 0.0,
+                        'p95_oczekiwanie_s': self.wait_percentile(q, 95),
+                        'odjazdy': departures,
+                        'śr_obciążenie': round(self.load_total[q] / departures, 1) if departures else 0.0,
+                        'max_obciążenie': self.load_max[q],
+                    })
+        return rows
@@ -1,12 +1,23 @@
-from typing import List
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
 from symulacja_mpk.core.traffic import Traffic
 from symulacja_mpk.utils.constants import TRACK_LEFT_BOUND, TRACK_RIGHT_LIMIT
 
 class Route:  # ukazanie trasy pojazdu, listy przystanków, długości oraz warunków ruchu trasy
-    def __init__(self, stops: List[str], length: float, traffic: Traffic):
+    def __init__(self, stops: List[str], length: float, traffic: Traffic, stop_distances: Optional[List[float]] = None): # length - długość trasy w km, stop_distances - odległości przystanków od początku trasy w metrach (domyślnie równe odstępy)
         self.__stops = stops
         self.__length = length
         self.__traffic = traffic
+        if stop_distances is None:
+            step = length * 1000.0 / (len(stops) - 1) if len(stops) > 1 else 0.0
+            stop_distances = [i * step for i in range(len(stops))]
+        if len(stop_distances) != len(stops) or any(b < a for a, b in zip(stop_distances, stop_distances[1:])):
+            raise ValueError("Odległości przystanków muszą odpowiadać przystankom i nie maleć")
+        self.__stop_distances = tuple(float(d) for d in stop_distances) # skumulowane odległości w metrach, niezmienne
+        self.__stop_positions = tuple(self.project(d) for d in self.__stop_distances) # rzut na ekran liczony raz; pojazdy współdzielą tę krotkę
+        if traffic.get_segment_count() not in (1, max(1, len(stops) - 1)):
+            raise ValueError(f"Liczba odcinków natężenia ruchu ({traffic.get_segment_count()}) nie pasuje do liczby odcinków trasy ({len(stops) - 1})")
+        self.delay_table = traffic.delay_table # delay_table[time_slot(t)][odcinek] - bezpośredni dostęp w pętli symulacji
 
     def get_stops(self) -> List[str]:
         return self.__stops
@@ -14,15 +25,37 @@ class Route:  # ukazanie trasy pojazdu, listy przystanków, długości oraz waru
     def get_length(self) -> float:
         return self.__length
 
+    def get_stop_distances(self) -> Tuple[float, ...]:
+        return self.__stop_distances
+
     def get_traffic(self) -> Traffic:
         return self.__traffic
 
-    def get_delay_factor(self) -> float:  # współczynnik opóźnienia; im większe niż 1.0, tym większe opóźnienie przez warunki ruchu
-        return self.__traffic.get_delay_factor()
+    def get_delay_factor(self, current_time: Optional[float] = None, segment: int = 0) -> float:  # współczynnik opóźnienia; im większe niż 1.0, tym większe opóźnienie przez warunki ruchu. current_time - czas symulacji w s (bez niego: dla pory dnia trasy), segment - odcinek między przystankami segment i segment + 1
+        if self.__traffic.get_segment_count() == 1:
+            segment = 0
+        return self.__traffic.get_delay_factor(current_time, segment)
+
+    def __track_span(self) -> int: # szerokość toru (w px) od pierwszego do ostatniego przystanku; przy równych odstępach przystanki wypadają na całych pikselach
+        return (TRACK_RIGHT_LIMIT - TRACK_LEFT_BOUND) // (len(self.__stops) - 1) * (len(self.__stops) - 1)
+
+    def project(self, distance_m: float) -> int: # pozycja na ekranie (px) dla odległości od początku trasy w metrach
+        if len(self.__stops) <= 1 or self.__stop_distances[-1] <= 0:
+            return TRACK_LEFT_BOUND + (TRACK_RIGHT_LIMIT - TRACK_LEFT_BOUND) // 2
+        return TRACK_LEFT_BOUND + round(distance_m / self.__stop_distances[-1] * self.__track_span())
+
+    def distance_at(self, x: float) -> float: # odwrotność project: odległość od początku trasy w metrach dla pozycji x na ekranie
+        if len(self.__stops) <= 1 or self.__stop_distances[-1] <= 0:
+            return 0.0
+        return (x - TRACK_LEFT_BOUND) / self.__track_span() * self.__stop_distances[-1]
+
+    def get_stop_positions(self) -> Tuple[int, ...]:  # zwraca pozycje w poziomie dla każdego przystanku na trasie (w kolejności trasy)
+        return self.__stop_positions
 
-    def get_stop_positions(self) -> List[int]:  # zwraca listę pozycji w poziomie dla każdego przystanku na trasie
-        if len(self.__stops) <= 1:
-            return [TRACK_LEFT_BOUND + (TRACK_RIGHT_LIMIT - TRACK_LEFT_BOUND) // 2]
+    def next_stop_index(self, x: float, direction: int) -> int: # indeks najbliższego przystanku przed pojazdem w pozycji x jadącym w kierunku direction (przystanek w x się liczy); -1 lub liczba przystanków, jeśli takiego nie ma. O(log n)
+        if direction == 1:
+            return bisect_left(self.__stop_positions, x)
+        return bisect_right(self.__stop_positions, x) - 1
 
-        available_width = TRACK_RIGHT_LIMIT - TRACK_LEFT_BOUND
-        return [TRACK_LEFT_BOUND + i * (available_width // (len(self.__stops) - 1)) for i in range(len(self.__stops))]
\ No newline at end of file
+    def segment_index(self, x: float) -> int: # odcinek między przystankami segment i segment + 1, na którym leży pozycja x (skrajne odcinki obejmują też dojazd do pętli). O(log n)
+        return min(max(bisect_right(self.__stop_positions, x) - 1, 0), max(len(self.__stop_positions) - 2, 0))
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from symulacja_mpk.core.traffic import Traffic, TimePeriod, PERIODS
+from symulacja_mpk.core.route import Route
+from symulacja_mpk.core.drivers import NormalDriver
+from symulacja_mpk.core.vehicles import Vehicle
+from symulacja_mpk.core.passengers import DEFAULT_ARRIVAL_RATE
+from symulacja_mpk.core.fleet import DRIVER_TYPES, VEHICLES_PER_ROUTE, Y_BASE, create_random_drivers_pool, create_vehicle
+
+try:
+    import tomllib
+except ImportError: # Python < 3.11 - scenariusze tylko w JSON
+    tomllib = None
+
+SCENARIO_CACHE_VERSION = 4 # zmiana formatu skompilowanego scenariusza unieważnia pliki w pamięci podręcznej
+DEFAULT_SCENARIO_PATH = os.path.join(os.path.dirname(__file__), '..', 'scenarios', 'wroclaw.json')
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "symulacja_mpk", "scenariusze")
+
+DRIVER_MIX_NAMES = {"careful": 0, "normal": 1, "aggressive": 2} # nazwy w pliku scenariusza -> indeks w DRIVER_TYPES
+VEHICLE_TYPES = ("bus", "tram")
+VEHICLE_DEFAULTS = { # (zużycie, przyrost zużycia, prędkość, przyrost prędkości) dla kolejnych pojazdów linii - te same wartości co w create_fleet
+    "bus": (0.3, 0.05, 0.7, 0.05),
+    "tram": (0.4, 0.03, 0.8, 0.05),
+}
+DEFAULT_HEADWAY = 15.0 # odstęp (w s) między aktywacjami kolejnych pojazdów linii
+
+class CompiledScenario: # scenariusz w postaci tablic NumPy (przystanki wszystkich tras w jednej tablicy + przesunięcia, tablice opóźnień, parametry pojazdów); tę postać zapisuje się w pamięci podręcznej i z niej buduje trasy i flotę
+    FIELDS = (
+        "route_name", "route_is_tram", "route_length_km", "route_y", "route_period",
+        "traffic_intensity", "delay_table", "segment_offsets", "segment_factor",
+        "stop_offsets", "stop_name", "stop_distance_m", "stop_demand_per_hour",
+        "vehicle_route", "vehicle_line_number", "vehicle_consumption", "vehicle_speed", "vehicle_activation_time",
+        "driver_weights", "driver_salary", "driver_pool_size",
+    )
+
+    def __init__(self, name: str, source_hash: str = "", **arrays): # arrays - wszystkie pola z FIELDS
+        missing = [field for field in self.FIELDS if field not in arrays]
+        if missing:
+            raise ValueError(f"Brak pól skompilowanego scenariusza: {', '.join(missing)}")
+        self.name = name
+        self.source_hash = source_hash
+        for field in self.FIELDS:
+            setattr(self, field, arrays[field])
+
+    @property
+    def route_count(self) -> int:
+        return len(self.route_name)
+
+    @property
+    def stop_count(self) -> int:
+        return len(self.stop_name)
+
+    @property
+    def y_base(self) -> List[int]: # pozycje pionowe tras dla GUI
+        return self.route_y.tolist()
+
+    def route_stops(self, index: int) -> slice: # zakres przystanków trasy index w stop_name / stop_distance_m
+        return slice(int(self.stop_offsets[index]), int(self.stop_offsets[index + 1]))
+
+    def build_routes(self) -> List[Route]: # opóźnienia tras biorą gotowe wiersze delay_table zamiast liczyć je od nowa w Traffic
+        routes = []
+        for i in range(self.route_count):
+            stops = self.route_stops(i)
+            period = PERIODS[int(self.route_period[i])]
+            intensities = dict(zip(PERIODS, self.traffic_intensity[i].tolist()))
+            segments = slice(int(self.segment_offsets[i]), int(self.segment_offsets[i + 1]))
+            traffic = Traffic(intensities[period], period, intensities, self.segment_factor[segments].tolist(), self.delay_table[segments].T.tolist())
+            routes.append(Route(self.stop_name[stops].tolist(), float(self.route_length_km[i]), traffic, self.stop_distance_m[stops].tolist()))
+        return routes
+
+    def build_fleet(self, routes: List[Route], rng=None) -> List[Vehicle]: # pojazdy scenariusza; kierowcy są losowani przy każdym budowaniu (rng jak w create_random_drivers_pool)
+        weights = self.driver_weights.tolist()
+        weights = None if len(set(weights)) == 1 else weights # równy udział - to samo losowanie co create_fleet
+        base_salary, salary_step = self.driver_salary.tolist()
+        drivers_pool = create_random_drivers_pool(int(self.driver_pool_size), rng, weights, base_salary, salary_step)
+
+        vehicles = []
+        for i in range(len(self.vehicle_route)):
+            route_index = int(self.vehicle_route[i])
+            if drivers_pool:
+                driver = drivers_pool.pop(0)
+            else:
+                driver = NormalDriver(f"Default Driver {i}", 3000)
+            vehicle = create_vehicle(bool(self.route_is_tram[route_index]), str(self.vehicle_line_number[i]), routes[route_index], driver,
+                                     float(self.vehicle_consumption[i]), float(self.vehicle_speed[i]))
+            vehicle.y = int(self.route_y[route_index])
+            vehicle.activation_time = float(self.vehicle_activation_time[i])
+            vehicles.append(vehicle)
+        return vehicles
+
+    def passenger_rates(self) -> List[List[float]]: # natężenie przyjść pasażerów (na godzinę) dla przystanków kolejnych tras - argument rates_per_hour PassengerDemand
+        return [self.stop_demand_per_hour[self.route_stops(i)].tolist() for i in range(self.route_count)]
+
+    def build(self, rng=None) -> Tuple[List[Route], List[Vehicle]]: # trasy i flota gotowe do Simulation / EventSimulation
+        routes = self.build_routes()
+        return routes, self.build_fleet(routes, rng)
+
+    def save(self, path: str): # zapis do .npz (bez pickle); zapis przez plik tymczasowy, więc przerwany zapis nie zostawia uszkodzonego pliku
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, _name=np.array(self.name), _source_hash=np.array(self.source_hash), _version=np.array(SCENARIO_CACHE_VERSION),
+                     **{field: getattr(self, field) for field in self.FIELDS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledScenario":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["_version"]) != SCENARIO_CACHE_VERSION:
+                raise ValueError(f"{path}: nieaktualna wersja skompilowanego scenariusza")
+            return cls(str(data["_name"]), str(data["_source_hash"]), **{field: data[field] for field in cls.FIELDS})
+
+
+def _require(value, kind, where: str, description: str): # wpis scenariusza musi mieć oczekiwany typ - inaczej ValueError zamiast błędu w dalszym parsowaniu
+    if not isinstance(value, kind):
+        raise ValueError(f"{where}: {description}")
+    return value
+
+def _parse_period(name, where: str) -> int:
+    try:
+        return PERIODS.index(TimePeriod[str(name).upper()])
+    except KeyError:
+        raise ValueError(f"{where}: nieznana pora dnia {name} (dostępne: {', '.join(p.name for p in PERIODS)})") from None
+
+def _parse_stops(route: dict, where: str) -> Tuple[List[str], List[float], float, List[float]]: # przystanki jako lista nazw (równe odstępy na length_km) lub słowników {"name", "distance_m", "passengers_per_hour"}; zwraca nazwy, odległości, długość trasy i natężenie przyjść pasażerów
+    stops = route.get("stops")
+    if not stops or not isinstance(stops, list):
+        raise ValueError(f"{where}: trasa musi mieć przystanki")
+    demand = float(route.get("passengers_per_hour", DEFAULT_ARRIVAL_RATE)) # domyślne natężenie dla przystanków trasy
+
+    if all(isinstance(stop, str) for stop in stops):
+        if "length_km" not in route:
+            raise ValueError(f"{where}: przystanki bez odległości wymagają length_km")
+        length_km = float(route["length_km"])
+        step = length_km * 1000.0 / (len(stops) - 1) if len(stops) > 1 else 0.0
+        return list(stops), [i * step for i in range(len(stops))], length_km, [demand] * len(stops)
+
+    try:
+        names = [str(stop["name"]) for stop in stops]
+        distances = [float(stop["distance_m"]) for stop in stops]
+        demands = [float(stop.get("passengers_per_hour", demand)) for stop in stops]
+    except (TypeError, KeyError, AttributeError):
+        raise ValueError(f"{where}: przystanek musi mieć pola name i distance_m") from None
+    if distances[0] != 0.0 or any(b < a for a, b in zip(distances, distances[1:])):
+        raise ValueError(f"{where}: odległości przystanków muszą zaczynać się od 0 i nie maleć")
+    return names, distances, float(route.get("length_km", distances[-1] / 1000.0)), demands
+
+def _parse_traffic(route: dict, stop_count: int, where: str) -> Tuple[int, List[float], List[float]]: # {"intensity": 4, "period": "MORNING", "periods": {"EVENING": 6}, "segments": [1.0, 1.5, 0.8]} -> (główna pora dnia, natężenie w każdej porze, mnożniki natężenia odcinków)
+    traffic = _require(route.get("traffic", {}), dict, where, "traffic musi być słownikiem")
+    _require(traffic.get("periods", {}), dict, where, "traffic.periods musi być słownikiem {pora: natężenie}")
+    _require(traffic.get("segments", [1.0]), list, where, "traffic.segments musi być listą mnożników")
+    intensity = float(traffic.get("intensity", 0))
+    period = _parse_period(traffic.get("period", PERIODS[0].name), where)
+    intensities = [intensity] * len(PERIODS)
+    for name, value in traffic.get("periods", {}).items():
+        intensities[_parse_period(name, where)] = float(value)
+    segments = [float(factor) for factor in traffic.get("segments", [1.0])]
+    if len(segments) not in (1, max(1, stop_count - 1)):
+        raise ValueError(f"{where}: traffic.segments musi mieć jeden mnożnik na odcinek między przystankami ({stop_count - 1})")
+    return period, intensities, segments
+
+def compile_scenario(data: dict, source_hash: str = "") -> CompiledScenario: # zamienia opis scenariusza (słownik z pliku JSON/TOML) na CompiledScenario; błędy w opisie zgłaszane jako ValueError
+    _require(data, dict, "scenariusz", "opis scenariusza musi być słownikiem")
+    routes = data.get("routes")
+    if not routes or not isinstance(routes, list):
+        raise ValueError("Scenariusz musi zawierać listę routes")
+
+    route_name, route_is_tram, route_length_km, route_y, route_period, traffic_intensity = [], [], [], [], [], []
+    stop_offsets, stop_name, stop_distance_m, stop_demand_per_hour = [0], [], [], []
+    segment_offsets, segment_factor = [0], []
+    vehicle_route, vehicle_line_number, vehicle_consumption, vehicle_speed, vehicle_activation_time = [], [], [], [], []
+    line_counters = {vehicle_type: 0 for vehicle_type in VEHICLE_TYPES} # automatyczne numery B1, B2, ... / T1, T2, ...
+
+    for index, route in enumerate(routes):
+        where = f"routes[{index}]"
+        _require(route, dict, where, "trasa musi być słownikiem")
+        vehicle_type = route.get("vehicle_type", "bus")
+        if vehicle_type not in VEHICLE_TYPES:
+            raise ValueError(f"{where}: nieznany typ pojazdu {vehicle_type} (dostępne: {', '.join(VEHICLE_TYPES)})")
+        names, distances, length_km, demands = _parse_stops(route, where)
+        period, intensities, segments = _parse_traffic(route, len(names), where)
+
+        route_name.append(str(route.get("name", f"{names[0]} - {names[-1]}")))
+        route_is_tram.append(vehicle_type == "tram")
+        route_length_km.append(length_km)
+        route_y.append(int(route.get("y", Y_BASE[index % len(Y_BASE)])))
+        route_period.append(period)
+        traffic_intensity.append(intensities)
+        stop_name.extend(names)
+        stop_distance_m.extend(distances)
+        stop_demand_per_hour.extend(demands)
+        stop_offsets.append(len(stop_name))
+        segment_factor.extend(segments)
+        segment_offsets.append(len(segment_factor))
+
+        vehicles = route.get("vehicles", VEHICLES_PER_ROUTE)
+        if isinstance(vehicles, int) and not isinstance(vehicles, bool): # sama liczba pojazdów - parametry jak w create_fleet
+            vehicles = [{} for _ in range(vehicles)]
+        if not isinstance(vehicles, list) or not all(isinstance(vehicle, dict) for vehicle in vehicles):
+            raise ValueError(f"{where}: vehicles musi być liczbą pojazdów albo listą słowników")
+        consumption, consumption_step, speed, speed_step = VEHICLE_DEFAULTS[vehicle_type]
+        headway = float(route.get("headway_s", DEFAULT_HEADWAY))
+        for i, vehicle in enumerate(vehicles):
+            line_counters[vehicle_type] += 1
+            vehicle_route.append(index)
+            vehicle_line_number.append(str(vehicle.get("line_number", f"{vehicle_type[0].upper()}{line_counters[vehicle_type]}")))
+            vehicle_consumption.append(float(vehicle.get("consumption", consumption + i * consumption_step)))
+            vehicle_speed.append(float(vehicle.get("speed", speed + i * speed_step)))
+            vehicle_activation_time.append(float(vehicle.get("activation_time", i * headway)))
+
+    drivers = _require(data.get("drivers", {}), dict, "drivers", "musi być słownikiem")
+    mix = _require(drivers.get("mix", {name: 1.0 for name in DRIVER_MIX_NAMES}), dict, "drivers.mix", "musi być słownikiem {typ: udział}")
+    unknown = set(mix) - set(DRIVER_MIX_NAMES)
+    if unknown:
+        raise ValueError(f"Nieznane typy kierowców: {', '.join(sorted(unknown))} (dostępne: {', '.join(DRIVER_MIX_NAMES)})")
+    driver_weights = [0.0] * len(DRIVER_TYPES)
+    for name, weight in mix.items():
+        driver_weights[DRIVER_MIX_NAMES[name]] = float(weight)
+    if sum(driver_weights) <= 0:
+        raise ValueError("Udział kierowców (drivers.mix) musi być dodatni")
+
+    segment_route = np.repeat(np.arange(len(routes)), np.diff(segment_offsets)) # trasa każdego odcinka
+    intensity = np.array(traffic_intensity, dtype=float).reshape(len(routes), len(PERIODS))
+    return CompiledScenario(
+        str(data.get("name", "")), source_hash,
+        route_name=np.array(route_name, dtype=str),
+        route_is_tram=np.array(route_is_tram, dtype=bool),
+        route_length_km=np.array(route_length_km, dtype=float),
+        route_y=np.array(route_y, dtype=np.int64),
+        route_period=np.array(route_period, dtype=np.int64),
+        traffic_intensity=intensity,
+        delay_table=1 + intensity[segment_route] * np.array(segment_factor, dtype=float)[:, None] / 10, # delay_table[odcinek, pora] - wzór z Traffic; odcinki trasy i od segment_offsets[i]
+        segment_offsets=np.array(segment_offsets, dtype=np.int64),
+        segment_factor=np.array(segment_factor, dtype=float),
+        stop_offsets=np.array(stop_offsets, dtype=np.int64),
+        stop_name=np.array(stop_name, dtype=str),
+        stop_distance_m=np.array(stop_distance_m, dtype=float),
+        stop_demand_per_hour=np.array(stop_demand_per_hour, dtype=float),
+        vehicle_route=np.array(vehicle_route, dtype=np.int64),
+        vehicle_line_number=np.array(vehicle_line_number, dtype=str),
+        vehicle_consumption=np.array(vehicle_consumption, dtype=float),
+        vehicle_speed=np.array(vehicle_speed, dtype=float),
+        vehicle_activation_time=np.array(vehicle_activation_time, dtype=float),
+        driver_weights=np.array(driver_weights, dtype=float),
+        driver_salary=np.array([drivers.get("base_salary", 3000), drivers.get("salary_step", 50)], dtype=float),
+        driver_pool_size=np.array(drivers.get("pool_size", len(vehicle_route)), dtype=np.int64),
+    )
+
+def parse_scenario(content: bytes, path: str) -> dict: # format rozpoznawany po rozszerzeniu: .json lub .toml
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("Scenariusze TOML wymagają Pythona 3.11 lub nowszego")
+        return tomllib.loads(content.decode("utf-8"))
+    if path.endswith(".json"):
+        return json.loads(content)
+    raise ValueError(f"Nieznany format scenariusza: {path} (dostępne: .json, .toml)")
+
+def load_scenario(path: Optional[str] = None, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> CompiledScenario: # wczytuje scenariusz (domyślnie DEFAULT_SCENARIO_PATH); skompilowana postać jest zapisywana w cache_dir pod skrótem SHA-256 zawartości pliku, więc kolejne wczytania pomijają parsowanie. cache_dir=None wyłącza pamięć podręczną
+    path = path or DEFAULT_SCENARIO_PATH
+    with open(path, "rb") as f:
+        content = f.read()
+    source_hash = hashlib.sha256(content).hexdigest()
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, f"{source_hash}-v{SCENARIO_CACHE_VERSION}.npz")
+        try:
+            return CompiledScenario.load(cache_path)
+        except (OSError, ValueError, KeyError): # brak pliku lub uszkodzony - kompilacja od nowa
+            pass
+
+    scenario = compile_scenario(parse_scenario(content, path), source_hash)
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            scenario.save(cache_path)
+        except OSError: # np. katalog tylko do odczytu - scenariusz działa i bez pamięci podręcznej
+            pass
+    return scenario
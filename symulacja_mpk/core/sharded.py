@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import traceback
+from operator import attrgetter
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from symulacja_mpk.core.maintenance import Maintenance
+from symulacja_mpk.core.route import Route
+from symulacja_mpk.core.simulation import Simulation, DEFAULT_DT, require_tick_failures
+from symulacja_mpk.core.vehicles import Vehicle, GOOD, BROKEN
+from symulacja_mpk.utils.cost_ledger import CostLedger
+from symulacja_mpk.utils.profiling import PhaseProfiler
+from symulacja_mpk.utils.random_streams import RandomStreams
+
+SHARD_WINDOW = 1.0 # domyślna długość okna synchronizacji w s czasu symulacji; w oknie procesy liczą swoje linie niezależnie
+VEHICLE_FIELDS = ('x', 'direction', 'condition', 'wait_timer', 'next_stop_index', 'hours_driven', 'time_broken', 'breakdown_duration', 'repair_duration', 'active')
+COST_FIELDS = ('salary', 'fuel_electricity_cost', 'repair_cost', 'last_x')
+SHARED_FIELDS = VEHICLE_FIELDS + ('broken',) + COST_FIELDS # wiersze tablicy w pamięci współdzielonej (kolumna = pojazd); nazwy jak w FleetState
+FIELD = {name: k for k, name in enumerate(SHARED_FIELDS)}
+
+class SharedFleetView: # wiersze tablicy współdzielonej jako atrybuty o nazwach z FleetState (x, salary...), np. dla CostLedger.record_fleet
+    def __init__(self, state: np.ndarray):
+        for name, k in FIELD.items():
+            setattr(self, name, state[k])
+
+def partition_routes(routes: List[Route], vehicles: List[Vehicle], shards: int) -> List[List[int]]: # dzieli trasy (z pojazdami) na shards grup o zbliżonej liczbie pojazdów - najpierw najliczniejsze linie do najmniej obciążonej grupy
+    counts = {id(r): 0 for r in routes}
+    for v in vehicles:
+        counts[id(v.route)] += 1
+    used = sorted((j for j, r in enumerate(routes) if counts[id(r)] > 0), key=lambda j: -counts[id(routes[j])])
+    groups = [[] for _ in range(max(1, min(shards, len(used))))]
+    load = [0] * len(groups)
+    for j in used:
+        k = load.index(min(load))
+        groups[k].append(j)
+        load[k] += counts[id(routes[j])]
+    return [sorted(group) for group in groups]
+
+def _publish(simulation: Simulation, state: np.ndarray, indices: np.ndarray): # zapisuje stan pojazdów procesu do jego kolumn tablicy współdzielonej
+    fleet = simulation.fleet_state
+    if fleet is not None:
+        for k, name in enumerate(SHARED_FIELDS):
+            state[k, indices] = getattr(fleet, name)
+        return
+    vehicles = simulation.vehicles
+    block = np.empty((len(SHARED_FIELDS), len(vehicles)))
+    get = attrgetter(*VEHICLE_FIELDS)
+    block[:len(VEHICLE_FIELDS)] = np.array([get(v) for v in vehicles], dtype=float).reshape(len(vehicles), -1).T
+    block[FIELD['broken']] = [v.state is BROKEN for v in vehicles]
+    trackers = [v.cost_tracker for v in vehicles]
+    for name in COST_FIELDS:
+        block[FIELD[name]] = [getattr(t, name) if t else 0.0 for t in trackers]
+    state[:, indices] = block
+
+def _worker(connection, buffer, n: int, indices: np.ndarray, simulation: Simulation): # proces jednej grupy linii: na polecenie (dt, kroki) liczy kroki i publikuje stan w pamięci współdzielonej; None kończy pracę
+    state = np.frombuffer(buffer, dtype=float)[:len(SHARED_FIELDS) * n].reshape(len(SHARED_FIELDS), n)
+    for v in simulation.vehicles: # księgę kosztów prowadzi proces główny z tablicy współdzielonej
+        if v.cost_tracker is not None:
+            v.cost_tracker.ledger = None
+    while True:
+        command = connection.recv()
+        if command is None:
+            break
+        dt, steps = command
+        try:
+            for _ in range(steps):
+                simulation.step(dt)
+            _publish(simulation, state, indices)
+            connection.send(('ok', simulation.current_time))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+    connection.close()
+
+
+class ShardedSimulation: # symulacja krokowa podzielona na procesy: każdy liczy swoją grupę linii (Simulation, także wektorowo), a w kolejnych oknach czasu wszystkie procesy dochodzą do tej samej chwili. Stan pojazdów i koszty wracają przez pamięć współdzieloną, nie przez pickle w każdym kroku. Linie nie zależą od siebie, więc podział nie zmienia modelu, ale każda grupa ma własne strumienie losowe (wynik zależy od seed i liczby procesów)
+    def __init__(self, routes: List[Route], vehicles: List[Vehicle], shards: Optional[int] = None, seed: Optional[int] = None, dt: float = DEFAULT_DT, vectorized: bool = False, maintenance_class=Maintenance, base_failure_chance: float = 0.01, window: float = SHARD_WINDOW, ledger: Optional[CostLedger] = None, profiler: Optional[PhaseProfiler] = None):
+        self.routes = routes
+        self.vehicles = vehicles
+        self.dt = dt
+        self.window = window # długość okna synchronizacji w s
+        self.ledger = ledger # księga kosztów w procesie głównym, z przyrostów na koniec okien
+        self.profiler = profiler # czasy okien, księgi i przepisywania stanu w procesie głównym
+        if vectorized: # przed uruchomieniem procesów, nie w każdym z nich
+            require_tick_failures(maintenance_class)
+        self.passengers = None # pasażerowie i odstępy łączą pojazdy linii z przystankami - nie są dzielone między procesy
+        self.current_time = 0.0
+        self.steps = 0
+        self.groups = partition_routes(routes, vehicles, shards or os.cpu_count() or 1) # shards - liczba procesów (domyślnie liczba rdzeni, najwyżej liczba linii)
+        self.streams = RandomStreams(seed) # ziarno strumieni losowych grup
+
+        context = multiprocessing.get_context()
+        n = len(vehicles)
+        self._buffer = context.RawArray('d', max(1, len(SHARED_FIELDS) * n))
+        self.state = np.frombuffer(self._buffer, dtype=float)[:len(SHARED_FIELDS) * n].reshape(len(SHARED_FIELDS), n) # stan wszystkich pojazdów po ostatnim oknie (wiersze SHARED_FIELDS)
+        self.shared_fleet = SharedFleetView(self.state)
+        route_group = {id(routes[j]): k for k, group in enumerate(self.groups) for j in group}
+        self._connections, self._processes = [], []
+        for k, streams in enumerate(self.streams.spawn(len(self.groups))):
+            indices = np.array([i for i, v in enumerate(vehicles) if route_group.get(id(v.route)) == k], dtype=np.int64)
+            maintenance = maintenance_class(base_failure_chance, rng=streams.buffered("failures"), repair_rng=streams.buffered("repairs")) # model awarii w każdej grupie
+            simulation = Simulation([routes[j] for j in self.groups[k]], [vehicles[i] for i in indices], maintenance, dt=dt, vectorized=vectorized)
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker, args=(child, self._buffer, n, indices, simulation), name=f"Shard-{k}", daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        if len(vehicles):
+            self._advance(dt, 0) # stan początkowy w pamięci współdzielonej
+
+    def _advance(self, dt: float, steps: int): # wszystkie procesy wykonują steps kroków; czeka na wszystkie (synchronizacja okna)
+        for connection in self._connections:
+            connection.send((dt, steps))
+        errors, times = [], []
+        for k, connection in enumerate(self._connections):
+            status, value = connection.recv()
+            if status == 'error':
+                errors.append(f"proces {k}:\n{value}")
+            else:
+                times.append(value)
+        if errors:
+            raise RuntimeError("błąd w procesie symulacji\n" + "\n".join(errors))
+        self.current_time = max(times, default=self.current_time) # czas liczony w procesach tak samo jak w Simulation (suma kroków)
+        self.steps += steps
+
+    def step(self, dt: Optional[float] = None): # jeden krok we wszystkich procesach (np. klatka GUI) i przepisanie stanu do obiektów pojazdów
+        if dt is None:
+            dt = self.dt
+        self._window(dt, 1)
+        self.sync_vehicles()
+        if self.profiler is not None:
+            self.profiler.lap("synchronizacja")
+
+    def _window(self, dt: float, steps: int): # okno z księgą kosztów: zamknięcie okien księgi przed krokami, przyrosty kosztów po nich
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin()
+        if self.ledger is not None:
+            self.ledger.advance(self.current_time)
+        self._advance(dt, steps)
+        if profiler is not None:
+            profiler.lap("procesy") # czas najwolniejszego procesu i wymiany poleceń
+        if self.ledger is not None:
+            self.ledger.record_fleet(self.shared_fleet)
+            if profiler is not None:
+                profiler.lap("księga")
+
+    def sync_vehicles(self): # przepisuje stan z pamięci współdzielonej do obiektów Vehicle/CostTracker (dla GUI i zapisu kosztów)
+        state = self.state
+        columns = {name: state[k].tolist() for k, name in enumerate(SHARED_FIELDS)}
+        for i, v in enumerate(self.vehicles):
+            v.x = columns['x'][i]
+            v.direction = int(columns['direction'][i])
+            v.condition = int(columns['condition'][i])
+            v.state = BROKEN if columns['broken'][i] else GOOD
+            v.hours_driven = columns['hours_driven'][i]
+            v.time_broken = columns['time_broken'][i]
+            v.breakdown_duration = columns['breakdown_duration'][i]
+            v.repair_duration = columns['repair_duration'][i]
+            v.wait_timer = columns['wait_timer'][i]
+            v.active = bool(columns['active'][i])
+            v.next_stop_index = int(columns['next_stop_index'][i])
+            t = v.cost_tracker
+            if t is not None:
+                t.salary = columns['salary'][i]
+                t.fuel_electricity_cost = columns['fuel_electricity_cost'][i]
+                t.repair_cost = columns['repair_cost'][i]
+                t.last_x = columns['last_x'][i]
+
+    def run(self, until: float, on_step: Optional[Callable[["ShardedSimulation"], None]] = None): # Symuluje do czasu until (w s) oknami window; on_step jest wywoływana po każdym oknie z pojazdami zaktualizowanymi do jego końca
+        window_steps = max(1, round(self.window * 1000.0 / self.dt))
+        while self.current_time < until:
+            remaining = int(np.ceil((until - self.current_time) * 1000.0 / self.dt)) # ostatnie okno nie wychodzi (poza zaokrągleniem) za until
+            self._window(self.dt, max(1, min(window_steps, remaining)))
+            if on_step is not None:
+                self.sync_vehicles()
+                if self.profiler is not None:
+                    self.profiler.lap("synchronizacja")
+                on_step(self)
+        self.sync_vehicles()
+
+    def close(self): # kończy procesy; stan pojazdów zostaje w obiektach
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections, self._processes = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,152 @@
+from typing import Callable, List, Optional
+from symulacja_mpk.core.depot import Depot
+from symulacja_mpk.core.maintenance import Maintenance
+from symulacja_mpk.core.passengers import PassengerDemand
+from symulacja_mpk.core.route import Route
+from symulacja_mpk.core.spacing import SpacingIndex
+from symulacja_mpk.core.traffic import time_slot
+from symulacja_mpk.core.vehicles import Vehicle
+from symulacja_mpk.utils.cost_ledger import CostLedger
+from symulacja_mpk.utils.profiling import PhaseProfiler
+from symulacja_mpk.utils.constants import REFERENCE_DT
+
+DEFAULT_DT = REFERENCE_DT # domyślny krok symulacji w ms - odpowiada jednej klatce przy 60 FPS w GUI
+
+def require_tick_failures(maintenance_class): # FleetState losuje awarie w każdym kroku jak Maintenance.check_failure; inny model byłby w trybie wektorowym po cichu pominięty
+    if maintenance_class.check_failure is not Maintenance.check_failure:
+        raise ValueError(f"Model awarii {maintenance_class.__name__} nie działa w trybie wektorowym (FleetState losuje awarie w każdym kroku jak Maintenance)")
+
+
+class Simulation: # silnik symulacji niezależny od pygame; krok o stałej długości, bez limitu klatek, więc może działać szybciej niż w czasie rzeczywistym
+    def __init__(self, routes: List[Route], vehicles: List[Vehicle], maintenance: Optional[Maintenance] = None, dt: float = DEFAULT_DT, vectorized: bool = False, passengers: Optional[PassengerDemand] = None, spacing: Optional[SpacingIndex] = None, ledger: Optional[CostLedger] = None, profiler: Optional[PhaseProfiler] = None, depot: Optional[Depot] = None):
+        self.routes = routes
+        self.vehicles = vehicles
+        self.maintenance = maintenance if maintenance is not None else Maintenance() # obsługa awarii
+        self.passengers = passengers # model pasażerów; postój na przystanku zależy wtedy od wsiadających i wysiadających
+        self.spacing = spacing # SpacingIndex - minimalny odstęp i pomiar odstępów na liniach
+        self.ledger = ledger # księga kosztów z sumami grup i zestawieniami godzinowymi
+        self.profiler = profiler # czasy faz kroku
+        self.dt = dt # domyślny krok czasu w ms
+        self.current_time = 0.0 # obecny czas symulacji w s
+        self.steps = 0 # liczba wykonanych kroków
+        self.fleet_state = None # FleetState, jeśli flota jest liczona tablicami NumPy (vectorized)
+        if vectorized:
+            self.fleet_state = self._create_fleet_state()
+        self.depot = depot # zajezdnia ze stanowiskami, kolejką napraw i przeglądami; bez niej naprawa zaczyna się od razu po awarii
+        if depot is not None:
+            if self.fleet_state is not None:
+                depot.attach(self.fleet_state)
+            else:
+                self.maintenance.depot = depot
+
+    def _create_fleet_state(self): # NumPy jest potrzebny tylko w trybie wektorowym; generatory z Maintenance są używane, jeśli losują tablice
+        import numpy as np
+        from symulacja_mpk.core.fleet_state import FleetState
+        from symulacja_mpk.utils.random_streams import BufferedRandom
+
+        require_tick_failures(type(self.maintenance))
+        batched = (np.random.Generator, BufferedRandom) # generatory, które potrafią losować całe tablice
+        def array_source(source): # moduł random i random.Random dają ziarno generatora NumPy: po random.seed() przebieg jest powtarzalny, choć liczby są inne niż w pętli po obiektach
+            return source if isinstance(source, batched) else np.random.default_rng(int(source.random() * 2 ** 53))
+        rng = array_source(self.maintenance.rng)
+        repair_rng = rng if self.maintenance.repair_rng is self.maintenance.rng else array_source(self.maintenance.repair_rng) # wspólne źródło zostaje wspólne
+        return FleetState(self.vehicles, self.maintenance.base_failure_chance, rng, repair_rng)
+
+    def sync_vehicles(self): # w trybie wektorowym przepisuje stan tablic do obiektów pojazdów; w zwykłym trybie nic nie robi
+        if self.fleet_state is not None:
+            self.fleet_state.write_back()
+
+    def step(self, dt: Optional[float] = None): # Wykonuje jeden krok symulacji: awarie, ruch pojazdów i koszty. dt - długość kroku w ms (domyślnie self.dt)
+        if dt is None:
+            dt = self.dt
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin()
+        if self.ledger is not None:
+            self.ledger.advance(self.current_time)
+            if profiler is not None:
+                profiler.lap("okna księgi")
+        self.current_time += dt / 1000.0
+        self.steps += 1
+
+        if self.fleet_state is not None:
+            fleet = self.fleet_state
+            fleet.check_failures(dt)
+            if profiler is not None:
+                profiler.lap("awarie")
+            fleet.update(dt, self.current_time)
+            if profiler is not None:
+                profiler.lap("ruch")
+            if self.spacing is not None:
+                fleet.return_before_stops(self.spacing.step(fleet.x, fleet.direction, fleet.active, dt / 1000.0))
+                if profiler is not None:
+                    profiler.lap("odstępy")
+            if self.passengers is not None:
+                for i in fleet.arrived.tolist():
+                    if fleet.wait_timer[i] > 0: # bez postoju odwołanego przez cofnięcie przed przystanek
+                        fleet.wait_timer[i] = self.passengers.serve(i, int(fleet.next_stop_index[i] - fleet.direction[i]), int(fleet.direction[i]), self.current_time)
+                if profiler is not None:
+                    profiler.lap("pasażerowie")
+            if self.depot is not None:
+                self.depot.step(self.current_time)
+                if profiler is not None:
+                    profiler.lap("zajezdnia")
+            fleet.update_costs(dt)
+            if profiler is not None:
+                profiler.lap("koszty")
+            if self.ledger is not None:
+                self.ledger.record_fleet(fleet)
+                if profiler is not None:
+                    profiler.lap("księga")
+            return
+
+        # fazy w osobnych pętlach (awarie pojazdu zależą tylko od niego, więc wynik jest ten sam co przy jednej pętli), dzięki czemu każdą można zmierzyć dwoma odczytami zegara na krok
+        vehicles = self.vehicles
+        check_failure = self.maintenance.check_failure
+        for v in vehicles:
+            check_failure(v, dt)
+        if profiler is not None:
+            profiler.lap("awarie")
+
+        slot = time_slot(self.current_time) # jeden wiersz tablicy opóźnień dla całego kroku
+        arrived = [] # pojazdy, które w tym kroku zatrzymały się na przystanku
+        for i, v in enumerate(vehicles):
+            delays = v.route.delay_table[slot]
+            waiting = v.wait_timer > 0
+            v.update(dt, delays[v.current_segment()] if len(delays) > 1 else delays[0], self.current_time)
+            if not waiting and v.wait_timer > 0:
+                arrived.append(i)
+        if profiler is not None:
+            profiler.lap("ruch")
+
+        if self.spacing is not None: # odstęp można wymusić dopiero, gdy wszystkie pojazdy się przesunęły; koszty liczone od pozycji po korekcie
+            self.spacing.step_vehicles(dt / 1000.0)
+            if profiler is not None:
+                profiler.lap("odstępy")
+
+        passengers = self.passengers
+        if passengers is not None: # po pilnowaniu odstępu, więc pojazd cofnięty przed przystanek nie obsługuje go dwa razy
+            for i in arrived:
+                v = vehicles[i]
+                if v.wait_timer > 0:
+                    v.wait_timer = passengers.serve(i, v.next_stop_index - v.direction, v.direction, self.current_time)
+            if profiler is not None:
+                profiler.lap("pasażerowie")
+
+        if self.depot is not None:
+            self.depot.step(self.current_time)
+            if profiler is not None:
+                profiler.lap("zajezdnia")
+
+        for v in vehicles:
+            if v.active and v.cost_tracker:
+                v.cost_tracker.update(v, dt)
+        if profiler is not None:
+            profiler.lap("koszty")
+
+    def run(self, until: float, on_step: Optional[Callable[["Simulation"], None]] = None): # Wykonuje kroki aż czas symulacji osiągnie until (w s). on_step - opcjonalna funkcja wywoływana po każdym kroku (np. zapis kosztów)
+        while self.current_time < until:
+            self.step()
+            if on_step is not None:
+                on_step(self)
+        self.sync_vehicles()
@@ -0,0 +1,240 @@
+from typing import List, Optional
+
+import numpy as np
+
+from symulacja_mpk.core.route import Route
+from symulacja_mpk.core.vehicles import Vehicle
+from symulacja_mpk.utils.constants import TRACK_LEFT_BOUND, TRACK_RIGHT_LIMIT
+
+MIN_FOLLOWING_DISTANCE = 70.0 # minimalny odstęp (px) między kolejnymi pojazdami na pętli trasy - nieco więcej niż długość obrazka pojazdu
+BUNCHING_RATIO = 0.25 # odstęp mniejszy niż ta część odstępu idealnego (pętla / liczba pojazdów) to skupienie pojazdów
+LANE_KEY_STRIDE = 4 * (TRACK_RIGHT_LIMIT + 1) # odstęp kluczy sortowania kolejnych pasów; większy niż zakres pozycji, więc pasy się nie mieszają
+GAP_TOLERANCE = 1e-6 # odstęp tak bliski min_gap idzie przez pełny skan w enforce (błędy zaokrągleń), dalszy jest na pewno poprawny
+
+class SpacingIndex: # indeks pozycji pojazdów: pas = trasa i kierunek, w pasie pojazdy od czołowego do ostatniego; pasy trasy razem to kolejność na pętli (tam i z powrotem). Kolejność z poprzedniego kroku jest punktem wyjścia sortowania (stabilne sortowanie prawie posortowanych danych jest liniowe), więc krok kosztuje O(n) - O(n log n); gdy kolejność się nie zmieniła, sortowanie i przebudowa układu tras są pomijane
+    def __init__(self, routes: List[Route], vehicles: List[Vehicle], min_gap: float = MIN_FOLLOWING_DISTANCE): # min_gap - minimalny odstęp w px (0 - tylko pomiar odstępów)
+        self.routes = routes
+        self.vehicles = vehicles
+        self.min_gap = min_gap
+        route_index = {id(r): j for j, r in enumerate(routes)}
+        self.route_index = np.array([route_index[id(v.route)] for v in vehicles], dtype=np.int64)
+        self.loop_length = 2.0 * (TRACK_RIGHT_LIMIT - TRACK_LEFT_BOUND) # pozycja na pętli trasy: tam, a potem z powrotem
+        self.metres_per_px = np.array([r.distance_at(TRACK_LEFT_BOUND + 1) - r.distance_at(TRACK_LEFT_BOUND) for r in routes], dtype=float)
+
+        self.order = np.arange(len(vehicles)) # pojazdy uporządkowane pasami (najpierw kierunek -1 trasy, potem 1), w pasie od czołowego, czyli malejąco według pozycji na pętli; nieaktywne na końcu
+        self.lane = np.full(len(vehicles), -1, dtype=np.int64) # pas pojazdu z ostatniej aktualizacji (-1 - poza trasą)
+        self._position = np.arange(len(vehicles)) # pozycja pojazdu w order
+        self._keys = np.zeros(len(vehicles))
+        self._lane_base = self.route_index * 2
+        self._x = np.zeros(len(vehicles)) # tablice dla step_vehicles, wypełniane w miejscu w każdym kroku
+        self._direction = np.ones(len(vehicles), dtype=np.int64)
+        self._active = np.zeros(len(vehicles), dtype=bool)
+        self._states = None # kierunki i aktywność z ostatniego step_vehicles; zmieniają się rzadko, więc tablice są wtedy tylko porównywane
+        self._settled = np.full(len(vehicles), np.nan) # pozycja pojazdu na pętli po poprzednim step (nan - nie był na trasie); cofnięty pojazd nie trafia za nią
+        self._settled_x = np.zeros(len(vehicles)) # x z tej samej chwili; zatrzymany pojazd wraca dokładnie na nie, bez błędu zaokrąglenia przy przeliczaniu z pętli
+
+        n_routes = len(routes)
+        self.observed_time = np.zeros(n_routes) # czas * liczba odstępów
+        self.gap_sum = np.zeros(n_routes)
+        self.gap_square_sum = np.zeros(n_routes)
+        self.gap_min = np.full(n_routes, np.inf)
+        self.bunched_time = np.zeros(n_routes)
+        self._pending_seconds = 0.0 # czas zebrany w sumach dla pozycji w order, jeszcze nie dodany do sum tras
+        self._route_segments(0)
+
+    def update(self, x: np.ndarray, direction: np.ndarray, active: np.ndarray): # przebudowuje kolejność pojazdów dla nowych pozycji
+        lane = np.where(active, self._lane_base + (direction == 1), -1)
+        keys = np.where(active, lane * LANE_KEY_STRIDE - direction * x + TRACK_RIGHT_LIMIT, np.inf)[self.order] # w pasie rosnąco: najpierw pojazd najdalej w kierunku jazdy
+        self.lane = lane
+        n_active = int(np.count_nonzero(active))
+        if n_active == len(self._active_order) and (keys[1:] >= keys[:-1]).all(): # kolejność bez zmian (stabilne sortowanie nic by nie przestawiło) i ci sami aktywni - układ tras w order też
+            self._keys = keys
+            return
+        permutation = np.argsort(keys, kind='stable')
+        self.order = self.order[permutation]
+        self._keys = keys[permutation]
+        self._position[self.order] = np.arange(len(self.order))
+        self._route_segments(n_active)
+
+    def _route_segments(self, n_active: int): # układ tras w order, wspólny dla enforce, gaps i statystyk; zmienia się tylko przy przestawieniu kolejności lub zmianie aktywnych pojazdów
+        self._flush()
+        order = self.order[:n_active] # nieaktywne są na końcu order
+        routes = self.route_index[order]
+        first = np.ones(n_active, dtype=bool) # czy pojazd jest czołowym swojej trasy
+        first[1:] = routes[1:] != routes[:-1]
+        starts = np.flatnonzero(first)
+        ends = np.append(starts, n_active)[1:] - 1
+        positions = np.arange(n_active)
+        following = positions + 1 # pojazd jadący za danym; za ostatnim trasy jest czołowy, o pętlę dalej
+        following[ends] = starts
+        lap = np.zeros(n_active)
+        lap[ends] = self.loop_length
+        counts = np.bincount(routes, minlength=len(self.routes))
+
+        self._active_order = order
+        self._starts, self._ends = starts, ends
+        self._rank = positions - starts[np.cumsum(first) - 1] # numer pojazdu na trasie (0 - czołowy)
+        self._segments = [slice(start, end + 1) for start, end in zip(starts.tolist(), ends.tolist())] # odcinki order zajmowane przez kolejne trasy
+        self._following, self._lap = following, lap
+        self._segment_routes = routes[starts]
+        self._counts = counts
+        self._bunching_gap = BUNCHING_RATIO * self.loop_length / np.maximum(counts, 1)[routes]
+        self._position_sum = np.zeros(n_active) # sumy ważone czasem dla pozycji w order, do _flush
+        self._position_square_sum = np.zeros(n_active)
+        self._position_min = np.full(n_active, np.inf)
+        self._position_bunched = np.zeros(n_active)
+
+    def enforce(self, x: np.ndarray, direction: np.ndarray) -> np.ndarray: # cofa pojazdy, które zbliżyły się do poprzedzającego na pętli trasy bardziej niż min_gap (x zmieniane w miejscu), ale nie za ich pozycję z poprzedniego kroku - pojazd czeka, a nie jedzie do tyłu; zwraca ich indeksy. Wynik jak przy kolejnym przesuwaniu od czoła (czołowy ograniczony przez ostatniego o pętlę dalej): s_k = min(s_k, s_{k-1} - gap), liczony jako min(s_k, min_{j<k}(s_j + j * gap) - k * gap) skanem po trasach
+        order = self._active_order
+        if self.min_gap <= 0 or len(order) == 0:
+            return np.empty(0, dtype=np.int64)
+        return self._enforce(x, direction, self.loop_positions(x[order], direction[order]))
+
+    def _enforce(self, x: np.ndarray, direction: np.ndarray, s: np.ndarray) -> np.ndarray: # enforce dla pozycji na pętli s (w kolejności order); s cofniętych pojazdów jest poprawiane
+        order = self._active_order
+        starts, rank = self._starts, self._rank
+        best = s + rank * self.min_gap
+        wrap = s[self._ends] + self.loop_length - self.min_gap # czołowy pojazd trasy jedzie za ostatnim, który jest o pętlę dalej
+        best[starts] = np.minimum(best[starts], wrap)
+
+        for segment in self._segments: # skan min w obrębie trasy, dokładny, bo używa tylko min; jedno przejście na trasę, niezależnie od liczby pojazdów
+            np.minimum.accumulate(best[segment], out=best[segment])
+        previous_best = np.empty(len(order)) # minimum tylko po pojazdach przed danym
+        previous_best[1:] = best[:-1]
+        previous_best[starts] = wrap
+
+        limit = previous_best - rank * self.min_gap
+        clamped = (s > limit).nonzero()[0]
+        if clamped.size:
+            idx = order[clamped]
+            forward = direction[idx] == 1
+            half = self.loop_length / 2
+            floor = np.where(forward, 0.0, half) # pojazd, który właśnie zawrócił, czeka na pętli, aż poprzedzający odjedzie
+            settled = self._settled[idx]
+            held = settled <= s[clamped] # ten sam obieg pętli co w poprzednim kroku (nan - pojazd dopiero wyjechał)
+            floor[held] = np.maximum(floor[held], settled[held])
+            target = np.maximum(limit[clamped], floor)
+            moved = np.where(forward, TRACK_LEFT_BOUND + target, TRACK_LEFT_BOUND + self.loop_length - target)
+            kept = held & (target == settled)
+            moved[kept] = self._settled_x[idx[kept]]
+            changed = target != s[clamped] # pojazd stojący w miejscu (np. na przystanku) nie jest cofany
+            clamped, idx = clamped[changed], idx[changed]
+            x[idx] = moved[changed]
+            s[clamped] = self.loop_positions(x[idx], direction[idx])
+        return order[clamped]
+
+    def _route_bounds(self, route: int): # zakres pozycji w order zajmowany przez aktywne pojazdy trasy. O(log n)
+        start = int(np.searchsorted(self._keys, route * 2 * LANE_KEY_STRIDE, side='left'))
+        end = int(np.searchsorted(self._keys, (route * 2 + 2) * LANE_KEY_STRIDE, side='left'))
+        return start, end
+
+    def leader(self, i: int) -> Optional[int]: # indeks pojazdu jadącego bezpośrednio przed pojazdem i na pętli jego trasy (czołowy goni ostatniego). O(log n)
+        if self.lane[i] < 0:
+            return None
+        start, end = self._route_bounds(int(self.route_index[i]))
+        if end - start < 2:
+            return None
+        p = self._position[i]
+        return int(self.order[p - 1 if p > start else end - 1])
+
+    def follower(self, i: int) -> Optional[int]:
+        if self.lane[i] < 0:
+            return None
+        start, end = self._route_bounds(int(self.route_index[i]))
+        if end - start < 2:
+            return None
+        p = self._position[i]
+        return int(self.order[p + 1 if p + 1 < end else start])
+
+    def next_vehicle(self, route: int, x: float, direction: int) -> Optional[int]: # najbliższy pojazd przed punktem x trasy route przy jeździe w kierunku direction (np. przed przystankiem). O(log n)
+        start, end = self._route_bounds(route)
+        if start == end:
+            return None
+        lane = route * 2 + (direction == 1)
+        key = lane * LANE_KEY_STRIDE + (-x if direction == 1 else x) + TRACK_RIGHT_LIMIT
+        p = int(np.searchsorted(self._keys, key, side='left')) - 1 # ostatni pojazd z kluczem mniejszym, czyli dalej na pętli
+        return int(self.order[p if p >= start else end - 1])
+
+    def loop_positions(self, x: np.ndarray, direction: np.ndarray) -> np.ndarray: # pozycja na pętli trasy (0 - początek trasy, połowa - druga pętla)
+        offset = x - TRACK_LEFT_BOUND
+        return np.where(direction == 1, offset, self.loop_length - offset)
+
+    def gaps(self, x: np.ndarray, direction: np.ndarray): # odstępy (px) między kolejnymi aktywnymi pojazdami na pętli każdej trasy; zwraca (trasa, odstęp) dla każdego pojazdu
+        order = self._active_order # pasy trasy następują po sobie: kierunek -1, potem 1, więc to kolejność malejącej pozycji na pętli
+        return self.route_index[order], self._gaps(self.loop_positions(x[order], direction[order]))
+
+    def _gaps(self, s: np.ndarray) -> np.ndarray: # odstępy dla pozycji na pętli w kolejności order
+        return s - s[self._following] + self._lap # ostatni pojazd trasy dogania pierwszego przez pętlę
+
+    def observe(self, x: np.ndarray, direction: np.ndarray, seconds: float): # dodaje odstępy z tej chwili do statystyk (ważone czasem)
+        self._accumulate(self.gaps(x, direction)[1], seconds)
+
+    def _accumulate(self, gaps: np.ndarray, seconds: float): # sumy dla pozycji w order; do sum tras trafiają przy zmianie układu tras albo przy odczycie statystyk
+        self._pending_seconds += seconds
+        self._position_sum += gaps * seconds
+        self._position_square_sum += gaps * gaps * seconds
+        np.minimum(self._position_min, gaps, out=self._position_min)
+        self._position_bunched += (gaps < self._bunching_gap) * seconds
+
+    def _flush(self): # sumy dla pozycji w order do sum tras (trasa zajmuje jeden odcinek order)
+        if not self._pending_seconds:
+            return
+        if len(self._active_order):
+            starts, routes = self._starts, self._segment_routes
+            self.observed_time += self._counts * self._pending_seconds
+            self.gap_sum[routes] += np.add.reduceat(self._position_sum, starts)
+            self.gap_square_sum[routes] += np.add.reduceat(self._position_square_sum, starts)
+            self.gap_min[routes] = np.minimum(self.gap_min[routes], np.minimum.reduceat(self._position_min, starts))
+            self.bunched_time[routes] += np.add.reduceat(self._position_bunched, starts)
+            self._position_sum[:] = 0.0
+            self._position_square_sum[:] = 0.0
+            self._position_min[:] = np.inf
+            self._position_bunched[:] = 0.0
+        self._pending_seconds = 0.0
+
+    def step(self, x: np.ndarray, direction: np.ndarray, active: np.ndarray, seconds: float) -> np.ndarray: # aktualizacja indeksu, pilnowanie odstępu i pomiar; zwraca indeksy cofniętych pojazdów
+        self.update(x, direction, active)
+        order = self._active_order
+        s = self.loop_positions(x[order], direction[order])
+        gaps = self._gaps(s)
+        clamped = np.empty(0, dtype=np.int64)
+        if self.min_gap > 0 and len(order) and gaps.min() <= self.min_gap + GAP_TOLERANCE:
+            clamped = self._enforce(x, direction, s) # skan tylko, gdy któryś odstęp jest bliski min_gap; przy większych nikt nie byłby cofnięty
+            if clamped.size:
+                gaps = self._gaps(s)
+        self._accumulate(gaps, seconds)
+        self._settled.fill(np.nan)
+        self._settled[order] = s
+        self._settled_x[order] = x[order]
+        return clamped
+
+    def step_vehicles(self, seconds: float): # step dla obiektów Vehicle (pętla po obiektach w Simulation); tablice indeksu są wypełniane w miejscu, obiekty zmieniane tylko dla cofniętych pojazdów (również ich przystanek)
+        vehicles = self.vehicles
+        x, direction, active = self._x, self._direction, self._active
+        x[:] = [v.x for v in vehicles]
+        states = [(v.direction, v.active) for v in vehicles]
+        if states != self._states:
+            direction[:] = [state[0] for state in states]
+            active[:] = [state[1] for state in states]
+            self._states = states
+        for i in self.step(x, direction, active, seconds).tolist():
+            vehicles[i].x = float(x[i])
+            vehicles[i].return_before_stop()
+
+    def statistics(self) -> List[dict]: # odstępy na każdej linii (w metrach trasy): średni, minimalny, współczynnik zmienności i udział czasu ze skupieniem pojazdów
+        self._flush()
+        rows = []
+        for j, route in enumerate(self.routes):
+            stops = route.get_stops()
+            weight = self.observed_time[j]
+            mean = self.gap_sum[j] / weight if weight else 0.0
+            variance = max(self.gap_square_sum[j] / weight - mean * mean, 0.0) if weight else 0.0
+            rows.append({
+                'linia': f"{stops[0]} - {stops[-1]}",
+                'pojazdy': int(np.count_nonzero(self.route_index == j)),
+                'śr_odstęp_m': round(float(mean * self.metres_per_px[j]), 1),
+                'min_odstęp_m': round(float(self.gap_min[j] * self.metres_per_px[j]), 1) if weight else 0.0,
+                'wsp_zmienności': round(float(variance ** 0.5 / mean), 3) if mean else 0.0,
+                'skupienie_udział': round(float(self.bunched_time[j] / weight), 3) if weight else 0.0,
+            })
+        return rows
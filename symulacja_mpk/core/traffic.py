@@ -1,4 +1,6 @@
 from enum import Enum
+from bisect import bisect_right
+from typing import Dict, List, Optional
 
 class TimePeriod(Enum):  # pory dnia - względem nich są opóźnienia/korki
     MORNING = 1
@@ -7,10 +9,60 @@ class TimePeriod(Enum):  # pory dnia - względem nich są opóźnienia/korki
     EVENING = 4
 
 
+SECONDS_PER_DAY = 86400
+TRAFFIC_TABLE_STEP = 60 # rozdzielczość tablicy opóźnień w s
+TRAFFIC_TABLE_SLOTS = SECONDS_PER_DAY // TRAFFIC_TABLE_STEP
+SIMULATION_START_HOUR = 6 # godzina odpowiadająca czasowi symulacji 0
+PERIOD_START_HOURS = {TimePeriod.MORNING: 6, TimePeriod.MIDDAY: 10, TimePeriod.AFTERNOON: 14, TimePeriod.EVENING: 18} # wieczór trwa do 6:00 następnego dnia
+PERIODS = list(TimePeriod)
+
+def period_at(day_seconds: float) -> TimePeriod: # pora dnia dla czasu liczonego od północy
+    starts = [PERIOD_START_HOURS[p] * 3600 for p in PERIODS]
+    return PERIODS[bisect_right(starts, day_seconds % SECONDS_PER_DAY) - 1] # przed pierwszą porą (noc) indeks -1 to ostatnia pora
+
+SLOT_PERIOD = [PERIODS.index(period_at(s * TRAFFIC_TABLE_STEP)) for s in range(TRAFFIC_TABLE_SLOTS)] # indeks pory dnia dla każdego wiersza tablicy
+
+def time_slot(current_time: float) -> int: # wiersz tablicy opóźnień dla czasu symulacji w s; liczony raz na krok dla wszystkich pojazdów
+    return int((current_time + SIMULATION_START_HOUR * 3600) // TRAFFIC_TABLE_STEP) % TRAFFIC_TABLE_SLOTS
+
+def period_change_times() -> List[int]: # chwile zmiany pory dnia w s od północy, rosnąco
+    return sorted(PERIOD_START_HOURS[p] * 3600 for p in PERIODS)
+
+def next_period_change(current_time: float) -> float: # czas symulacji (w s) najbliższej zmiany pory dnia po current_time
+    offset = SIMULATION_START_HOUR * 3600
+    day_start = (current_time + offset) // SECONDS_PER_DAY * SECONDS_PER_DAY
+    changes = period_change_times()
+    i = bisect_right(changes, current_time + offset - day_start)
+    if i == len(changes):
+        return day_start + SECONDS_PER_DAY + changes[0] - offset
+    return day_start + changes[i] - offset
+
+
 class Traffic:  # warunki ruchu drogowego
-    def __init__(self, intensity: int, period: TimePeriod):
-        self._intensity = intensity
+    def __init__(self, intensity: int, period: TimePeriod, intensities: Optional[Dict[TimePeriod, float]] = None, segment_factors: Optional[List[float]] = None, period_delays: Optional[List[List[float]]] = None):
+        self._intensity = intensity # natężenie w porze period (i domyślnie w pozostałych)
         self._period = period
+        self._intensities = {p: intensity for p in PERIODS}
+        self._intensities.update(intensities or {}) # natężenie w wybranych porach dnia
+        self._segment_factors = list(segment_factors) if segment_factors else [1.0] # mnożniki natężenia dla kolejnych odcinków między przystankami
+
+        # period_delays[pora][odcinek] - tylko cztery różne wiersze; delay_table[wiersz czasu] wskazuje na jeden z nich, więc tablica na całą dobę nie kopiuje wartości
+        if period_delays is not None: # gotowe współczynniki (np. ze skompilowanego scenariusza) zamiast liczenia ich z natężeń
+            self.period_delays = [list(row) for row in period_delays]
+        else:
+            self.period_delays = [[1 + (self._intensities[p] * factor / 10) for factor in self._segment_factors] for p in PERIODS]
+        self.delay_table = [self.period_delays[p] for p in SLOT_PERIOD]
+
+    def get_period(self) -> TimePeriod:
+        return self._period
+
+    def get_intensity(self, period: Optional[TimePeriod] = None) -> float:
+        return self._intensities[period or self._period]
+
+    def get_segment_count(self) -> int:
+        return len(self._segment_factors)
 
-    def get_delay_factor(self) -> float:  # współczynnik opóźnienia; im większe niż 1.0, tym większe opóźnienie przez intensywność trasy
-        return 1 + (self._intensity / 10)
\ No newline at end of file
+    def get_delay_factor(self, current_time: Optional[float] = None, segment: int = 0) -> float:  # współczynnik opóźnienia; im większe niż 1.0, tym większe opóźnienie przez intensywność trasy. Bez current_time - dla pory dnia period
+        if current_time is None:
+            return self.period_delays[PERIODS.index(self._period)][segment]
+        return self.delay_table[time_slot(current_time)][segment]
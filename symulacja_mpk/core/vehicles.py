@@ -1,25 +1,28 @@
 from abc import ABC, abstractmethod
-import pygame
+from enum import Enum
 from symulacja_mpk.core.route import Route
 from symulacja_mpk.core.drivers import Driver
-from symulacja_mpk.utils.constants import TRACK_LEFT_BOUND, TRACK_RIGHT_LIMIT
+from symulacja_mpk.utils.constants import TRACK_LEFT_BOUND, TRACK_RIGHT_LIMIT, REFERENCE_DT
 
-bus_image = None
-tram_image = None
+class VehicleState(str, Enum): # stan pojazdu; w kodzie porównywany przez `is`, a równy też napisom "Good"/"Broken" (filtry panelu, starsze skrypty)
+    GOOD = "Good"
+    BROKEN = "Broken"
 
-def set_vehicle_images(bus_img: pygame.Surface, tram_img: pygame.Surface):
-    global bus_image, tram_image
-    bus_image = bus_img
-    tram_image = tram_img
+GOOD = VehicleState.GOOD
+BROKEN = VehicleState.BROKEN
 
 class Vehicle(ABC): # abstrakcyjna klasa bazowa dla każdego busa/tramwaju. Posiada własny numer linii, trasę, kierowcę, prędkość poruszania się
+    __slots__ = ('line_number', 'route', 'driver', 'base_speed', 'speed', 'state', 'condition', 'repair_duration', 'x', 'direction', 'y',
+                 'hours_driven', 'time_broken', 'wait_timer', 'stop_positions', 'next_stop_index', 'active', 'activation_time',
+                 'breakdown_duration', 'cost_tracker') # bez __dict__ - mniej pamięci przy dużych flotach i szybszy dostęp do atrybutów
+    sprite = None # rodzaj obrazka w GUI (gui/sprites.py); model nie zależy od pygame
     def __init__(self, line_number: str, route: Route, driver: Driver, speed: float = 1.0):
         self.line_number = line_number
         self.route = route
         self.driver = driver
         self.base_speed = speed  # bazowa prędkość pojazdu
-        self.speed = speed * self.driver.get_speed_multiplier()
-        self.state = "Good"
+        self.speed = speed * self.driver.speed_multiplier
+        self.state = GOOD
         self.condition = 10  # 10 to najlepszy stan; nowy/naprawiony
         self.repair_duration = 0.0
         self.x = TRACK_LEFT_BOUND
@@ -28,8 +31,8 @@ class Vehicle(ABC): # abstrakcyjna klasa bazowa dla każdego busa/tramwaju. Posi
         self.hours_driven = 0.0
         self.time_broken = 0.0
         self.wait_timer = 0.0
-        self.stop_positions = route.get_stop_positions()
-        self.next_stop_index = 0
+        self.stop_positions = route.get_stop_positions() # krotka trasy (w kolejności trasy), wspólna dla wszystkich pojazdów linii
+        self.next_stop_index = 0 # indeks następnego przystanku w stop_positions; przy kierunku -1 maleje, -1 lub len(stop_positions) - brak przystanku przed pętlą
         self.active = False # czy jest na trasie
         self.activation_time = 0.0 # czas, zanim odjedzie a się pojawi na trasie
         self.breakdown_duration = 0.0
@@ -39,9 +42,12 @@ class Vehicle(ABC): # abstrakcyjna klasa bazowa dla każdego busa/tramwaju. Posi
     def calculate_cost(self) -> float: # abstrakcyjna metoda, która oblicza koszty operacyjne danego pojazdu
         pass
 
-    @abstractmethod
-    def get_image(self) -> pygame.Surface:
-        pass
+    def current_segment(self) -> int: # odcinek trasy (między przystankami segment i segment + 1 w kolejności trasy), po którym jedzie pojazd; przed pierwszym i za ostatnim przystankiem - odcinek skrajny
+        segments = len(self.stop_positions) - 1
+        if segments <= 1:
+            return 0
+        k = self.next_stop_index - 1 if self.direction == 1 else self.next_stop_index # odcinek kończy się na następnym przystanku
+        return min(max(k, 0), segments - 1)
 
     def update(self, dt: float, delay_factor: float, current_time: float): # Aktualizacja stanu pojazdu w symulacji (ruch, obsługa awarii, postój na przystankach oraz aktywację pojazdu). Przyjmuje dt, czyli czas od aktualizacji w ms, delay_factor, czyli współczynnik opóźnienia i current_time, czyli obecny czas symulacji w sekundach
         if not self.active:
@@ -50,7 +56,7 @@ class Vehicle(ABC): # abstrakcyjna klasa bazowa dla każdego busa/tramwaju. Posi
             else:
                 return
 
-        if self.state == "Broken":
+        if self.state is BROKEN:
             self.time_broken += dt / 1000.0
 
             if self.time_broken < self.breakdown_duration: # pojazd uszkodzony
@@ -59,7 +65,7 @@ class Vehicle(ABC): # abstrakcyjna klasa bazowa dla każdego busa/tramwaju. Posi
             if self.time_broken < self.breakdown_duration + self.repair_duration: # naprawa
                 return
 
-            self.state = "Good"
+            self.state = GOOD
             self.time_broken = 0.0
             self.condition = 10
             return
@@ -68,30 +74,35 @@ class Vehicle(ABC): # abstrakcyjna klasa bazowa dla każdego busa/tramwaju. Posi
             self.wait_timer -= dt / 1000.0
             return
 
-        self.x += self.direction * (self.speed / delay_factor)
+        self.x += self.direction * (self.speed / delay_factor) * (dt / REFERENCE_DT) # speed to px na krok REFERENCE_DT, więc ten sam czas daje tę samą drogę przy każdym dt
 
         if self.direction == 1 and self.x >= TRACK_RIGHT_LIMIT: # zmiana kierunku przy pętli
             self.direction = -1
-            self.stop_positions = list(reversed(self.stop_positions))
-            self.next_stop_index = 0
             self.x = TRACK_RIGHT_LIMIT
+            self.next_stop_index = self.route.next_stop_index(self.x, self.direction)
         elif self.direction == -1 and self.x <= TRACK_LEFT_BOUND:
             self.direction = 1
-            self.stop_positions = list(reversed(self.stop_positions))
-            self.next_stop_index = 0
             self.x = TRACK_LEFT_BOUND
+            self.next_stop_index = self.route.next_stop_index(self.x, self.direction)
 
-        if self.next_stop_index < len(self.stop_positions): # obsługa przystanków
+        if 0 <= self.next_stop_index < len(self.stop_positions): # obsługa przystanków
             stop_x = self.stop_positions[self.next_stop_index]
             if (self.direction == 1 and self.x >= stop_x) or (self.direction == -1 and self.x <= stop_x):
                 self.x = stop_x # Upewnij się, że pojazd jest dokładnie na przystanku
                 self.wait_timer = 5.0
-                self.next_stop_index += 1
-                if self.next_stop_index >= len(self.stop_positions):
-                    self.next_stop_index = 0
+                self.next_stop_index += self.direction # po ostatnim przystanku w kierunku jazdy pojazd jedzie do pętli, gdzie indeks jest wyznaczany od nowa
+
+    def return_before_stop(self): # po cofnięciu przez SpacingIndex: jeśli pojazd skończył krok przed przystankiem, na którym właśnie stanął, przystanek znów jest następny, a postój przepada
+        served = self.next_stop_index - self.direction
+        if 0 <= served < len(self.stop_positions) and self.direction * (self.stop_positions[served] - self.x) > 0:
+            self.next_stop_index = served
+            self.wait_timer = 0.0
 
 
 class Bus(Vehicle): # klasa autobus, która porusza się po trasie
+    __slots__ = ('fuel_consumption',)
+    capacity = 90 # liczba pasażerów
+    sprite = "bus"
     def __init__(self, line_number: str, route: Route, driver: Driver, fuel_consumption: float, speed: float = 1.0): # Konstruktor, który tworzy obiekt autobus. Jako argumenty przyjmuje: nr linii, trasę, kierowcę, zużycie paliwa, prędkość.
         super().__init__(line_number, route, driver, speed) # konstruktor dziedziczy po klasie vehicle
         self.fuel_consumption = fuel_consumption
@@ -99,16 +110,13 @@ class Bus(Vehicle): # klasa autobus, która porusza się po trasie
     def calculate_cost(self) -> float:
         return self.fuel_consumption * self.route.get_length() + self.driver.salary
 
-    def get_image(self) -> pygame.Surface:
-        return bus_image
-
 class Tram(Vehicle): # klasa tramwaj, która porusza się po trasie
+    __slots__ = ('electricity_consumption',)
+    capacity = 200
+    sprite = "tram"
     def __init__(self, line_number: str, route: Route, driver: Driver, electricity_consumption: float, speed: float = 1.0): # Konstruktor, który tworzy obiekt tramwaj. Jako argumenty przyjmuje: nr linii, trasę, kierowcę, zużycie energii, prędkość.
         super().__init__(line_number, route, driver, speed)
         self.electricity_consumption = electricity_consumption
 
     def calculate_cost(self) -> float:
         return self.electricity_consumption * self.route.get_length() + self.driver.salary
-
-    def get_image(self) -> pygame.Surface:
-        return tram_image
\ No newline at end of file
@@ -1,81 +1,377 @@
+import bisect
 import pygame
+from functools import lru_cache
 from typing import List
-from symulacja_mpk.core.vehicles import Vehicle, Bus, Tram
+from symulacja_mpk.core.vehicles import Vehicle, Bus, Tram, GOOD, BROKEN
+from symulacja_mpk.gui.sprites import vehicle_image
 from symulacja_mpk.core.route import Route
 from symulacja_mpk.utils.constants import (
     SCREEN_WIDTH, SCREEN_HEIGHT, PANEL_WIDTH, PANEL_LEFT_X,
     TRACK_LEFT_BOUND, TRACK_RIGHT_BOUND, TRACK_RIGHT_LIMIT,
-    BLACK, GRAY, RED, PANEL_BG, FONT_NAME, FONT_SIZE
+    BLACK, GRAY, RED, GREEN, PANEL_BG, FONT_NAME, FONT_SIZE
 )
 
-pygame.font.init()
-font = pygame.font.SysFont(FONT_NAME, FONT_SIZE)
-
 scroll_offset = 0
 
-def draw_routes(screen: pygame.Surface, routes: List[Route], y_base: List[int]): # metoda do rysowania tras i przystanków z nazwami
+TEXT_CACHE_SIZE = 4096 # ile wyrenderowanych napisów trzymać w pamięci
+
+_route_layer = None # wyrenderowane trasy, przystanki i nazwy; odświeżane tylko przy zmianie tras, pozycji lub rozmiaru ekranu
+_route_layer_key = None
+_flipped_images = {} # id(obrazek) -> (obrazek, odwrócony obrazek)
+
+@lru_cache(maxsize=1)
+def get_font() -> pygame.font.Font: # czcionka tworzona przy pierwszym napisie, a nie przy imporcie modułu
+    pygame.font.init()
+    return pygame.font.SysFont(FONT_NAME, FONT_SIZE)
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text: str, color=BLACK) -> pygame.Surface: # renderuje napis tylko przy pierwszym użyciu; kolejne klatki dostają gotową powierzchnię
+    return get_font().render(text, True, color)
+
+def render_route_layer(routes: List[Route], y_base: List[int], size) -> pygame.Surface: # rysuje tory, przystanki i ich nazwy na przezroczystej powierzchni o rozmiarze size
+    layer = pygame.Surface(size, pygame.SRCALPHA)
     for idx, route in enumerate(routes):
         base_y = y_base[idx]
-        pygame.draw.line(screen, GRAY, (TRACK_LEFT_BOUND, base_y), (TRACK_RIGHT_BOUND, base_y), 3)
+        pygame.draw.line(layer, GRAY, (TRACK_LEFT_BOUND, base_y), (TRACK_RIGHT_BOUND, base_y), 3)
 
         for i, x_stop in enumerate(route.get_stop_positions()):
             effective_x_stop = min(x_stop, TRACK_RIGHT_BOUND)
-            pygame.draw.circle(screen, BLACK, (int(effective_x_stop), base_y), 5)
+            pygame.draw.circle(layer, BLACK, (int(effective_x_stop), base_y), 5)
 
             stop_name = route.get_stops()[i]
-            label = font.render(stop_name, True, BLACK)
+            label = render_text(stop_name)
             label_rect = label.get_rect()
             text_x = effective_x_stop - label_rect.width // 2
             text_x = max(TRACK_LEFT_BOUND, min(text_x, TRACK_RIGHT_BOUND - label_rect.width)) # zapobieganie wyjściu nazw przystanków poza granice toru
-            screen.blit(label, (text_x, base_y + 10))
+            layer.blit(label, (text_x, base_y + 10))
+    return layer
+
+def draw_routes(screen: pygame.Surface, routes: List[Route], y_base: List[int]): # metoda do rysowania tras i przystanków z nazwami; statyczna warstwa jest renderowana raz i potem tylko kopiowana
+    global _route_layer, _route_layer_key
+    key = (tuple(id(route) for route in routes), tuple(y_base[:len(routes)]), screen.get_size())
+    if _route_layer is None or key != _route_layer_key:
+        _route_layer = render_route_layer(routes, y_base, screen.get_size())
+        _route_layer_key = key
+    screen.blit(_route_layer, (0, 0))
+
+def invalidate_route_layer(): # wymusza ponowne narysowanie tras (np. gdy zmieniła się lista przystanków tej samej trasy)
+    global _route_layer
+    _route_layer = None
+
+def get_flipped_image(image: pygame.Surface) -> pygame.Surface: # obrazek odwrócony w poziomie; pygame.transform.flip wywoływany raz na obrazek, nie co klatkę
+    cached = _flipped_images.get(id(image))
+    if cached is None or cached[0] is not image:
+        cached = (image, pygame.transform.flip(image, True, False))
+        _flipped_images[id(image)] = cached
+    return cached[1]
 
 
 def draw_vehicle(screen: pygame.Surface, v: Vehicle): # rysuje pojazdy, patrzy na typ, kierunek oraz stan
     if not v.active:
         return
-    image = v.get_image()
+    image = vehicle_image(v)
     draw_x = v.x - image.get_width() / 2
     draw_x = max(TRACK_LEFT_BOUND, min(draw_x, TRACK_RIGHT_LIMIT - image.get_width()))
     if v.direction == -1: # odwracanie pojazdu
-        image = pygame.transform.flip(image, True, False)
+        image = get_flipped_image(image)
     screen.blit(image, (draw_x, v.y - image.get_height() / 2))
-    if v.state == "Broken":
-        pygame.draw.rect(screen, RED, (draw_x, v.y - image.get_height() / 2, image.get_width(), image.get_height()), 2)
+    if v.state is BROKEN:
+        draw_frame(screen, RED, pygame.Rect(draw_x, v.y - image.get_height() / 2, image.get_width(), image.get_height()), 2)
 
+def draw_frame(screen: pygame.Surface, color, rect: pygame.Rect, width: int): # ramka jak pygame.draw.rect(..., width), ale z czterech pełnych pasów - draw.rect z obcięciem (set_clip) do wąskiego paska wypełnia go całego, co psuło przyrostowe rysowanie
+    screen.fill(color, (rect.x, rect.y, rect.width, width))
+    screen.fill(color, (rect.x, rect.bottom - width, rect.width, width))
+    screen.fill(color, (rect.x, rect.y, width, rect.height))
+    screen.fill(color, (rect.right - width, rect.y, width, rect.height))
 
-def draw_info_panel(screen: pygame.Surface, vehicles: List[Vehicle]): # Panel informacyjny po prawej stronie. Wyświetla statusy pojazdów i obsługuje przewijanie. Jako argument przyjmuje vehicles... - lista obiektów pojazdów do wyświetlania
-    global scroll_offset
-    panel_left = PANEL_LEFT_X
-    pygame.draw.rect(screen, PANEL_BG, (panel_left, 0, PANEL_WIDTH, SCREEN_HEIGHT))
 
-    content_height = 0
-    active_vehicles_count = sum(1 for v in vehicles if v.active)
-    content_height = active_vehicles_count * ((4 * 18) + 10)
+ROW_LINE_HEIGHT = 18 # wysokość jednej linii tekstu w panelu
+ROW_HEIGHT = 4 * ROW_LINE_HEIGHT + 10 # wysokość wpisu jednego pojazdu (4 linie + odstęp)
 
+def vehicle_panel_lines(v: Vehicle) -> tuple: # linie tekstu opisujące pojazd w panelu
+    return (
+        f"Line: {v.line_number}",
+        f"Type: {'Bus' if isinstance(v, Bus) else 'Tram'}",
+        f"Driver: {v.driver.name}",
+        f"Status: {v.condition if v.state is GOOD else 'Broken'}" # zamiast good skala 1-10
+    )
+
+def clamp_scroll(active_vehicles_count: int) -> int: # Ograniczanie scroll_offset do wysokości zawartości panelu
+    global scroll_offset
+    content_height = active_vehicles_count * ROW_HEIGHT
     panel_display_height = SCREEN_HEIGHT
     max_scroll_offset = max(0, content_height - panel_display_height + 20)
+    scroll_offset = max(0, min(scroll_offset, max_scroll_offset))
+    return scroll_offset
+
+def draw_panel_row(screen: pygame.Surface, lines: tuple, y: int): # rysuje linie jednego pojazdu od wysokości y
+    for line in lines:
+        label = render_text(line) # napis renderowany ponownie tylko, gdy zmieni się jego treść (np. kondycja pojazdu)
+        screen.blit(label, (PANEL_LEFT_X + 10, y))
+        y += ROW_LINE_HEIGHT
+
+def _line_sort_key(v: Vehicle): # "B2" przed "B10"
+    prefix = v.line_number.rstrip("0123456789")
+    number = v.line_number[len(prefix):]
+    return prefix, int(number) if number else 0
+
+class InfoPanel: # wirtualizowana lista pojazdów w panelu: liczba aktywnych pojazdów jest liczona przyrostowo, a układane i rysowane są tylko wiersze w widocznym obszarze
+    SORT_KEYS = {
+        None: lambda v: (),
+        "line": _line_sort_key,
+        "state": lambda v: v.state is not BROKEN, # najpierw zepsute
+        "condition": lambda v: v.condition if v.state is GOOD else -1, # od najgorszej kondycji
+    }
+    STATE_FILTERS = (None, BROKEN, GOOD)
+    DYNAMIC_SORTS = ("state", "condition") # klucze zmieniające się w czasie - kolejność odświeżana co refresh_frames klatek
+
+    def __init__(self, vehicles: List[Vehicle], sort_by: str = None, line_filter: str = None, state_filter: str = None, refresh_frames: int = 30): # line_filter - prefiks numeru linii (np. "T" - tylko tramwaje), state_filter - VehicleState (albo "Good"/"Broken")
+        self.vehicles = vehicles
+        self.fleet_size = len(vehicles)
+        self.refresh_frames = refresh_frames
+        self._position = {id(v): i for i, v in enumerate(vehicles)} # kolejność floty jako ostatnie kryterium sortowania
+        self._pending = sorted((v for v in vehicles if not v.active), key=lambda v: v.activation_time) # pojazdy aktywują się w kolejności activation_time
+        self._pending_index = 0
+        self._active = [v for v in vehicles if v.active]
+        self._frame = 0
+        self.set_view(sort_by, line_filter, state_filter)
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    def set_view(self, sort_by: str = None, line_filter: str = None, state_filter: str = None): # zmiana sortowania/filtrów przebudowuje listę raz
+        if sort_by not in self.SORT_KEYS:
+            raise ValueError(f"Nieznane sortowanie: {sort_by}")
+        if state_filter not in self.STATE_FILTERS:
+            raise ValueError(f"Nieznany filtr stanu: {state_filter}")
+        self.sort_by = sort_by
+        self.line_filter = line_filter
+        self.state_filter = state_filter
+        self._rebuild()
+
+    def _key(self, v: Vehicle):
+        return self.SORT_KEYS[self.sort_by](v), self._position[id(v)]
+
+    def _matches_static(self, v: Vehicle) -> bool:
+        return self.line_filter is None or v.line_number.startswith(self.line_filter)
+
+    def _rebuild(self):
+        shown = [v for v in self._active if self._matches_static(v) and (self.state_filter is None or v.state == self.state_filter)]
+        self._rows = sorted(shown, key=self._key)
+        self._row_keys = [self._key(v) for v in self._rows]
+
+    def _is_dynamic(self) -> bool:
+        return self.sort_by in self.DYNAMIC_SORTS or self.state_filter is not None
+
+    def update(self): # wywoływane raz na klatkę: dopisuje nowo aktywne pojazdy i okresowo odświeża kolejność zależną od stanu
+        self._frame += 1
+        while self._pending_index < len(self._pending) and self._pending[self._pending_index].active:
+            v = self._pending[self._pending_index]
+            self._pending_index += 1
+            self._active.append(v)
+            if self._matches_static(v) and (self.state_filter is None or v.state == self.state_filter):
+                key = self._key(v)
+                index = bisect.bisect(self._row_keys, key)
+                self._row_keys.insert(index, key)
+                self._rows.insert(index, v)
+        if self._is_dynamic() and self._frame % self.refresh_frames == 0:
+            self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def visible_rows(self, scroll: int, height: int = SCREEN_HEIGHT) -> list: # (numer wiersza, pojazd) dla wierszy, które mieszczą się w panelu przy danym przewinięciu
+        first = max(0, (scroll - 10) // ROW_HEIGHT)
+        last = min(len(self._rows), (scroll - 10 + height) // ROW_HEIGHT + 1)
+        return [(index, self._rows[index]) for index in range(first, last)]
+
+    def draw(self, screen: pygame.Surface): # rysuje tło panelu i widoczne wiersze
+        pygame.draw.rect(screen, PANEL_BG, (PANEL_LEFT_X, 0, PANEL_WIDTH, SCREEN_HEIGHT))
+        scroll = clamp_scroll(len(self._rows))
+        for index, v in self.visible_rows(scroll):
+            draw_panel_row(screen, vehicle_panel_lines(v), 10 - scroll + index * ROW_HEIGHT)
 
-    scroll_offset = max(0, min(scroll_offset, max_scroll_offset)) # Ograniczanie scroll_offset
+_info_panel = None
 
-    y = 10 - scroll_offset
-    for v in vehicles:
+def get_info_panel(vehicles: List[Vehicle]) -> InfoPanel: # panel dla danej listy pojazdów; tworzony ponownie tylko, gdy zmieniła się lista
+    global _info_panel
+    if _info_panel is None or _info_panel.vehicles is not vehicles or _info_panel.fleet_size != len(vehicles):
+        _info_panel = InfoPanel(vehicles)
+    return _info_panel
+
+def draw_info_panel(screen: pygame.Surface, vehicles: List[Vehicle]): # Panel informacyjny po prawej stronie. Wyświetla statusy pojazdów i obsługuje przewijanie. Jako argument przyjmuje vehicles... - lista obiektów pojazdów do wyświetlania
+    panel = get_info_panel(vehicles)
+    panel.update()
+    panel.draw(screen)
+
+
+class DirtyRectRenderer: # rysuje klatkę przyrostowo: odświeża tylko obszary poruszonych/zmienionych pojazdów i zmienionych wierszy panelu, a render() zwraca ich listę dla pygame.display.update
+    def __init__(self, background_color=GREEN, full_redraw_ratio: float = 0.5): # full_redraw_ratio - jeśli zmieniony obszar przekracza tę część ekranu, rysowana jest cała klatka
+        self.background_color = background_color
+        self.full_redraw_ratio = full_redraw_ratio
+        self.full_redraw = True # pierwsza klatka jest zawsze pełna
+        self._background = None
+        self._background_key = None
+        self._vehicles = None
+        self._vehicle_keys = []
+        self._panel_rows = {} # numer wiersza -> linie tekstu, tylko dla widocznych wierszy
+        self._scroll = None
+        self.last_frame_full = True
+        self.overlay = None # opcjonalna funkcja overlay(screen) -> Rect rysowana na wierzchu każdej klatki (np. ProfileOverlay)
+        self._overlay_rect = None
+
+    def invalidate(self): # wymusza pełne narysowanie następnej klatki
+        self.full_redraw = True
+
+    def _vehicle_key(self, v: Vehicle): # wszystko, od czego zależy wygląd pojazdu: prostokąt, obrazek, kierunek i ramka awarii
         if not v.active:
-            continue
-        lines = [
-            f"Line: {v.line_number}",
-            f"Type: {'Bus' if isinstance(v, Bus) else 'Tram'}",
-            f"Driver: {v.driver.name}",
-            f"Status: {v.condition if v.state == 'Good' else 'Broken'}" # zamiast good skala 1-10
-        ]
-        for line in lines:
-            label = font.render(line, True, BLACK)
-            screen.blit(label, (panel_left + 10, y))
-            y += 18
-        y += 10
+            return None
+        image = vehicle_image(v)
+        width, height = image.get_width(), image.get_height()
+        draw_x = max(TRACK_LEFT_BOUND, min(v.x - width / 2, TRACK_RIGHT_LIMIT - width))
+        rect = pygame.Rect(int(draw_x), int(v.y - height / 2), width, height)
+        return rect, id(image), v.direction, v.state is BROKEN
+
+    def _ensure_background(self, screen: pygame.Surface, routes: List[Route], y_base: List[int]): # tło (kolor + warstwa tras) jako jedna powierzchnia, z której odtwarzane są zmienione obszary
+        key = (tuple(id(route) for route in routes), tuple(y_base[:len(routes)]), screen.get_size())
+        if key != self._background_key:
+            self._background = pygame.Surface(screen.get_size())
+            self._background.fill(self.background_color)
+            draw_routes(self._background, routes, y_base)
+            self._background_key = key
+            self.full_redraw = True
+
+    def render(self, screen: pygame.Surface, routes: List[Route], y_base: List[int], vehicles: List[Vehicle]) -> List[pygame.Rect]: # rysuje klatkę; zwraca zmienione prostokąty (przy pełnym odświeżeniu - cały ekran)
+        self._ensure_background(screen, routes, y_base)
+        if vehicles is not self._vehicles or len(vehicles) != len(self._vehicle_keys):
+            self._vehicles = vehicles
+            self.full_redraw = True
+
+        keys = [self._vehicle_key(v) for v in vehicles]
+        panel = get_info_panel(vehicles)
+        panel.update()
+        scroll = clamp_scroll(len(panel))
+        rows = {index: vehicle_panel_lines(v) for index, v in panel.visible_rows(scroll)} # tylko widoczne wiersze
+
+        full = self.full_redraw
+        if not full:
+            restore = [self._overlay_rect] if self._overlay_rect is not None else [] # pod nakładką odtwarzane jest tło i pojazdy, bo jest rysowana z przezroczystością
+            dirty = self._render_vehicles(screen, vehicles, keys, restore) + self._render_panel(screen, panel, rows, scroll)
+            screen_area = screen.get_width() * screen.get_height()
+            full = sum(r.width * r.height for r in dirty) > self.full_redraw_ratio * screen_area
+        if full:
+            screen.blit(self._background, (0, 0))
+            for v in vehicles:
+                draw_vehicle(screen, v)
+            panel.draw(screen)
+            dirty = [screen.get_rect()]
+        self._overlay_rect = None
+        if self.overlay is not None:
+            self._overlay_rect = self.overlay(screen)
+            if not full:
+                dirty.append(self._overlay_rect)
+
+        self._vehicle_keys = keys
+        self._panel_rows = rows
+        self._scroll = scroll
+        self.full_redraw = False
+        self.last_frame_full = full
+        return dirty
+
+    def _render_vehicles(self, screen: pygame.Surface, vehicles: List[Vehicle], keys: list, restore: List[pygame.Rect] = ()) -> List[pygame.Rect]: # restore - dodatkowe obszary do odtworzenia (np. spod nakładki)
+        dirty = list(restore)
+        for old, new in zip(self._vehicle_keys, keys):
+            if old != new:
+                if old is not None:
+                    dirty.append(old[0])
+                if new is not None:
+                    dirty.append(new[0].inflate(2, 2)) # zapas na zaokrąglenie pozycji ramki awarii
+        if not dirty:
+            return dirty
+
+        for rect in dirty: # w każdym obszarze: tło, a potem wszystkie nachodzące na niego pojazdy w tej samej kolejności co przy pełnej klatce
+            screen.set_clip(rect)
+            screen.blit(self._background, rect, rect)
+            for v, key in zip(vehicles, keys):
+                if key is not None and key[0].inflate(2, 2).colliderect(rect):
+                    draw_vehicle(screen, v)
+        screen.set_clip(None)
+        return dirty
+
+    def _render_panel(self, screen: pygame.Surface, panel: InfoPanel, rows: dict, scroll: int) -> List[pygame.Rect]:
+        panel_rect = pygame.Rect(PANEL_LEFT_X, 0, PANEL_WIDTH, SCREEN_HEIGHT)
+        if scroll != self._scroll:
+            panel.draw(screen)
+            return [panel_rect]
+
+        dirty = []
+        for index in sorted(rows.keys() | self._panel_rows.keys()):
+            new = rows.get(index)
+            if new == self._panel_rows.get(index):
+                continue
+            y = 10 - scroll + index * ROW_HEIGHT
+            rect = pygame.Rect(PANEL_LEFT_X, y, PANEL_WIDTH, ROW_HEIGHT).clip(panel_rect)
+            pygame.draw.rect(screen, PANEL_BG, rect)
+            if new is not None:
+                screen.set_clip(rect)
+                draw_panel_row(screen, new, y)
+                screen.set_clip(None)
+            dirty.append(rect)
+        return dirty
+
+    def present(self, dirty: List[pygame.Rect]): # wysyła na ekran tylko zmienione obszary; przy pełnej klatce - flip
+        if self.last_frame_full:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+
+
+PROFILE_OVERLAY_REFRESH = 30 # co ile klatek przeliczać percentyle w nakładce profilera
+PROFILE_OVERLAY_COLUMNS = (6, 130, 195) # położenie kolumn: faza, p50, p95
+
+class ProfileOverlay: # nakładka z czasami faz kroku (p50 i p95 w ms z okna profilera) w lewym dolnym rogu obszaru tras; obraz jest przeliczany co refresh klatek
+    def __init__(self, profiler, refresh: int = PROFILE_OVERLAY_REFRESH):
+        self.profiler = profiler
+        self.refresh = refresh
+        self._frame = 0
+        self._surface = None
+
+    def _render(self) -> pygame.Surface:
+        rows = [("faza", "p50", "p95 [ms]")] + [(row['faza'], f"{row['p50_ms']:.2f}", f"{row['p95_ms']:.2f}") for row in self.profiler.summary()]
+        surface = pygame.Surface((260, len(rows) * ROW_LINE_HEIGHT + 8), pygame.SRCALPHA)
+        surface.fill((255, 255, 255, 200))
+        for k, row in enumerate(rows):
+            for x, text in zip(PROFILE_OVERLAY_COLUMNS, row):
+                surface.blit(get_font().render(text, True, BLACK), (x, 4 + k * ROW_LINE_HEIGHT)) # bez render_text - liczby zmieniają się co odświeżenie i wypierałyby napisy z pamięci podręcznej
+        return surface
+
+    def __call__(self, screen: pygame.Surface) -> pygame.Rect:
+        if self._surface is None or self._frame % self.refresh == 0:
+            self._surface = self._render()
+        self._frame += 1
+        return screen.blit(self._surface, (TRACK_LEFT_BOUND, SCREEN_HEIGHT - self._surface.get_height() - 5))
+
+
+PANEL_SORT_ORDER = (None, "line", "state", "condition")
+PANEL_LINE_FILTERS = (None, "B", "T")
+
+def handle_panel_key(event: pygame.event.Event, vehicles: List[Vehicle]): # klawisze panelu: S - zmiana sortowania, F - filtr stanu, L - tylko autobusy/tramwaje
+    panel = get_info_panel(vehicles)
+    sort_by, line_filter, state_filter = panel.sort_by, panel.line_filter, panel.state_filter
+    if event.key == pygame.K_s:
+        sort_by = PANEL_SORT_ORDER[(PANEL_SORT_ORDER.index(sort_by) + 1) % len(PANEL_SORT_ORDER)]
+    elif event.key == pygame.K_f:
+        state_filter = InfoPanel.STATE_FILTERS[(InfoPanel.STATE_FILTERS.index(state_filter) + 1) % len(InfoPanel.STATE_FILTERS)]
+    elif event.key == pygame.K_l:
+        line_filter = PANEL_LINE_FILTERS[(PANEL_LINE_FILTERS.index(line_filter) + 1) % len(PANEL_LINE_FILTERS)] if line_filter in PANEL_LINE_FILTERS else None
+    else:
+        return
+    panel.set_view(sort_by, line_filter, state_filter)
 
 def handle_scroll(event: pygame.event.Event):
     global scroll_offset
     if event.button == 4:  # scroll w górę
         scroll_offset = max(scroll_offset - 20, 0)
     elif event.button == 5:  # scroll w dół
-        scroll_offset += 20
\ No newline at end of file
+        scroll_offset += 20
@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+
+import pygame
+
+from symulacja_mpk.core.vehicles import Vehicle
+from symulacja_mpk.utils.constants import BUS_IMAGE_PATH, TRAM_IMAGE_PATH, VEHICLE_IMAGE_WIDTH, VEHICLE_IMAGE_HEIGHT
+
+_images = {} # rodzaj pojazdu (Vehicle.sprite) -> obrazek; model pojazdów nie zna pygame, obrazki są tylko tutaj
+
+def set_vehicle_images(bus_img: pygame.Surface, tram_img: pygame.Surface):
+    _images['bus'] = bus_img
+    _images['tram'] = tram_img
+
+def vehicle_image(v: Vehicle) -> Optional[pygame.Surface]: # obrazek rysowany dla pojazdu
+    return _images.get(v.sprite)
+
+def load_vehicle_images(): # wczytuje obrazki pojazdów z plików (po utworzeniu okna - convert_alpha); jeśli ich brak, używa kolorowych prostokątów
+    try:
+        bus_image_loaded = pygame.image.load(os.path.join(os.path.dirname(__file__), '..', '..', BUS_IMAGE_PATH)).convert_alpha() # '..', '..' cofa się z symulacja_mpk/gui do MPK
+        tram_image_loaded = pygame.image.load(os.path.join(os.path.dirname(__file__), '..', '..', TRAM_IMAGE_PATH)).convert_alpha()
+        bus_image_loaded = pygame.transform.scale(bus_image_loaded, (VEHICLE_IMAGE_WIDTH, VEHICLE_IMAGE_HEIGHT))
+        tram_image_loaded = pygame.transform.scale(tram_image_loaded, (VEHICLE_IMAGE_WIDTH, VEHICLE_IMAGE_HEIGHT))
+    except pygame.error as e:
+        print(f"Błąd ładowania obrazu: {e}. Upewnij się, że {BUS_IMAGE_PATH} i {TRAM_IMAGE_PATH} są w katalogu")
+        bus_image_loaded = pygame.Surface((VEHICLE_IMAGE_WIDTH, VEHICLE_IMAGE_HEIGHT), pygame.SRCALPHA)
+        bus_image_loaded.fill((0, 0, 255, 128)) # trochę niebieski prostokąt zastępujący autobus
+        tram_image_loaded = pygame.Surface((VEHICLE_IMAGE_WIDTH, VEHICLE_IMAGE_HEIGHT), pygame.SRCALPHA)
+        tram_image_loaded.fill((255, 0, 0, 128)) # trochę czerwony prostokąt zastępujący tramwaj
+    set_vehicle_images(bus_image_loaded, tram_image_loaded)
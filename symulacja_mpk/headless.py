@@ -0,0 +1,149 @@
+import argparse
+import time
+
+from symulacja_mpk.core.scenario import load_scenario
+from symulacja_mpk.core.passengers import PassengerDemand
+from symulacja_mpk.core.spacing import SpacingIndex
+from symulacja_mpk.core.depot import Depot, DEPOT_PRIORITIES, SERVICE_CONDITION, SERVICE_HOURS
+from symulacja_mpk.core.simulation import Simulation, DEFAULT_DT
+from symulacja_mpk.core.events import EventSimulation
+from symulacja_mpk.core.sharded import ShardedSimulation, SHARD_WINDOW
+from symulacja_mpk.core.maintenance import Maintenance, ExponentialMaintenance
+from symulacja_mpk.utils.random_streams import RandomStreams
+from symulacja_mpk.utils.cost_export import CostExporter, COST_FORMATS
+from symulacja_mpk.utils.passenger_export import write_passenger_statistics
+from symulacja_mpk.utils.cost_ledger import CostLedger, write_hourly_costs
+from symulacja_mpk.utils.checkpoint import Checkpointer, load_checkpoint, CHECKPOINT_INTERVAL
+from symulacja_mpk.utils.profiling import PhaseProfiler
+from symulacja_mpk.utils.telemetry import TelemetryServer, parse_address, TELEMETRY_RATE
+
+def chain(callbacks: list): # jedna funkcja on_step wywołująca kolejno podane
+    callbacks = [c for c in callbacks if c is not None]
+    if len(callbacks) <= 1:
+        return callbacks[0] if callbacks else None
+    def on_step(simulation):
+        for callback in callbacks:
+            callback(simulation)
+    return on_step
+
+def main(argv=None): # uruchamia symulację bez okna i bez limitu klatek, np. na serwerach obliczeniowych
+    parser = argparse.ArgumentParser(description="Symulacja MPK bez GUI")
+    parser.add_argument("--scenario", default=None, help="plik scenariusza .json/.toml (domyślnie scenarios/wroclaw.json)")
+    parser.add_argument("--until", type=float, default=3600.0, help="czas symulacji w sekundach")
+    parser.add_argument("--dt", type=float, default=DEFAULT_DT, help="krok symulacji w ms")
+    parser.add_argument("--output", "--csv", dest="output", default=None, help="plik, do którego zapisywane są koszty (domyślnie koszty.csv lub koszty.bin)")
+    parser.add_argument("--format", choices=COST_FORMATS, default="csv", help="format zapisu kosztów")
+    parser.add_argument("--vectorized", action="store_true", help="licz flotę tablicami NumPy")
+    parser.add_argument("--events", action="store_true", help="symulacja zdarzeń dyskretnych zamiast kroków co dt")
+    parser.add_argument("--failure-model", choices=("tick", "exponential"), default="tick", help="losowanie awarii w każdej klatce lub raz na spadek kondycji (w trybie --events zawsze wykładniczy)")
+    parser.add_argument("--seed", type=int, default=None, help="ziarno przebiegu; ten sam seed daje identyczny przebieg")
+    parser.add_argument("--no-csv", action="store_true", help="nie zapisuj kosztów")
+    parser.add_argument("--passengers", action="store_true", help="symuluj pasażerów (postoje zależne od wsiadających) i zapisz statystyki przystanków")
+    parser.add_argument("--passenger-output", default=None, help="plik ze statystykami przystanków (domyślnie pasazerowie.csv)")
+    parser.add_argument("--spacing", action="store_true", help="pilnuj minimalnego odstępu między pojazdami linii i wypisz statystyki odstępów (nie dla --events)")
+    parser.add_argument("--hourly-costs", nargs="?", const="", default=None, help="prowadź księgę kosztów i zapisz godzinowe koszty linii, typów pojazdów i klas kierowców (domyślnie koszty_godzinowe.csv)")
+    parser.add_argument("--checkpoint", default=None, help="plik punktu kontrolnego zapisywanego w trakcie i na końcu przebiegu")
+    parser.add_argument("--checkpoint-every", type=float, default=CHECKPOINT_INTERVAL, help="co ile sekund symulacji zapisywać punkt kontrolny")
+    parser.add_argument("--resume", default=None, help="wznów przebieg z punktu kontrolnego (tryb, scenariusz i opcje modeli są zapisane w nim)")
+    parser.add_argument("--shards", type=int, default=None, help="licz grupy linii w osobnych procesach (0 - tyle procesów, ile rdzeni); nie dla --events, --passengers, --spacing i punktów kontrolnych")
+    parser.add_argument("--shard-window", type=float, default=SHARD_WINDOW, help="co ile sekund symulacji procesy są synchronizowane")
+    parser.add_argument("--profile", nargs="?", const="", default=None, help="mierz czas faz kroku, wypisz podsumowanie i zapisz profil ze śladem do otwarcia w chrome://tracing lub Perfetto (domyślnie profil.json)")
+    parser.add_argument("--depot-bays", type=int, default=None, help="naprawy w zajezdni o tylu stanowiskach: kolejka po awarii, przeglądy i statystyki obciążenia (nie dla --events i --shards)")
+    parser.add_argument("--depot-priority", choices=DEPOT_PRIORITIES, default="line", help="kolejność w kolejce do stanowisk: ważniejsze (liczniejsze) linie najpierw albo kolejność przyjazdu")
+    parser.add_argument("--service-condition", type=int, default=SERVICE_CONDITION, help="kieruj na przegląd pojazdy o tej lub niższej kondycji (0 - wyłączone)")
+    parser.add_argument("--service-hours", type=float, default=SERVICE_HOURS, help="kieruj na przegląd co tyle godzin jazdy (0 - wyłączone)")
+    parser.add_argument("--telemetry", default=None, metavar="ADRES", help="udostępniaj stan pojazdów i kosztów jako wiersze JSON (host:port, port lub unix:ścieżka)")
+    parser.add_argument("--telemetry-rate", type=float, default=TELEMETRY_RATE, help="ile razy na sekundę (czasu rzeczywistego) wysyłać stan floty")
+    args = parser.parse_args(argv)
+    if args.failure_model == "exponential" and args.vectorized:
+        parser.error("--failure-model exponential nie działa z --vectorized (tablice floty losują awarie w każdym kroku)")
+    if args.spacing and args.events:
+        parser.error("--spacing działa tylko z symulacją krokową")
+    if args.shards is not None and (args.events or args.passengers or args.spacing or args.checkpoint or args.resume):
+        parser.error("--shards działa tylko z symulacją krokową, bez pasażerów, odstępów i punktów kontrolnych")
+    if args.depot_bays is not None and (args.events or args.shards is not None):
+        parser.error("--depot-bays działa tylko z symulacją krokową w jednym procesie")
+
+    if args.resume:
+        simulation = load_checkpoint(args.resume)
+        seed = "z punktu kontrolnego"
+    else:
+        streams = RandomStreams(args.seed)
+        seed = streams.seed
+        scenario = load_scenario(args.scenario)
+        routes, vehicles = scenario.build(rng=streams.generator("drivers"))
+        passengers = PassengerDemand(routes, vehicles, scenario.passenger_rates(), streams.generator("passengers")) if args.passengers else None
+        ledger = CostLedger(vehicles) if args.hourly_costs is not None else None
+        maintenance_class = ExponentialMaintenance if args.failure_model == "exponential" else Maintenance
+        maintenance = maintenance_class(rng=streams.buffered("failures"), repair_rng=streams.buffered("repairs"))
+        if args.shards is not None:
+            simulation = ShardedSimulation(routes, vehicles, args.shards or None, streams.seed, args.dt, args.vectorized, maintenance_class, window=args.shard_window, ledger=ledger)
+        elif args.events:
+            simulation = EventSimulation(routes, vehicles, maintenance, reference_dt=args.dt, passengers=passengers, ledger=ledger)
+        else:
+            spacing = SpacingIndex(routes, vehicles) if args.spacing else None
+            depot = Depot(vehicles, args.depot_bays, args.depot_priority, service_condition=args.service_condition, service_hours=args.service_hours) if args.depot_bays is not None else None
+            simulation = Simulation(routes, vehicles, maintenance, dt=args.dt, vectorized=args.vectorized, passengers=passengers, spacing=spacing, ledger=ledger, depot=depot)
+    events = isinstance(simulation, EventSimulation)
+    profiler = PhaseProfiler(trace=True) if args.profile is not None else None
+    simulation.profiler = profiler # po wznowieniu nowy profiler albo żaden, nie ten z punktu kontrolnego
+    passengers, ledger, spacing, depot = simulation.passengers, simulation.ledger, getattr(simulation, "spacing", None), getattr(simulation, "depot", None)
+
+    exporter = None if args.no_csv else CostExporter(args.output, format=args.format)
+    if exporter is not None:
+        exporter.last_write_time = int(simulation.current_time // exporter.interval * exporter.interval) # po wznowieniu bez powtórnego zapisu ostatniej chwili
+    checkpointer = Checkpointer(args.checkpoint, args.checkpoint_every) if args.checkpoint else None
+    telemetry = TelemetryServer(rate=args.telemetry_rate, **parse_address(args.telemetry)) if args.telemetry else None
+    if telemetry is not None:
+        print(f"Telemetria: {telemetry.address}")
+
+    start = time.perf_counter()
+    callbacks = [exporter, checkpointer]
+    if profiler is not None and any(callbacks):
+        callbacks.append(lambda simulation: profiler.lap("zapis")) # koszty i punkty kontrolne po kroku
+    callbacks.append(telemetry) # po zapisie, żeby czas wysyłania nie liczył się do fazy zapisu
+    simulation.run(args.until, chain(callbacks))
+    if telemetry is not None:
+        telemetry.publish(simulation) # stan końcowy
+        telemetry.close()
+    if exporter is not None:
+        exporter.close()
+    if checkpointer is not None:
+        checkpointer.save(simulation)
+        checkpointer.close()
+    if isinstance(simulation, ShardedSimulation):
+        simulation.close()
+    elapsed = time.perf_counter() - start
+    if passengers is not None:
+        rows = passengers.statistics(simulation.current_time)
+        write_passenger_statistics(rows, args.passenger_output)
+        boarded = sum(row['wsiedli'] for row in rows)
+        wait = sum(row['śr_oczekiwanie_s'] * row['wsiedli'] for row in rows) / boarded if boarded else 0.0
+        print(f"Pasażerowie: {boarded} przejazdów, średnie oczekiwanie {wait:.0f} s")
+
+    if ledger is not None:
+        write_hourly_costs(ledger.hourly_rows(), args.hourly_costs or None) # po wznowieniu bez --hourly-costs do domyślnego pliku
+        print(f"Koszt floty: {ledger.total('flota')['suma']:.2f} zł")
+
+    if spacing is not None:
+        for row in spacing.statistics():
+            print(f"{row['linia']}: średni odstęp {row['śr_odstęp_m']:.0f} m, min {row['min_odstęp_m']:.0f} m, skupienie {row['skupienie_udział']:.0%} czasu")
+
+    if depot is not None:
+        stats = depot.statistics()
+        print(f"Zajezdnia (stanowiska: {stats['stanowiska']}): {stats['naprawy']} napraw, {stats['przeglądy']} przeglądów ({stats['przepustowość_h']:.0f}/h), "
+              f"wykorzystanie {stats['wykorzystanie']:.0%}, kolejka śr. {stats['śr_kolejka']:.1f} / maks. {stats['maks_kolejka']}, "
+              f"oczekiwanie śr. {stats['śr_oczekiwanie_s']:.0f} s / p95 {stats['p95_oczekiwanie_s']:.0f} s, przestój po awarii śr. {stats['śr_przestój_s']:.0f} s")
+
+    if profiler is not None:
+        print(profiler.report())
+        profiler.write(args.profile or None)
+
+    work = f"{simulation.events_processed} zdarzeń" if events else f"{simulation.steps} kroków"
+    if isinstance(simulation, ShardedSimulation):
+        work += f" w {len(simulation.groups)} procesach"
+    print(f"Zasymulowano {simulation.current_time:.0f} s ({work}) w {elapsed:.2f} s, seed {seed}")
+    return simulation
+
+if __name__ == "__main__":
+    main()
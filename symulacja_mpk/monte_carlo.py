@@ -0,0 +1,117 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from symulacja_mpk.core.fleet import create_default_routes, create_fleet
+from symulacja_mpk.core.scenario import CompiledScenario, load_scenario
+from symulacja_mpk.core.maintenance import Maintenance
+from symulacja_mpk.core.simulation import Simulation
+from symulacja_mpk.core.events import EventSimulation
+from symulacja_mpk.utils.random_streams import RandomStreams
+from symulacja_mpk.utils.checkpoint import load_checkpoint, read_checkpoint, reseed
+
+MODES = ("events", "steps", "vectorized")
+PERCENTILES = (5, 50, 95)
+CONFIDENCE_Z = 1.96 # 95% przedział ufności dla średniej (przybliżenie normalne)
+
+def route_name(route) -> str: # nazwa linii do raportu: pierwszy i ostatni przystanek
+    stops = route.get_stops()
+    return f"{stops[0]} - {stops[-1]}"
+
+def run_replication(streams: RandomStreams, until: float, mode: str = "events", scenario: Optional[CompiledScenario] = None, checkpoint: Optional[bytes] = None) -> Dict[str, Dict[str, float]]: # Jedna niezależna replikacja symulacji z własnymi strumieniami liczb losowych. Zwraca sumy kosztów według pojazdu, linii, typu kierowcy oraz całej floty; scenario - skompilowany scenariusz (domyślnie trasy z create_default_routes), checkpoint - punkt kontrolny (np. po rozgrzewce), od którego replikacja startuje zamiast od zera; tryb jest wtedy zapisany w nim
+    if checkpoint is not None:
+        simulation = load_checkpoint(checkpoint, restore_random=False)
+        reseed(simulation, streams)
+        simulation.run(until)
+        vehicles = simulation.vehicles
+    else:
+        if scenario is not None:
+            routes, vehicles = scenario.build(rng=streams.generator("drivers"))
+        else:
+            routes = create_default_routes()
+            vehicles = create_fleet(routes, rng=streams.generator("drivers"))
+        maintenance = Maintenance(rng=streams.buffered("failures"), repair_rng=streams.buffered("repairs"))
+        if mode == "events":
+            EventSimulation(routes, vehicles, maintenance).run(until)
+        elif mode in ("steps", "vectorized"):
+            Simulation(routes, vehicles, maintenance, vectorized=(mode == "vectorized")).run(until)
+        else:
+            raise ValueError(f"Nieznany tryb: {mode} (dostępne: {', '.join(MODES)})")
+
+    totals = {"pojazd": {}, "linia": {}, "kierowca": {}, "flota": {"flota": 0.0}}
+    for v in vehicles:
+        t = v.cost_tracker
+        total = t.salary + t.fuel_electricity_cost + t.repair_cost
+        totals["pojazd"][v.line_number] = total
+        line = route_name(v.route)
+        totals["linia"][line] = totals["linia"].get(line, 0.0) + total
+        driver_type = type(v.driver).__name__
+        totals["kierowca"][driver_type] = totals["kierowca"].get(driver_type, 0.0) + total
+        totals["flota"]["flota"] += total
+    return totals
+
+def summarize(values: List[float]) -> Dict[str, float]: # statystyki z wyników replikacji: średnia, odchylenie, percentyle i 95% przedział ufności średniej
+    data = np.asarray(values, dtype=float)
+    mean = float(data.mean())
+    std = float(data.std(ddof=1)) if len(data) > 1 else 0.0
+    half_width = CONFIDENCE_Z * std / np.sqrt(len(data))
+    summary = {"n": len(data), "mean": mean, "std": std, "ci_low": mean - half_width, "ci_high": mean + half_width}
+    for p, value in zip(PERCENTILES, np.percentile(data, PERCENTILES)):
+        summary[f"p{p}"] = float(value)
+    return summary
+
+class MonteCarloResult: # wyniki wszystkich replikacji i ich podsumowanie w grupach (pojazd, linia, kierowca, flota)
+    def __init__(self, replications: List[Dict[str, Dict[str, float]]]):
+        self.replications = replications
+        self.summary = {}
+        for group in ("pojazd", "linia", "kierowca", "flota"):
+            keys = sorted({key for r in replications for key in r[group]})
+            # w replikacji może nie być kierowcy danego typu - wtedy jego koszt wynosi 0
+            self.summary[group] = {key: summarize([r[group].get(key, 0.0) for r in replications]) for key in keys}
+
+    def report(self) -> str: # tabela tekstowa z podsumowaniem
+        lines = []
+        for group, rows in self.summary.items():
+            lines.append(f"[{group}]")
+            lines.append(f"{'':>40} {'średnia':>12} {'p5':>12} {'p50':>12} {'p95':>12} {'95% CI':>27}")
+            for key, s in rows.items():
+                lines.append(f"{key:>40} {s['mean']:>12.2f} {s['p5']:>12.2f} {s['p50']:>12.2f} {s['p95']:>12.2f} {s['ci_low']:>12.2f} - {s['ci_high']:>12.2f}")
+        return "\n".join(lines)
+
+def run_monte_carlo(replications: int, until: float, seed: int = 0, workers: Optional[int] = None, mode: str = "events", scenario: Optional[CompiledScenario] = None, checkpoint: Optional[bytes] = None) -> MonteCarloResult: # uruchamia replications niezależnych replikacji na wszystkich rdzeniach (workers=None) lub w podanej liczbie procesów; workers=1 liczy w bieżącym procesie. checkpoint - bajty punktu kontrolnego (read_checkpoint), z którego startuje każda replikacja
+    streams = RandomStreams(seed).spawn(replications)
+    if workers == 1:
+        return MonteCarloResult([run_replication(s, until, mode, scenario, checkpoint) for s in streams])
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, replications // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run_replication, streams, [until] * replications, [mode] * replications, [scenario] * replications, [checkpoint] * replications, chunksize=chunksize))
+    return MonteCarloResult(results)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Symulacja Monte Carlo kosztów floty")
+    parser.add_argument("-n", "--replications", type=int, default=100)
+    parser.add_argument("--until", type=float, default=86400.0, help="czas jednej replikacji w sekundach")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--mode", choices=MODES, default="events")
+    parser.add_argument("--scenario", default=None, help="plik scenariusza .json/.toml (domyślnie scenarios/wroclaw.json)")
+    parser.add_argument("--from-checkpoint", default=None, help="punkt kontrolny (np. po rozgrzewce), z którego startują wszystkie replikacje; --until to wtedy czas końca liczony od początku przebiegu")
+    args = parser.parse_args(argv)
+
+    checkpoint = read_checkpoint(args.from_checkpoint) if args.from_checkpoint else None
+    scenario = None if checkpoint is not None else load_scenario(args.scenario)
+    start = time.perf_counter()
+    result = run_monte_carlo(args.replications, args.until, args.seed, args.workers, args.mode, scenario, checkpoint)
+    elapsed = time.perf_counter() - start
+    print(result.report())
+    print(f"{args.replications} replikacji w {elapsed:.2f} s")
+    return result
+
+if __name__ == "__main__":
+    main()
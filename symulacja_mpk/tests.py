@@ -1,8 +1,50 @@
 import unittest
 import random
+import copy
+import csv
+import json
+import subprocess
+import sys
+import os
+import socket
+import tempfile
+import time
+from unittest import mock
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # testy GUI rysują na powierzchniach w pamięci, bez okna
+
+import numpy as np
 
 from enum import Enum
 
+from symulacja_mpk.core.fleet import create_default_routes, create_fleet
+from symulacja_mpk.core.simulation import Simulation, DEFAULT_DT
+from symulacja_mpk.core.maintenance import Maintenance as RealMaintenance, ExponentialMaintenance
+from symulacja_mpk.core.events import EventSimulation
+from symulacja_mpk.monte_carlo import run_monte_carlo
+from symulacja_mpk.core import scenario as scenario_module
+from symulacja_mpk.core.drivers import CarefulDriver, NormalDriver
+from symulacja_mpk.core import traffic as traffic_module
+from symulacja_mpk.core.route import Route as RealRoute
+from symulacja_mpk.core import passengers as passengers_module
+from symulacja_mpk.core.spacing import SpacingIndex, MIN_FOLLOWING_DISTANCE
+from symulacja_mpk.core.fleet_state import FleetState
+from symulacja_mpk.core import depot as depot_module
+from symulacja_mpk.core import sharded as sharded_module
+from symulacja_mpk import headless as headless_module
+from symulacja_mpk.core.vehicles import VehicleState
+from symulacja_mpk.utils.cost_ledger import CostLedger
+from symulacja_mpk.utils import checkpoint as checkpoint_module
+from symulacja_mpk.benchmarks import suite as benchmark_suite
+from symulacja_mpk.benchmarks import memory as memory_benchmark
+from symulacja_mpk.utils.profiling import PhaseProfiler
+from symulacja_mpk.utils import telemetry as telemetry_module
+from symulacja_mpk.gui import display
+from symulacja_mpk.gui.sprites import set_vehicle_images
+from symulacja_mpk.utils.constants import GREEN, TRACK_LEFT_BOUND, TRACK_RIGHT_LIMIT
+from symulacja_mpk.utils.random_streams import RandomStreams, BufferedRandom
+from symulacja_mpk.utils.cost_export import CsvCostSink, CostExporter, BinaryCostSink, load_binary_costs
+
 # Mockowane komponenty z oryginalnego kodu-komentarze w poszczególnych klasach
 
 class TimePeriod(Enum):
@@ -177,5 +219,1109 @@ class TestVehicleOperations(unittest.TestCase): # sprawdzanie, czy koszt operacy
         self.assertLessEqual(bus.wait_timer, 0) # czy postój się zakończył?
 
 
+class TestSimulation(unittest.TestCase): # testy silnika symulacji działającego bez GUI
+
+    def test_step_advances_time(self): # krok o zadanej długości przesuwa czas symulacji
+        routes = create_default_routes()
+        simulation = Simulation(routes, create_fleet(routes))
+        simulation.step(500)
+        simulation.step(500)
+        self.assertAlmostEqual(simulation.current_time, 1.0)
+        self.assertEqual(simulation.steps, 2)
+
+    def test_run_until(self): # run wykonuje kroki do zadanego czasu i wywołuje on_step po każdym kroku
+        random.seed(1)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        simulation = Simulation(routes, vehicles, dt=100)
+        calls = []
+        simulation.run(until=60, on_step=lambda sim: calls.append(sim.current_time))
+
+        self.assertGreaterEqual(simulation.current_time, 60)
+        self.assertEqual(len(calls), simulation.steps)
+        self.assertTrue(all(v.active for v in vehicles)) # wszystkie pojazdy wyjechały (aktywacja do 30 s)
+        self.assertTrue(all(v.cost_tracker.salary > 0 for v in vehicles))
+
+    def test_distance_independent_of_dt(self): # ten sam czas symulacji daje tę samą drogę przy każdym kroku (przesunięcie proporcjonalne do dt)
+        routes = create_default_routes()
+        bus = create_fleet(routes, rng=random.Random(1))[0]
+        bus.active, bus.next_stop_index = True, len(bus.stop_positions) # bez przystanków po drodze
+        start = bus.x
+        for _ in range(6):
+            bus.update(DEFAULT_DT, 1.0, 1.0)
+        short_steps = bus.x - start
+        bus.x = start
+        bus.update(6 * DEFAULT_DT, 1.0, 1.0)
+        self.assertAlmostEqual(bus.x - start, short_steps)
+
+        fuel = []
+        for dt, vectorized in ((DEFAULT_DT, False), (100, False), (100, True)):
+            routes = create_default_routes()
+            vehicles = create_fleet(routes, rng=random.Random(1))
+            Simulation(routes, vehicles, RealMaintenance(0.0, random.Random(2)), dt=dt, vectorized=vectorized).run(60)
+            fuel.append(sum(v.cost_tracker.fuel_electricity_cost for v in vehicles))
+        self.assertAlmostEqual(fuel[1] / fuel[0], 1.0, delta=0.01) # różnica tylko z dyskretyzacji postojów na przystankach
+        self.assertEqual(fuel[1], fuel[2])
+
+
+class TestFleetState(unittest.TestCase): # wektorowa flota musi dawać te same wyniki co pętla po obiektach
+
+    def test_matches_per_object_update(self): # ta sama sekwencja liczb losowych -> identyczny stan po wielu krokach, również z awariami
+        self.assert_modes_agree(lambda: RealMaintenance(0.2, np.random.default_rng(1), np.random.default_rng(2)))
+
+    def test_matches_with_shared_stream(self): # domyślnie czasy awarii i naprawy są losowane z tego samego generatora co awarie - tablice zużywają liczby w kolejności pętli po obiektach
+        self.assert_modes_agree(lambda: RealMaintenance(0.2, np.random.default_rng(1)))
+
+    def test_random_module_source_is_reproducible(self): # Maintenance z modułem random: generator tablic dostaje ziarno z random, więc random.seed() powtarza przebieg
+        runs = []
+        for _ in range(2):
+            random.seed(4)
+            routes = create_default_routes()
+            vehicles = create_fleet(routes)
+            Simulation(routes, vehicles, RealMaintenance(0.2), dt=50, vectorized=True).run(until=300)
+            runs.append([(v.x, v.condition, v.repair_duration) for v in vehicles])
+        self.assertEqual(runs[0], runs[1])
+        self.assertTrue(any(repair > 0 for _, _, repair in runs[0]))
+
+    def test_breakdown_duration_upper_bound(self): # uniform(5, 31) może zwrócić dokładnie 31 - czas awarii nadal wynosi najwyżej 30 s w obu trybach
+        class UpperBound: # zawsze górna granica przedziału
+            def uniform(self, low, high, size=None):
+                return high if size is None else np.broadcast_to(np.asarray(high, dtype=float), size)
+
+        random.seed(5)
+        vehicles = create_fleet(create_default_routes())
+        for v in vehicles:
+            v.condition = 1
+        fleet = FleetState(vehicles, 1000.0, np.random.default_rng(1), UpperBound())
+        fleet.check_failures(50)
+        self.assertEqual(set(fleet.breakdown_duration.tolist()), {30.0})
+        maintenance = RealMaintenance(1000.0, np.random.default_rng(1), UpperBound())
+        for v in vehicles:
+            maintenance.check_failure(v, 50)
+        self.assertEqual({v.breakdown_duration for v in vehicles}, {30})
+
+    def assert_modes_agree(self, maintenance):
+        random.seed(3)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        copies = copy.deepcopy(vehicles)
+
+        reference = Simulation(routes, vehicles, maintenance(), dt=50)
+        vectorized = Simulation(routes, copies, maintenance(), dt=50, vectorized=True)
+        reference.run(until=300)
+        vectorized.run(until=300)
+
+        attributes = ["x", "direction", "condition", "state", "hours_driven", "time_broken", "breakdown_duration",
+                      "repair_duration", "wait_timer", "active", "next_stop_index", "stop_positions"]
+        for a, b in zip(vehicles, copies):
+            for attribute in attributes:
+                self.assertEqual(getattr(a, attribute), getattr(b, attribute), f"{a.line_number}.{attribute}")
+            for attribute in ["salary", "fuel_electricity_cost", "repair_cost", "last_x"]:
+                self.assertEqual(getattr(a.cost_tracker, attribute), getattr(b.cost_tracker, attribute), f"{a.line_number}.{attribute}")
+        self.assertTrue(any(v.repair_duration > 0 for v in vehicles)) # test faktycznie obejmuje awarie
+
+
+class TestTrafficTable(unittest.TestCase): # opóźnienia zależne od pory dnia i odcinka trasy
+
+    def rush_hour_routes(self):
+        traffic = traffic_module.Traffic
+        period = traffic_module.TimePeriod
+        return [
+            RealRoute(["A", "B", "C", "D"], 12, traffic(2, period.MIDDAY, {period.MORNING: 8, period.AFTERNOON: 6}, [1.0, 2.0, 0.5])),
+            RealRoute(["E", "F", "G", "H"], 10, traffic(3, period.MIDDAY, {period.MORNING: 1, period.EVENING: 9})),
+        ]
+
+    def test_delay_by_time_of_day(self): # czas 0 to 6:00 (rano); po 4 h południe, po 12 h wieczór, a noc należy do wieczoru
+        route = self.rush_hour_routes()[0]
+        self.assertEqual(route.get_delay_factor(), 1.2) # pora dnia trasy, jak dotąd
+        self.assertEqual(route.get_delay_factor(0.0), 1.8)
+        self.assertEqual(route.get_delay_factor(0.0, segment=1), 1 + 8 * 2.0 / 10)
+        self.assertEqual(route.get_delay_factor(4 * 3600 - 1), 1.8)
+        self.assertEqual(route.get_delay_factor(4 * 3600), 1.2)
+        self.assertEqual(route.get_delay_factor(8 * 3600), 1.6)
+        self.assertEqual(route.get_delay_factor(20 * 3600), 1.2) # 2:00 w nocy - natężenie domyślne
+        self.assertIs(route.delay_table[0], route.delay_table[1]) # wiersze tablicy wskazują na wspólne listy dla pory dnia
+        self.assertEqual(traffic_module.next_period_change(0.0), 4 * 3600)
+        self.assertEqual(traffic_module.next_period_change(13 * 3600), 24 * 3600)
+
+    def test_vectorized_matches_objects_across_rush_hour(self): # zmiana pory dnia i różne odcinki dają ten sam wynik w obu trybach
+        random.seed(6)
+        routes = self.rush_hour_routes()
+        vehicles = create_fleet(routes)
+        copies = copy.deepcopy(vehicles)
+        reference = Simulation(routes, vehicles, RealMaintenance(0.0), dt=50)
+        vectorized = Simulation(routes, copies, RealMaintenance(0.0), dt=50, vectorized=True)
+        for simulation in (reference, vectorized):
+            simulation.current_time = 4 * 3600 - 60
+            simulation.run(until=4 * 3600 + 60)
+        self.assertEqual([v.x for v in vehicles], [v.x for v in copies])
+        self.assertEqual([v.cost_tracker.fuel_electricity_cost for v in vehicles], [v.cost_tracker.fuel_electricity_cost for v in copies])
+
+    def test_events_follow_rush_hour(self): # symulacja zdarzeń przelicza ruch przy zmianie pory dnia
+        random.seed(7)
+        routes = self.rush_hour_routes()
+        vehicles = create_fleet(routes)
+        copies = copy.deepcopy(vehicles)
+        with mock.patch.object(traffic_module, "SIMULATION_START_HOUR", 10 - 1 / 60): # start minutę przed końcem porannego szczytu
+            Simulation(routes, vehicles, RealMaintenance(0.0)).run(until=180)
+            events = EventSimulation(routes, copies, RealMaintenance(0.0))
+            events.run(until=180)
+        for a, b in zip(vehicles, copies):
+            self.assertEqual(a.direction, b.direction)
+            self.assertAlmostEqual(a.x, b.x, delta=25)
+
+
+class TestRouteIndex(unittest.TestCase): # odległości przystanków w metrach, rzut na ekran i wyszukiwanie przystanków
+
+    def test_projection_and_queries(self): # trasa z 500 nierównymi przystankami; zapytania bisect zgadzają się z przeszukaniem liniowym
+        rng = random.Random(8)
+        distances = [0.0]
+        for _ in range(499):
+            distances.append(distances[-1] + rng.uniform(50, 900))
+        route = RealRoute([f"P{i}" for i in range(500)], distances[-1] / 1000, traffic_module.Traffic(2, traffic_module.TimePeriod.MORNING), distances)
+        positions = route.get_stop_positions()
+        self.assertEqual((positions[0], route.get_stop_distances()[-1]), (50, distances[-1]))
+        self.assertEqual(list(positions), sorted(positions))
+        self.assertAlmostEqual(route.distance_at(route.project(distances[250])), distances[250], delta=distances[-1] / 500)
+
+        for _ in range(200):
+            x = rng.uniform(40, 860)
+            self.assertEqual(route.next_stop_index(x, 1), next((i for i, p in enumerate(positions) if p >= x), len(positions)))
+            self.assertEqual(route.next_stop_index(x, -1), max((i for i, p in enumerate(positions) if p <= x), default=-1))
+            self.assertEqual(route.segment_index(x), min(max(sum(p <= x for p in positions) - 1, 0), len(positions) - 2))
+
+    def test_reversal_keeps_shared_stops(self): # na pętli pojazd nie kopiuje listy przystanków, tylko wyznacza indeks następnego
+        random.seed(9)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        Simulation(routes, vehicles, RealMaintenance(0.0)).run(until=200)
+        self.assertTrue(any(v.direction == -1 for v in vehicles))
+        for v in vehicles:
+            self.assertIs(v.stop_positions, v.route.get_stop_positions())
+        self.assertEqual(routes[0].get_stop_positions(), (50, 316, 582, 848)) # równe odstępy jak dotąd
+
+    def test_index_after_turnaround(self): # po zawróceniu następnym przystankiem jest najbliższy w nowym kierunku, czyli ten przy pętli - jak dawniej pierwszy z odwróconej listy; indeks liczony jest jednak w kolejności trasy
+        vehicle = create_fleet(create_default_routes()[:1])[0]
+        stops = vehicle.stop_positions
+        vehicle.active, vehicle.direction, vehicle.x, vehicle.next_stop_index = True, 1, TRACK_RIGHT_LIMIT - 0.1, len(stops)
+        vehicle.update(DEFAULT_DT, 1.0, 0.0)
+        self.assertEqual((vehicle.direction, vehicle.x), (-1, TRACK_RIGHT_LIMIT))
+        self.assertEqual(vehicle.next_stop_index, len(stops) - 1)
+        while vehicle.next_stop_index == len(stops) - 1:
+            vehicle.update(DEFAULT_DT, 1.0, 0.0)
+        self.assertEqual((vehicle.x, vehicle.next_stop_index), (stops[-1], len(stops) - 2)) # przystanki z powrotem w malejącej kolejności indeksów
+
+        vehicle.wait_timer, vehicle.x, vehicle.next_stop_index = 0.0, TRACK_LEFT_BOUND + 0.1, -1
+        vehicle.update(DEFAULT_DT, 1.0, 0.0)
+        self.assertEqual(vehicle.direction, 1)
+        self.assertEqual((vehicle.x, vehicle.next_stop_index, vehicle.wait_timer), (stops[0], 1, 5.0)) # pierwszy przystanek leży na pętli, więc jest obsłużony od razu
+
+
+class TestPassengers(unittest.TestCase): # pasażerowie jako liczniki w kolejkach przystanków
+
+    def test_vectorized_matches_objects(self): # ten sam model pasażerów w obu trybach daje te same postoje i statystyki; nikt nie ginie ani się nie pojawia
+        random.seed(10)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        copied_routes, copies = copy.deepcopy((routes, vehicles))
+        rates = [[900.0] * 4 for _ in routes]
+        demand = passengers_module.PassengerDemand(routes, vehicles, rates, np.random.default_rng(3))
+        vectorized_demand = passengers_module.PassengerDemand(copied_routes, copies, rates, np.random.default_rng(3))
+        Simulation(routes, vehicles, RealMaintenance(0.0), dt=50, passengers=demand).run(until=400)
+        Simulation(copied_routes, copies, RealMaintenance(0.0), dt=50, vectorized=True, passengers=vectorized_demand).run(until=400)
+
+        self.assertEqual([v.x for v in vehicles], [v.x for v in copies])
+        self.assertEqual(demand.statistics(400), vectorized_demand.statistics(400))
+        self.assertEqual(demand.arrived, [b + w for b, w in zip(demand.boarded, demand.waiting)])
+        self.assertEqual(sum(demand.boarded), sum(demand.alighted) + sum(demand.load))
+        self.assertGreater(sum(demand.boarded), 100)
+
+    def test_capacity_and_dwell(self): # pełny pojazd zostawia pasażerów na przystanku, a postój rośnie z liczbą wsiadających
+        routes = create_default_routes()[:1]
+        vehicles = create_fleet(routes)[:1]
+        bus = vehicles[0]
+        demand = passengers_module.PassengerDemand(routes, vehicles, [[36000.0] * 4], np.random.default_rng(4))
+        dwell = demand.serve(0, 0, 1, 60.0)
+        self.assertEqual(demand.load[0], bus.capacity)
+        self.assertEqual(dwell, passengers_module.DWELL_BASE + passengers_module.BOARDING_TIME * bus.capacity)
+        self.assertGreater(demand.left_behind[0], 0)
+        self.assertEqual(demand.waiting[1], 0) # z pierwszego przystanku nikt nie jedzie w stronę początku trasy
+
+        demand.serve(0, 3, 1, 120.0) # ostatni przystanek - wysiadają wszyscy
+        self.assertEqual(demand.load[0], 0)
+        self.assertEqual(sum(demand.alighted), bus.capacity)
+
+    def test_many_riders_use_compact_queues(self): # kilkadziesiąt tysięcy pasażerów na godzinę; w kolejkach są grupy z jednej minuty, nie osoby
+        random.seed(11)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        demand = passengers_module.PassengerDemand(routes, vehicles, [[3000.0] * 4 for _ in routes], np.random.default_rng(5))
+        EventSimulation(routes, vehicles, RealMaintenance(0.0), passengers=demand).run(until=3600)
+        demand.settle(3600)
+        self.assertGreater(sum(demand.arrived), 40000)
+        self.assertLessEqual(max(len(queue) for queue in demand._queues), 61)
+        rows = demand.statistics()
+        self.assertEqual(len(rows), 2 * 16)
+        self.assertTrue(all(row['max_obciążenie'] <= 200 for row in rows))
+
+
+class TestSpacing(unittest.TestCase): # indeks pozycji na pętli trasy, minimalny odstęp i statystyki odstępów
+
+    def _index(self, positions): # jedna trasa z pojazdami w podanych (x, kierunek)
+        routes = create_default_routes()[:1]
+        vehicles = []
+        for x, direction in positions:
+            vehicle = create_fleet(routes)[0]
+            vehicle.x, vehicle.direction, vehicle.active = x, direction, True
+            vehicles.append(vehicle)
+        return SpacingIndex(routes, vehicles), vehicles
+
+    def test_leader_queries_and_clamp(self): # kolejność na pętli: tam, potem z powrotem; pojazd za blisko poprzedzającego jest cofany
+        index, vehicles = self._index([(400, 1), (600, 1), (700, -1), (430, 1)])
+        x = np.array([v.x for v in vehicles], dtype=float)
+        direction = np.array([v.direction for v in vehicles])
+        index.update(x, direction, np.ones(4, dtype=bool))
+        self.assertEqual(index.leader(1), 2) # pojazd jadący już z powrotem jest dalej na pętli
+        self.assertEqual(index.leader(3), 1)
+        self.assertEqual(index.leader(2), 0) # czołowy goni ostatniego przez pętlę
+        self.assertEqual(index.follower(1), 3)
+        self.assertEqual(index.next_vehicle(0, 500, 1), 1)
+        self.assertEqual(index.next_vehicle(0, 500, -1), 0)
+
+        clamped = index.enforce(x, direction)
+        self.assertEqual(clamped.tolist(), [0])
+        self.assertEqual(x.tolist(), [430 - index.min_gap, 600, 700, 430])
+
+    def test_statistics_across_fleet_changes(self): # sumy zbierane między zmianami układu tras trafiają do statystyk przy odczycie i przy zjeździe pojazdu z trasy
+        index, vehicles = self._index([(400, 1), (600, 1), (700, -1)])
+        index.min_gap = 0
+        loop = index.loop_length
+        x = np.array([v.x for v in vehicles], dtype=float)
+        direction = np.array([v.direction for v in vehicles])
+        index.step(x, direction, np.ones(3, dtype=bool), 1.0)
+        index.statistics()
+        index.step(x, direction, np.array([True, False, True]), 3.0)
+        index.statistics()
+
+        self.assertEqual(index.observed_time[0], 3 * 1.0 + 2 * 3.0)
+        self.assertAlmostEqual(index.gap_sum[0], loop * 1.0 + loop * 3.0) # odstępy trasy zawsze składają się na całą pętlę
+        self.assertAlmostEqual(index.gap_min[0], min(200, loop - 1200, 1000, loop - 1000))
+        self.assertAlmostEqual(index.gap_square_sum[0], 200 ** 2 + (loop - 1200) ** 2 + 1000 ** 2 + 3 * ((loop - 1000) ** 2 + 1000 ** 2))
+
+    def test_clamped_at_stop(self): # pojazd dojeżdżający do przystanku tuż za stojącym poprzedzającym czeka przed przystankiem: nie cofa się, nie traci przystanku, a koszt to tylko przejechana droga
+        for vectorized in (False, True):
+            stops = create_default_routes()[0].get_stop_positions()
+            stop = len(stops) // 2
+            index, vehicles = self._index([(stops[stop] - 20, 1), (stops[stop] + MIN_FOLLOWING_DISTANCE - 5, 1)])
+            follower, leader = vehicles
+            follower.next_stop_index = stop
+            leader.wait_timer = 1e9 # poprzedzający stoi
+            for v in vehicles:
+                v.cost_tracker.last_x = v.x
+            simulation = Simulation(index.routes, vehicles, RealMaintenance(0.0), dt=1000, vectorized=vectorized, spacing=index) # w jednym kroku pojazd dojeżdża do przystanku
+
+            previous = follower.x
+            for _ in range(20):
+                simulation.step()
+                simulation.sync_vehicles()
+                self.assertGreaterEqual(follower.x, previous)
+                previous = follower.x
+            self.assertAlmostEqual(follower.x, stops[stop] - 5)
+            self.assertEqual(follower.next_stop_index, stop)
+            self.assertEqual(follower.wait_timer, 0.0)
+            tracker = follower.cost_tracker
+            self.assertAlmostEqual(tracker.fuel_electricity_cost, tracker.consumption_per_km * 15 / 1000.0)
+
+    def test_modes_agree_and_keep_distance(self): # ten sam przebieg w pętli po obiektach i w trybie wektorowym; pojazdy jednej linii nie zbliżają się na mniej niż min_gap
+        random.seed(12)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        copied_routes, copies = copy.deepcopy((routes, vehicles))
+        spacing = SpacingIndex(routes, vehicles)
+        vectorized_spacing = SpacingIndex(copied_routes, copies)
+        Simulation(routes, vehicles, RealMaintenance(0.0), dt=50, spacing=spacing).run(until=900)
+        Simulation(copied_routes, copies, RealMaintenance(0.0), dt=50, vectorized=True, spacing=vectorized_spacing).run(until=900)
+
+        self.assertEqual([v.x for v in vehicles], [v.x for v in copies])
+        self.assertEqual(spacing.statistics(), vectorized_spacing.statistics())
+        self.assertTrue(all(row['min_odstęp_m'] > 0 for row in spacing.statistics()))
+        _, gaps = spacing.gaps(np.array([v.x for v in vehicles]), np.array([v.direction for v in vehicles]))
+        self.assertGreaterEqual(gaps.min(), spacing.min_gap - 1e-9)
+
+
+class TestCostLedger(unittest.TestCase): # sumy kosztów grup liczone na bieżąco i zestawienia w oknach czasu
+
+    def _run(self, vectorized=False, events=False):
+        random.seed(13)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        ledger = CostLedger(vehicles, window=60.0)
+        streams = RandomStreams(13)
+        maintenance = RealMaintenance(0.2, streams.buffered("failures"), streams.buffered("repairs"))
+        if events:
+            EventSimulation(routes, vehicles, maintenance, ledger=ledger).run(until=200)
+        else:
+            simulation = Simulation(routes, vehicles, maintenance, dt=50, vectorized=vectorized, ledger=ledger)
+            simulation.run(until=200)
+        return ledger, vehicles
+
+    def test_group_totals_follow_trackers(self): # flota = suma pojazdów = suma linii; okna sumują się do całości
+        for options in ({}, {'events': True}):
+            ledger, vehicles = self._run(**options)
+            trackers = [v.cost_tracker for v in vehicles]
+            fleet = ledger.total('flota')
+            self.assertAlmostEqual(fleet['pensja'], sum(t.salary for t in trackers))
+            self.assertAlmostEqual(fleet['paliwo_energia'], sum(t.fuel_electricity_cost for t in trackers))
+            self.assertAlmostEqual(fleet['naprawy'], sum(t.repair_cost for t in trackers))
+            self.assertGreater(fleet['naprawy'], 0)
+            lines = [key for group, key in ledger.rows if group == 'linia']
+            self.assertAlmostEqual(sum(ledger.total('linia', key)['suma'] for key in lines), fleet['suma'])
+            self.assertEqual(ledger.windows_closed, 3)
+            windows = [ledger.between('flota', 'razem', k * 60.0, (k + 1) * 60.0)['suma'] for k in range(3)]
+            self.assertAlmostEqual(sum(windows) + ledger.between('flota', 'razem', 180.0)['suma'], fleet['suma'])
+            hourly = [row for row in ledger.hourly_rows() if row['grupa'] == 'flota']
+            self.assertEqual([row['suma'] for row in hourly], [round(w, 2) for w in windows])
+            vehicle_id = trackers[0].vehicle_id
+            self.assertAlmostEqual(ledger.total('pojazd', vehicle_id)['pensja'], trackers[0].salary)
+
+    def test_vectorized_matches_objects(self): # sumy z tablic FleetState (przyrosty między krokami) jak z CostTrackerów
+        ledger, _ = self._run()
+        vectorized_ledger, _ = self._run(vectorized=True)
+        for group, key in ledger.rows:
+            for name, value in ledger.total(group, key).items():
+                self.assertAlmostEqual(value, vectorized_ledger.total(group, key)[name], places=6)
+        self.assertAlmostEqual(ledger.between('typ', 'Bus', 60.0, 120.0)['suma'], vectorized_ledger.between('typ', 'Bus', 60.0, 120.0)['suma'], places=6)
+
+
+class TestCheckpoint(unittest.TestCase): # zapis i wznowienie pełnego stanu symulacji
+
+    def _simulation(self, events=False):
+        streams = RandomStreams(21)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes, rng=streams.generator("drivers"))
+        maintenance = RealMaintenance(0.3, streams.buffered("failures"), streams.buffered("repairs"))
+        passengers = passengers_module.PassengerDemand(routes, vehicles, rng=streams.generator("passengers"))
+        if events:
+            return EventSimulation(routes, vehicles, maintenance, passengers=passengers, ledger=CostLedger(vehicles, 60.0))
+        return Simulation(routes, vehicles, maintenance, dt=50, passengers=passengers, ledger=CostLedger(vehicles, 60.0))
+
+    def _state(self, simulation):
+        return ([(v.x, v.direction, v.condition, v.state, v.cost_tracker.salary, v.cost_tracker.fuel_electricity_cost, v.cost_tracker.repair_cost) for v in simulation.vehicles],
+                simulation.passengers.boarded, simulation.ledger.total('flota'))
+
+    def test_resume_is_identical(self): # przebieg przerwany po zapisie i wznowiony z pliku kończy się tak samo jak bez przerwy
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stan.bin")
+            for events in (False, True):
+                checkpointer = checkpoint_module.Checkpointer(path, interval=150.0)
+                simulation = self._simulation(events)
+                simulation.run(until=400, on_step=checkpointer)
+                checkpointer.close()
+                self.assertEqual(checkpointer.saved, 2)
+
+                resumed = checkpoint_module.load_checkpoint(path) # ostatni zapis - chwila 300 s
+                self.assertLess(abs(resumed.current_time - 300), 1)
+                self.assertIs(resumed.vehicles[0].route, resumed.routes[0]) # wspólne obiekty pozostają wspólne
+                resumed.run(until=400)
+                self.assertEqual(self._state(resumed), self._state(simulation))
+
+    def test_fork_what_if_runs(self): # kopie z jednego punktu kontrolnego: to samo ziarno - ten sam przebieg, różne ziarna - różne awarie
+        simulation = self._simulation()
+        simulation.run(until=100)
+        data = checkpoint_module.encode_checkpoint(checkpoint_module.dump_state(simulation))
+        first, second = checkpoint_module.fork_checkpoint(data, 2, seed=5)
+        again = checkpoint_module.fork_checkpoint(data, 1, seed=5)[0]
+        for fork in (first, second, again):
+            self.assertEqual(fork.current_time, simulation.current_time)
+            fork.maintenance.base_failure_chance = 2.0 # scenariusz "co jeśli": częstsze awarie
+            fork.run(until=160)
+        self.assertEqual(self._state(first), self._state(again))
+        self.assertNotEqual(self._state(first), self._state(second))
+
+
+class TestBenchmarkSuite(unittest.TestCase): # pomiary gorących ścieżek i porównanie z bazą
+
+    def test_run_and_compare(self):
+        results = benchmark_suite.run_suite(sizes=[12], names=['vehicle_update', 'cost_export_binary', 'gui_draw'], repeats=1, work=100)
+        self.assertEqual(sorted(results), ['cost_export_binary/12', 'gui_draw/12', 'vehicle_update/12'])
+        self.assertTrue(all(value > 0 for value in results.values()))
+
+        baseline = {'vehicle_update/12': 100.0, 'gui_draw/12': 100.0, 'check_failure/12': 100.0}
+        rows = benchmark_suite.compare({'vehicle_update/12': 80.0, 'gui_draw/12': 95.0}, baseline, threshold=0.1)
+        self.assertEqual([(row['benchmark'], row['ocena']) for row in rows], [('vehicle_update', 'REGRESJA'), ('gui_draw', 'OK')])
+        self.assertIn("regresje: 1 z 2", benchmark_suite.report(rows))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baza.json")
+            benchmark_suite.save_baseline(results, path)
+            self.assertEqual(benchmark_suite.load_baseline(path)['results'], results)
+
+    def test_compare_exit_codes(self): # --fail-on-regression kończy z kodem 1 przy regresji; brak bazy to błąd przed pomiarami
+        results = {'vehicle_update/12': 80.0, 'cost_update/12': 120.0}
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(benchmark_suite, 'run_suite', return_value=results) as run_suite, mock.patch('builtins.print'):
+            path = os.path.join(directory, "baza.json")
+            benchmark_suite.save_baseline({'vehicle_update/12': 100.0, 'cost_update/12': 100.0}, path)
+            with self.assertRaises(SystemExit) as raised:
+                benchmark_suite.main(['--compare', path, '--fail-on-regression'])
+            self.assertEqual(raised.exception.code, 1)
+            self.assertEqual(benchmark_suite.main(['--compare', path, '--fail-on-regression', '--threshold', '0.25']), results)
+            self.assertEqual(benchmark_suite.main(['--compare', path]), results) # bez --fail-on-regression tylko raport
+            self.assertEqual(run_suite.call_count, 3)
+
+            with self.assertRaises(SystemExit) as raised, mock.patch('sys.stderr'):
+                benchmark_suite.main(['--compare', os.path.join(directory, "brak.json")])
+            self.assertEqual(raised.exception.code, 2)
+            self.assertEqual(run_suite.call_count, 3)
+
+
+class TestProfiling(unittest.TestCase): # czasy faz kroku, percentyle i plik śladu
+
+    def _run(self, profiler, vectorized=False):
+        streams = RandomStreams(21)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes, rng=streams.generator("drivers"))
+        simulation = Simulation(routes, vehicles, RealMaintenance(0.5, streams.buffered("failures"), streams.buffered("repairs")), dt=100, vectorized=vectorized, profiler=profiler)
+        simulation.run(200)
+        return simulation.steps, [(v.x, v.condition, v.cost_tracker.fuel_electricity_cost, v.cost_tracker.repair_cost) for v in vehicles]
+
+    def test_phases_do_not_change_results(self):
+        for vectorized in (False, True):
+            profiler = PhaseProfiler()
+            steps, result = self._run(profiler, vectorized)
+            self.assertEqual(result, self._run(None, vectorized)[1])
+            self.assertEqual(profiler.count, {"awarie": steps, "ruch": steps, "koszty": steps})
+
+    def test_percentiles_and_trace(self):
+        profiler = PhaseProfiler(window=4, trace=True, trace_limit=3)
+        for duration in [0.001, 0.002, 0.003, 0.004, 0.005]:
+            profiler.record("faza", 0.0, duration)
+        self.assertEqual(profiler.percentiles("faza", (0, 100)), {0: 2.0, 100: 5.0}) # tylko ostatnie 4 pomiary, w ms
+        row = profiler.summary()[0]
+        self.assertEqual((row['pomiary'], row['suma_ms'], row['udział']), (5, 15.0, 1.0))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profil.json")
+            profiler.write(path)
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        self.assertEqual([event['dur'] for event in data['traceEvents']], [3000.0, 4000.0, 5000.0])
+        self.assertEqual(data['fazy'][0]['faza'], "faza")
+
+    def test_overlay_matches_full_redraw(self): # nakładka rysowana przyrostowo daje ten sam obraz co w pełnej klatce
+        pygame = display.pygame
+        set_vehicle_images(pygame.Surface((60, 30), pygame.SRCALPHA), pygame.Surface((60, 30), pygame.SRCALPHA))
+        routes = create_default_routes()
+        y_base = [100, 200, 300, 400]
+        vehicles = create_fleet(routes, y_base, rng=random.Random(3))
+        simulation = Simulation(routes, vehicles, RealMaintenance(0.5, random.Random(4)), dt=100)
+        profiler = PhaseProfiler()
+        profiler.record("ruch", 0.0, 0.001)
+        renderer = display.DirtyRectRenderer(GREEN)
+        renderer.overlay = display.ProfileOverlay(profiler)
+        screen = pygame.Surface((1000, 600))
+        for _ in range(100):
+            simulation.step()
+            dirty = renderer.render(screen, routes, y_base, vehicles)
+        self.assertFalse(renderer.last_frame_full)
+        self.assertIn(renderer._overlay_rect, dirty)
+        expected = screen.copy()
+        renderer.invalidate()
+        renderer.render(expected, routes, y_base, vehicles)
+        self.assertEqual(pygame.image.tobytes(screen, "RGB"), pygame.image.tobytes(expected, "RGB"))
+
+
+class TestCompactVehicles(unittest.TestCase): # pojazdy, kierowcy i CostTrackery bez __dict__
+
+    def test_slots_and_cached_multipliers(self):
+        v = create_fleet(create_default_routes(), rng=random.Random(2))[0]
+        for obj in (v, v.driver, v.cost_tracker):
+            self.assertFalse(hasattr(obj, "__dict__"))
+        with self.assertRaises(AttributeError):
+            v.colour = "red" # literówka w nazwie atrybutu nie tworzy nowego pola
+        driver = CarefulDriver("Kowalski", 3000)
+        self.assertEqual((driver.speed_multiplier, driver.failure_risk_multiplier), (driver.get_speed_multiplier(), driver.get_failure_risk_multiplier()))
+
+    def test_state_enum(self):
+        v = create_fleet(create_default_routes(), rng=random.Random(2))[0]
+        self.assertIs(v.state, VehicleState.GOOD)
+        self.assertEqual(v.state, "Good") # wciąż równy dawnemu napisowi
+        RealMaintenance(rng=random.Random(0)).break_down(v)
+        self.assertIs(copy.deepcopy(v).state, VehicleState.BROKEN)
+
+    def test_memory_benchmark(self):
+        self.assertLess(memory_benchmark.fleet_memory(300), 1000)
+        self.assertEqual(memory_benchmark.component_sizes()['kierowca'], sys.getsizeof(NormalDriver("x", 1)))
+
+
+class TestShardedSimulation(unittest.TestCase): # grupy linii w osobnych procesach, stan wraca przez pamięć współdzieloną
+
+    def test_partition(self):
+        routes = create_default_routes()
+        vehicles = create_fleet(routes + routes[:1], rng=random.Random(1)) # pierwsza trasa ma dwa razy więcej pojazdów
+        groups = sharded_module.partition_routes(routes, vehicles, 3)
+        self.assertEqual(sorted(j for group in groups for j in group), [0, 1, 2, 3])
+        self.assertIn([0], groups)
+
+    def test_matches_separate_simulations(self): # wynik jak przy osobnym liczeniu każdej grupy linii z jej strumieniami
+        def fleet():
+            routes = create_default_routes()
+            return routes, create_fleet(routes, rng=RandomStreams(1).generator("drivers"))
+        routes, vehicles = fleet()
+        ledger = CostLedger(vehicles)
+        windows = []
+        with sharded_module.ShardedSimulation(routes, vehicles, shards=2, seed=5, dt=100, window=2.0, ledger=ledger) as simulation:
+            simulation.run(60, on_step=lambda sim: windows.append(sim.current_time))
+            groups = simulation.groups
+        self.assertEqual(len(groups), 2)
+        self.assertEqual(len(windows), 30)
+
+        expected_routes, expected = fleet()
+        for group, streams in zip(groups, RandomStreams(5).spawn(2)):
+            members = [expected_routes[j] for j in group]
+            maintenance = RealMaintenance(rng=streams.buffered("failures"), repair_rng=streams.buffered("repairs"))
+            Simulation(members, [v for v in expected if v.route in members], maintenance, dt=100).run(60)
+        state = lambda v: (v.x, v.direction, v.condition, v.state, v.active, v.cost_tracker.salary, v.cost_tracker.fuel_electricity_cost, v.cost_tracker.repair_cost)
+        self.assertEqual([state(v) for v in vehicles], [state(v) for v in expected])
+        self.assertAlmostEqual(ledger.total('flota')['suma'], sum(v.cost_tracker.salary + v.cost_tracker.fuel_electricity_cost + v.cost_tracker.repair_cost for v in vehicles))
+
+
+class TestTelemetry(unittest.TestCase): # strumień stanu floty: pełna klatka, potem tylko zmiany; wolny klient nie spowalnia symulacji
+
+    def setUp(self):
+        routes = create_default_routes()
+        self.vehicles = create_fleet(routes, rng=random.Random(1))
+        self.simulation = Simulation(routes, self.vehicles, RealMaintenance(0.5, random.Random(2)), dt=100)
+
+    def test_delta_encoding(self):
+        frame = lambda seq: telemetry_module.TelemetryFrame(seq, self.simulation.current_time, telemetry_module.fleet_snapshot(self.simulation), list(range(len(self.vehicles))), [v.line_number for v in self.vehicles])
+        first = frame(1)
+        self.simulation.run(30)
+        last = frame(4)
+        view = telemetry_module.apply_message({}, json.loads(telemetry_module.encode_message(None, first)))
+        message = json.loads(telemetry_module.encode_message(first, last))
+        self.assertEqual(message['typ'], 'zmiany')
+        self.assertEqual(message['pominięte'], 2)
+        self.assertNotIn('kierunek', message['pola']) # w 30 s żaden pojazd nie dojechał do końca trasy
+        telemetry_module.apply_message(view, message)
+        self.assertEqual(view['pola']['x'], [round(v.x, 1) for v in self.vehicles])
+        self.assertEqual(view['pola']['pensja'], [round(v.cost_tracker.salary, 2) for v in self.vehicles])
+        self.assertEqual(view['pola']['awaria'], [int(v.state is VehicleState.BROKEN) for v in self.vehicles])
+
+    def test_stream_and_slow_client(self):
+        with telemetry_module.TelemetryServer(rate=0, drop_after=0.2) as server:
+            client = socket.create_connection(server.address)
+            slow = socket.create_connection(server.address) # nigdy nie czyta
+            slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+            deadline = time.monotonic() + 5
+            while server.clients < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            view, lines = {}, client.makefile('rb')
+            for _ in range(20):
+                self.simulation.run(self.simulation.current_time + 10)
+                server.publish(self.simulation)
+                telemetry_module.apply_message(view, json.loads(lines.readline()))
+                self.assertEqual(view['pola']['x'], [round(v.x, 1) for v in self.vehicles])
+            self.assertEqual(view['seq'], 20)
+            routes = create_default_routes() * 300 # duża flota - zmiany zapełniają bufor wolnego klienta
+            large = Simulation(routes, create_fleet(routes, rng=random.Random(3)), RealMaintenance(0.5, random.Random(4)), dt=100, vectorized=True)
+            deadline = time.monotonic() + 30
+            while server.dropped_clients == 0 and time.monotonic() < deadline:
+                large.step()
+                server.publish(large)
+                lines.readline()
+            self.assertEqual(server.dropped_clients, 1)
+            self.assertEqual(server.clients, 1)
+            client.close()
+            slow.close()
+
+
+class TestDepot(unittest.TestCase): # zajezdnia ze skończoną liczbą stanowisk, kolejką priorytetową i przeglądami
+
+    def test_bays_and_priority(self):
+        vehicles = create_fleet(create_default_routes(), rng=random.Random(1))
+        depot = depot_module.Depot(vehicles, bays=1, line_priority={'Swojczyce - Krzyki': 5, 'Park Południowy - Plac Świebodzki': 1}, service_condition=0, service_hours=0)
+        maintenance = RealMaintenance(rng=random.Random(2))
+        maintenance.depot = depot
+        for v in (vehicles[3], vehicles[0], vehicles[6]): # B4, B1, T1 (linie o wagach 1, 0, 5) psują się w tej samej chwili
+            v.condition = 0
+            maintenance.break_down(v)
+            v.breakdown_duration, v.repair_duration = 5, 10.0
+        depot.step(1.0)
+        self.assertEqual((depot.queue_length, depot.busy_bays), (0, 0)) # jeszcze w drodze do zajezdni
+        depot.step(6.0)
+        self.assertEqual((depot.queue_length, depot.busy_bays), (2, 1))
+        self.assertEqual(vehicles[6].cost_tracker.repair_cost, 10.0) # T1 (najważniejsza linia) pierwsza na stanowisku
+        self.assertEqual(vehicles[3].cost_tracker.repair_cost, 0.0) # koszt dopiero od wejścia na stanowisko
+        for now in (16.0, 26.0, 36.0):
+            depot.step(now)
+        self.assertEqual([v.state for v in (vehicles[0], vehicles[3], vehicles[6])], [VehicleState.GOOD] * 3)
+        self.assertEqual(vehicles[0].condition, 10)
+        stats = depot.statistics()
+        self.assertEqual((stats['naprawy'], stats['maks_kolejka']), (3, 2))
+        self.assertEqual(stats['śr_oczekiwanie_s'], 10.0) # 0, 10 (B4), 20 (B1) s
+        self.assertEqual(stats['śr_przestój_s'], 25.0) # awaria w chwili 1, powrót po 15, 25 i 35 s
+
+    def test_default_priority_by_route(self): # bez line_priority ważniejsza jest trasa z większą liczbą pojazdów
+        routes = create_default_routes()
+        vehicles = create_fleet(routes + routes[:1], rng=random.Random(1)) # pierwsza trasa ma 6 pojazdów, pozostałe po 3
+        depot = depot_module.Depot(vehicles, bays=1, service_condition=0, service_hours=0)
+        maintenance = RealMaintenance(rng=random.Random(2))
+        maintenance.depot = depot
+        for v, arrival in ((vehicles[6], 3), (vehicles[3], 4), (vehicles[0], 5)): # T1 zajmuje stanowisko, B4 przyjeżdża przed B1
+            v.condition = 0
+            maintenance.break_down(v)
+            v.breakdown_duration, v.repair_duration = arrival, 10.0
+        for now in (0.0, 3.0, 4.0, 5.0, 13.0): # awarie w chwili 0
+            depot.step(now)
+        self.assertEqual(vehicles[0].cost_tracker.repair_cost, 10.0) # B1 z liczniejszej trasy pierwszy po zwolnieniu stanowiska
+        self.assertEqual(vehicles[3].cost_tracker.repair_cost, 0.0)
+        self.assertEqual(depot.queue_length, 1)
+
+    def test_preventive_service(self):
+        vehicles = create_fleet(create_default_routes(), rng=random.Random(1))
+        depot = depot_module.Depot(vehicles, bays=2, service_condition=3, service_hours=0, service_duration=8.0)
+        vehicles[0].active = vehicles[1].active = True
+        vehicles[0].condition, vehicles[1].condition = 3, 4
+        depot.step(0.0)
+        self.assertEqual((vehicles[0].state, vehicles[0].condition), (VehicleState.BROKEN, 0)) # zjazd na przegląd
+        self.assertIs(vehicles[1].state, VehicleState.GOOD)
+        depot.step(8.0)
+        self.assertEqual((vehicles[0].state, vehicles[0].condition), (VehicleState.GOOD, 10))
+        self.assertEqual(depot.services, 1)
+        self.assertEqual(vehicles[0].cost_tracker.repair_cost, 8.0)
+
+    def test_tick_matches_vectorized(self): # zajezdnia nie zmienia zgodności obu silników
+        results = []
+        for vectorized in (False, True):
+            streams = RandomStreams(7)
+            routes = create_default_routes() * 3
+            vehicles = create_fleet(routes, rng=streams.generator("drivers"))
+            depot = depot_module.Depot(vehicles, bays=2)
+            maintenance = RealMaintenance(rng=streams.buffered("failures"), repair_rng=streams.buffered("repairs"))
+            Simulation(routes, vehicles, maintenance, dt=100, vectorized=vectorized, depot=depot).run(600)
+            results.append(([(v.x, v.condition, v.state, v.cost_tracker.repair_cost) for v in vehicles], depot.statistics()))
+        self.assertEqual(results[0], results[1])
+        self.assertGreater(results[0][1]['maks_kolejka'], 0) # dwa stanowiska na 36 pojazdów - kolejka faktycznie powstaje
+        self.assertGreater(results[0][1]['przeglądy'], 0)
+
+
+class TestHeadlessImports(unittest.TestCase): # model, koszty i tryb bez okna nie potrzebują pygame
+
+    def test_core_without_pygame(self):
+        code = ("import sys; sys.modules['pygame'] = None\n" # import pygame kończy się błędem
+                "import symulacja_mpk.headless, symulacja_mpk.monte_carlo, symulacja_mpk.core.events, symulacja_mpk.utils.cost_tracker\n"
+                "symulacja_mpk.headless.main(['--until', '5', '--no-csv', '--seed', '1'])")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("Zasymulowano 5 s", result.stdout)
+
+
+class TestRandomStreams(unittest.TestCase): # powtarzalne strumienie liczb losowych dla komponentów
+
+    def test_same_seed_replays_run(self): # ten sam seed -> identyczna flota i identyczny przebieg, niezależnie od globalnego modułu random
+        results = []
+        for global_seed in (1, 2):
+            random.seed(global_seed)
+            streams = RandomStreams(42)
+            routes = create_default_routes()
+            vehicles = create_fleet(routes, rng=streams.generator("drivers"))
+            maintenance = RealMaintenance(0.2, streams.buffered("failures"), streams.buffered("repairs"))
+            Simulation(routes, vehicles, maintenance, dt=50).run(until=120)
+            results.append([(v.driver.name, v.x, v.condition, v.cost_tracker.repair_cost) for v in vehicles])
+        self.assertEqual(results[0], results[1])
+
+    def test_components_are_independent(self): # strumień komponentu zależy tylko od nazwy, a replikacje dostają różne strumienie
+        streams = RandomStreams(5)
+        self.assertEqual(streams.generator("failures").random(3).tolist(), RandomStreams(5).generator("failures").random(3).tolist())
+        self.assertNotEqual(streams.generator("failures").random(), streams.generator("repairs").random())
+        first, second = streams.spawn(2)
+        self.assertNotEqual(first.generator("failures").random(), second.generator("failures").random())
+
+    def test_buffered_matches_generator(self): # losowanie blokami daje ten sam ciąg co generator, także przy mieszaniu pojedynczych liczb i tablic
+        expected = np.random.default_rng(9).random(30).tolist()
+        buffered = BufferedRandom(np.random.default_rng(9), block_size=4)
+        values = [buffered.random(), buffered.random()] + buffered.random(7).tolist() + [buffered.random() for _ in range(5)] + buffered.random((4, 4)).ravel().tolist()
+        self.assertEqual(values, expected)
+
+
+class TestExponentialMaintenance(unittest.TestCase): # losowanie czasu do awarii zamiast losowania w każdej klatce
+
+    def failure_times(self, maintenance, vehicles, dt): # czas (w s) do pierwszego spadku kondycji dla każdego pojazdu
+        times = []
+        remaining = list(vehicles)
+        elapsed = 0.0
+        while remaining:
+            elapsed += dt / 1000.0
+            survivors = []
+            for v in remaining:
+                maintenance.check_failure(v, dt)
+                if v.condition == 0:
+                    times.append(elapsed)
+                else:
+                    survivors.append(v)
+            remaining = survivors
+        return sorted(times)
+
+    def test_matches_per_tick_distribution(self): # test Kołmogorowa-Smirnowa dla dwóch prób na poziomie istotności 0.01
+        routes = create_default_routes() * 34
+        dt = 1000.0 / 60.0
+        samples = []
+        for maintenance_class in (RealMaintenance, ExponentialMaintenance):
+            vehicles = create_fleet(routes, rng=random.Random(1))
+            for v in vehicles:
+                v.condition = 1
+            maintenance = maintenance_class(0.05, random.Random(2))
+            samples.append(self.failure_times(maintenance, vehicles, dt))
+
+        per_tick, exponential = samples
+        n, m = len(per_tick), len(exponential)
+        points = sorted(set(per_tick + exponential))
+        statistic = max(abs(np.searchsorted(per_tick, t, side="right") / n - np.searchsorted(exponential, t, side="right") / m) for t in points)
+        self.assertLess(statistic, 1.63 * np.sqrt((n + m) / (n * m)))
+        self.assertEqual(maintenance.samples_drawn, m) # jedno losowanie na pojazd zamiast jednego na klatkę
+
+    def test_breakdown_and_repair_cycle(self): # po awarii i naprawie losowany jest nowy czas dla kondycji 10
+        random.seed(8)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        maintenance = ExponentialMaintenance(0.5, random.Random(3))
+        Simulation(routes, vehicles, maintenance, dt=50).run(until=120)
+        self.assertTrue(any(v.cost_tracker.repair_cost > 0 for v in vehicles))
+        self.assertTrue(all(0 <= v.condition <= 10 for v in vehicles))
+        self.assertLess(maintenance.samples_drawn, 12 * 2400 / 10)
+
+    def test_rejected_in_vectorized_mode(self): # tablice floty losują awarie w każdym kroku - model wykładniczy nie może być po cichu pominięty
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        with self.assertRaisesRegex(ValueError, "ExponentialMaintenance"):
+            Simulation(routes, vehicles, ExponentialMaintenance(0.5, np.random.default_rng(1)), vectorized=True)
+        with self.assertRaisesRegex(ValueError, "ExponentialMaintenance"):
+            sharded_module.ShardedSimulation(routes, vehicles, shards=2, vectorized=True, maintenance_class=ExponentialMaintenance)
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            headless_module.main(['--until', '1', '--no-csv', '--failure-model', 'exponential', '--vectorized'])
+
+
+class TestEventSimulation(unittest.TestCase): # symulacja zdarzeń dyskretnych
+
+    def test_matches_tick_simulation_without_failures(self): # bez awarii koszty i kierunki jazdy zgadzają się z symulacją krokową (z dokładnością do długości klatki)
+        random.seed(4)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        copies = copy.deepcopy(vehicles)
+        Simulation(routes, vehicles, RealMaintenance(0.0)).run(until=120)
+        events = EventSimulation(routes, copies, RealMaintenance(0.0))
+        events.run(until=120)
+
+        self.assertAlmostEqual(events.current_time, 120)
+        for a, b in zip(vehicles, copies):
+            self.assertAlmostEqual(a.cost_tracker.salary, b.cost_tracker.salary, places=1)
+            self.assertAlmostEqual(a.cost_tracker.fuel_electricity_cost, b.cost_tracker.fuel_electricity_cost, delta=0.05)
+        self.assertLess(events.events_processed, 1000) # około kilkaset zdarzeń zamiast 12 * 7200 aktualizacji
+
+    def test_breakdown_and_repair(self): # pojazd o zerowej kondycji psuje się, stoi w miejscu i wraca na trasę po naprawie
+        random.seed(5)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)[:1]
+        vehicles[0].condition = 1
+        events = EventSimulation(routes, vehicles, RealMaintenance(1000.0, random.Random(0)))
+        events.run(until=0.5)
+        bus = vehicles[0]
+        self.assertEqual(bus.state, "Broken")
+        self.assertGreater(bus.cost_tracker.repair_cost, 0)
+
+        events.maintenance.base_failure_chance = 0.0 # po naprawie bez kolejnych awarii
+        events.run(until=bus.breakdown_duration + bus.repair_duration + 0.5)
+        self.assertEqual(bus.state, "Good")
+
+    def test_repair_waits_for_activation(self): # pojazd zepsuty przed wyjazdem jest naprawiany od chwili wyjazdu, jak w symulacji krokowej
+        random.seed(5)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)[:1]
+        bus = vehicles[0]
+        bus.condition = 1
+        bus.active, bus.activation_time = False, 20.0
+        copies = copy.deepcopy(vehicles)
+        events = EventSimulation(routes, vehicles, RealMaintenance(1000.0, random.Random(0)))
+        events.run(until=0.5)
+        self.assertEqual(bus.state, "Broken")
+        events.maintenance.base_failure_chance = 0.0
+        repaired_at = bus.activation_time + bus.breakdown_duration + bus.repair_duration
+        events.run(until=repaired_at - 0.5)
+        self.assertEqual((bus.state, bus.x), ("Broken", copies[0].x))
+        events.run(until=repaired_at + 0.5)
+        self.assertEqual(bus.state, "Good")
+
+        tick = Simulation(routes, copies, RealMaintenance(1000.0, random.Random(0)), dt=50)
+        tick.run(until=0.5)
+        tick.maintenance.base_failure_chance = 0.0
+        tick.run(until=repaired_at - 0.5)
+        self.assertEqual(copies[0].state, "Broken")
+        tick.run(until=repaired_at + 0.5)
+        self.assertEqual(copies[0].state, "Good")
+        self.assertEqual(bus.condition, 10)
+
+
+class TestCostExport(unittest.TestCase): # buforowany zapis kosztów do CSV
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "koszty.csv")
+
+    def read_rows(self):
+        with open(self.path, newline='', encoding='utf-8') as csvfile:
+            return list(csv.DictReader(csvfile))
+
+    def test_final_flush_and_single_header(self): # zamknięcie zapisuje cały bufor; ponowne otwarcie dopisuje bez drugiego nagłówka
+        for vehicle_id in ("B1", "B2"):
+            with CsvCostSink(self.path, flush_rows=1000, flush_interval=60.0) as sink:
+                sink.write_rows([{'czas_s': 10, 'pojazd': vehicle_id, 'typ': 'Bus', 'paliwo_energia': 1.0, 'pensja': 2.0, 'naprawy': 0.0, 'suma': 3.0}])
+        self.assertEqual([row['pojazd'] for row in self.read_rows()], ["B1", "B2"])
+
+    def test_background_flush_by_size(self): # po przekroczeniu flush_rows wiersze trafiają do pliku bez wywołania close
+        sink = CsvCostSink(self.path, flush_rows=2, flush_interval=60.0)
+        self.addCleanup(sink.close)
+        row = {'czas_s': 10, 'pojazd': 'T1', 'typ': 'Tram', 'paliwo_energia': 1.0, 'pensja': 2.0, 'naprawy': 0.0, 'suma': 3.0}
+        sink.write_rows([row, row, row])
+        for _ in range(100):
+            if sink.rows_written == 3:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self.read_rows()), 3)
+
+    def test_exporter_writes_every_interval(self): # eksport co 10 s symulacji, tylko aktywne pojazdy
+        random.seed(6)
+        routes = create_default_routes()
+        exporter = CostExporter(self.path)
+        simulation = EventSimulation(routes, create_fleet(routes), RealMaintenance(0.0))
+        simulation.run(until=35, on_step=exporter)
+        exporter.close()
+        rows = self.read_rows()
+        self.assertEqual(sorted({int(row['czas_s']) for row in rows}), [10, 20, 30])
+        self.assertEqual(len([row for row in rows if row['czas_s'] == '10']), 4) # przy 10 s wyjechały tylko pierwsze pojazdy z każdej linii
+
+    def test_binary_matches_csv(self): # zapis binarny wczytany jako kolumny daje te same wartości co CSV
+        random.seed(7)
+        routes = create_default_routes()
+        vehicles = create_fleet(routes)
+        binary_path = self.path.replace(".csv", ".bin")
+        csv_exporter = CostExporter(self.path)
+        binary_exporter = CostExporter(sink=BinaryCostSink(binary_path))
+
+        def export_both(simulation):
+            csv_exporter(simulation)
+            binary_exporter(simulation)
+
+        EventSimulation(routes, vehicles, RealMaintenance(0.05)).run(until=65, on_step=export_both)
+        csv_exporter.close()
+        binary_exporter.close()
+
+        rows = self.read_rows()
+        data = load_binary_costs(binary_path)
+        self.assertEqual(len(data), len(rows))
+        self.assertEqual([v.decode() for v in data['pojazd']], [row['pojazd'] for row in rows])
+        self.assertEqual([v.decode() for v in data['typ']], [row['typ'] for row in rows])
+        self.assertEqual(np.round(data['suma'], 2).tolist(), [float(row['suma']) for row in rows])
+
+    def test_binary_vehicle_ids_in_utf8(self): # polskie znaki w identyfikatorze zapisane w UTF-8; identyfikator dłuższy niż pole to czytelny błąd zamiast obcięcia
+        binary_path = self.path.replace(".csv", ".bin")
+        trackers = [v.cost_tracker for v in create_fleet(create_default_routes())[:2]]
+        trackers[0].vehicle_id, trackers[1].vehicle_id = "Żółw 7", "ą" * 8 # 16 bajtów - cały rozmiar pola
+        with BinaryCostSink(binary_path) as sink:
+            sink.write_snapshot(10.0, trackers)
+            trackers[1].vehicle_id = "Tramwaj-Wrocław-01"
+            with self.assertRaisesRegex(ValueError, "Tramwaj-Wrocław-01"):
+                sink.write_snapshot(20.0, trackers)
+        data = load_binary_costs(binary_path)
+        self.assertEqual([v.decode('utf-8') for v in data['pojazd']], ["Żółw 7", "ą" * 8])
+
+
+class TestScenario(unittest.TestCase): # scenariusze z plików JSON/TOML zamiast tras w kodzie
+
+    def test_default_scenario_matches_fleet(self): # domyślny scenariusz odtwarza create_default_routes + create_fleet
+        routes, vehicles = scenario_module.load_scenario(cache_dir=None).build(rng=random.Random(3))
+        expected_routes = create_default_routes()
+        expected = create_fleet(expected_routes, rng=random.Random(3))
+        describe = lambda v: (v.line_number, v.speed, v.driver.name, v.driver.salary, v.y, v.activation_time, v.cost_tracker.consumption_per_km, v.cost_tracker.is_tram)
+        self.assertEqual([describe(v) for v in vehicles], [describe(v) for v in expected])
+        self.assertEqual([r.get_stops() for r in routes], [r.get_stops() for r in expected_routes])
+        self.assertEqual([r.get_delay_factor() for r in routes], [r.get_delay_factor() for r in expected_routes])
+
+    def test_large_toml_scenario_is_cached(self): # 300 linii i 3000 przystanków; drugie wczytanie bierze skompilowane tablice z pamięci podręcznej
+        lines = ['name = "duża sieć"', '[drivers]', 'mix = { careful = 1 }']
+        for r in range(300):
+            lines += ['[[routes]]', 'vehicle_type = "tram"', 'vehicles = 2',
+                      'traffic = { intensity = 2, period = "MIDDAY", periods = { AFTERNOON = 8 } }']
+            lines += [f'[[routes.stops]]\nname = "P{r}/{i}"\ndistance_m = {i * 350.0 + r}' if i else f'[[routes.stops]]\nname = "P{r}/0"\ndistance_m = 0' for i in range(10)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "siec.toml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+            compiled = scenario_module.load_scenario(path, cache_dir=tmp)
+            with mock.patch.object(scenario_module, "compile_scenario") as compile_scenario:
+                cached = scenario_module.load_scenario(path, cache_dir=tmp)
+            compile_scenario.assert_not_called()
+
+        self.assertEqual((cached.route_count, cached.stop_count), (300, 3000))
+        np.testing.assert_array_equal(cached.stop_distance_m, compiled.stop_distance_m)
+        self.assertEqual(cached.delay_table[0].tolist(), [1.2, 1.2, 1.8, 1.2])
+        routes, vehicles = cached.build(rng=np.random.default_rng(0))
+        self.assertEqual(len(vehicles), 600)
+        self.assertEqual(vehicles[-1].line_number, "T600")
+        self.assertTrue(all(isinstance(v.driver, CarefulDriver) for v in vehicles))
+        self.assertEqual(routes[1].get_stop_distances()[-1], 9 * 350.0 + 1)
+        self.assertEqual(routes[1].get_length(), 3.151)
+
+    def test_routes_use_compiled_delays(self): # trasy biorą opóźnienia z delay_table (te same wartości, które policzyłby Traffic)
+        compiled = scenario_module.compile_scenario({"routes": [
+            {"stops": ["A", "B", "C"], "length_km": 2, "traffic": {"intensity": 3, "periods": {"EVENING": 7}, "segments": [1.0, 2.5]}},
+            {"stops": ["D", "E"], "length_km": 1, "traffic": {"intensity": 1}},
+        ]})
+        self.assertEqual(compiled.delay_table.shape, (3, len(traffic_module.PERIODS))) # wiersz na odcinek
+        with mock.patch.object(compiled, "delay_table", compiled.delay_table * 2):
+            doubled = compiled.build_routes()
+        routes = compiled.build_routes()
+        for route, twice in zip(routes, doubled):
+            traffic = route.get_traffic()
+            expected = traffic_module.Traffic(traffic.get_intensity(), traffic.get_period(), {p: traffic.get_intensity(p) for p in traffic_module.PERIODS}, traffic._segment_factors)
+            self.assertEqual(traffic.period_delays, expected.period_delays)
+            self.assertEqual(twice.get_traffic().period_delays, [[2 * d for d in row] for row in expected.period_delays]) # wartości pochodzą z tablicy, nie z przeliczenia
+
+    def test_invalid_scenario(self):
+        with self.assertRaises(ValueError):
+            scenario_module.compile_scenario({"routes": [{"stops": ["A", "B"], "length_km": 1, "traffic": {"period": "NIGHT"}}]})
+        with self.assertRaises(ValueError):
+            scenario_module.compile_scenario({"routes": [{"stops": [{"name": "A", "distance_m": 100}]}]})
+        for route in ({"stops": ["A", "B"], "length_km": 1, "vehicles": [3]}, {"stops": ["A", "B"], "length_km": 1, "vehicles": "3"},
+                      {"stops": ["A", "B"], "length_km": 1, "traffic": 4}, {"stops": ["A", "B"], "length_km": 1, "traffic": {"periods": [1]}}, "A - B"):
+            with self.assertRaises(ValueError):
+                scenario_module.compile_scenario({"routes": [route]})
+        with self.assertRaises(ValueError):
+            scenario_module.compile_scenario({"routes": [{"stops": ["A", "B"], "length_km": 1}], "drivers": []})
+
+
+class TestMonteCarlo(unittest.TestCase): # replikacje z własnymi ziarnami
+
+    def test_reproducible_across_processes(self): # te same ziarna dają te same wyniki niezależnie od liczby procesów
+        sequential = run_monte_carlo(3, until=120, seed=11, workers=1)
+        parallel = run_monte_carlo(3, until=120, seed=11, workers=2)
+        self.assertEqual(sequential.replications, parallel.replications)
+
+        fleet = sequential.summary["flota"]["flota"]
+        self.assertEqual(fleet["n"], 3)
+        self.assertLessEqual(fleet["ci_low"], fleet["mean"])
+        self.assertLessEqual(fleet["p5"], fleet["p95"])
+        self.assertNotEqual(sequential.replications[0], sequential.replications[1]) # replikacje są niezależne
+        self.assertEqual(len(sequential.summary["linia"]), 4)
+
+
+class TestDisplayCache(unittest.TestCase): # pamięć podręczna renderowania GUI
+
+    def setUp(self):
+        display.invalidate_route_layer()
+        self.screen = display.pygame.Surface((1000, 600))
+
+    def test_route_layer_rendered_once(self): # statyczna warstwa tras jest renderowana raz i daje ten sam obraz co rysowanie bezpośrednie
+        routes = create_default_routes()
+        y_base = [100, 200, 300, 400]
+        with mock.patch.object(display, "render_route_layer", wraps=display.render_route_layer) as render:
+            for _ in range(3):
+                display.draw_routes(self.screen, routes, y_base)
+            self.assertEqual(render.call_count, 1)
+            self.screen.fill((0, 0, 0))
+            display.draw_routes(self.screen, routes[:2], y_base) # inne trasy -> nowa warstwa
+            self.assertEqual(render.call_count, 2)
+
+        expected = display.pygame.Surface((1000, 600))
+        expected.blit(display.render_route_layer(routes[:2], y_base, (1000, 600)), (0, 0))
+        self.assertEqual(display.pygame.image.tobytes(self.screen, "RGB"), display.pygame.image.tobytes(expected, "RGB"))
+
+    def test_flipped_sprite_and_text_cached(self): # odwrócony obrazek i napisy są tworzone tylko raz
+        image = display.pygame.Surface((60, 30))
+        self.assertIs(display.get_flipped_image(image), display.get_flipped_image(image))
+        self.assertIs(display.render_text("Status: 7"), display.render_text("Status: 7"))
+
+
+class TestInfoPanel(unittest.TestCase): # wirtualizowany panel z filtrowaniem i sortowaniem
+
+    def setUp(self):
+        routes = create_default_routes() * 500
+        self.vehicles = create_fleet(routes, rng=random.Random(1)) # 6000 pojazdów, aktywacja po 0, 15 i 30 s
+
+    def activate(self, until):
+        for v in self.vehicles:
+            if v.activation_time <= until:
+                v.active = True
+
+    def test_incremental_count_and_visible_rows(self): # licznik aktywnych rośnie bez skanowania floty, a rysowanych jest tylko kilka wierszy
+        panel = display.InfoPanel(self.vehicles)
+        self.assertEqual(panel.active_count, 0)
+        self.activate(15)
+        panel.update()
+        self.assertEqual(panel.active_count, 4000)
+        self.assertEqual(len(panel), 4000)
+        self.assertEqual([v.active for v in self.vehicles].count(True), panel.active_count)
+
+        rows = panel.visible_rows(scroll=820)
+        self.assertLessEqual(len(rows), display.SCREEN_HEIGHT // display.ROW_HEIGHT + 2)
+        self.assertEqual(rows[0][0], 9)
+        with mock.patch.object(display, "vehicle_panel_lines", wraps=display.vehicle_panel_lines) as lines:
+            panel.draw(display.pygame.Surface((1000, 600)))
+        self.assertLessEqual(lines.call_count, 9)
+
+    def test_sort_and_filter(self): # filtr linii i stanu oraz sortowanie po kondycji
+        self.activate(30)
+        self.vehicles[5].condition = 2
+        self.vehicles[7].state = VehicleState.BROKEN
+        panel = display.InfoPanel(self.vehicles, sort_by="condition", line_filter="T")
+        self.assertTrue(all(v.line_number.startswith("T") for _, v in panel.visible_rows(0)))
+        self.assertEqual(len(panel), 5994) # autobusy jeżdżą tylko na dwóch pierwszych liniach
+
+        panel.set_view(sort_by="condition", line_filter="B")
+        self.assertEqual(len(panel), 6)
+        panel.set_view(sort_by="condition")
+        worst = [v for _, v in panel.visible_rows(0)][:2]
+        self.assertEqual(worst, [self.vehicles[7], self.vehicles[5]])
+
+        panel.set_view(state_filter="Broken")
+        self.assertEqual(len(panel), 1)
+
+
+class TestDirtyRectRenderer(unittest.TestCase): # przyrostowe rysowanie musi dawać ten sam obraz co pełna klatka
+
+    def test_matches_full_redraw(self):
+        pygame = display.pygame
+        bus_image = pygame.Surface((60, 30), pygame.SRCALPHA)
+        bus_image.fill((0, 0, 255, 128))
+        tram_image = pygame.Surface((60, 30), pygame.SRCALPHA)
+        tram_image.fill((255, 0, 0, 128))
+        set_vehicle_images(bus_image, tram_image)
+
+        routes = create_default_routes()
+        y_base = [100, 200, 300, 400]
+        vehicles = create_fleet(routes, y_base, rng=random.Random(1))
+        simulation = Simulation(routes, vehicles, RealMaintenance(0.5, random.Random(2)), dt=100)
+        renderer = display.DirtyRectRenderer(GREEN)
+        screen = pygame.Surface((1000, 600))
+        expected = pygame.Surface((1000, 600))
+        partial_frames = 0
+
+        for step in range(600):
+            simulation.step()
+            if step == 400:
+                display.scroll_offset = 100 # przewinięcie panelu
+            dirty = renderer.render(screen, routes, y_base, vehicles)
+            partial_frames += not renderer.last_frame_full
+            if step % 20 == 0:
+                expected.fill(GREEN)
+                display.draw_routes(expected, routes, y_base)
+                for v in vehicles:
+                    display.draw_vehicle(expected, v)
+                display.draw_info_panel(expected, vehicles)
+                self.assertEqual(pygame.image.tobytes(screen, "RGB"), pygame.image.tobytes(expected, "RGB"), f"krok {step}")
+                self.assertTrue(renderer.last_frame_full or sum(r.width * r.height for r in dirty) < 1000 * 600 / 2)
+        display.scroll_offset = 0
+        self.assertGreater(partial_frames, 500)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
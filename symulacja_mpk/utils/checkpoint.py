@@ -0,0 +1,128 @@
+import io
+import os
+import pickle
+import random
+import threading
+import zlib
+from typing import List, Optional, Union
+
+import numpy as np
+
+from symulacja_mpk.utils.random_streams import BufferedRandom, RandomStreams
+
+CHECKPOINT_MAGIC = b"MPKCKPT1" # nagłówek pliku punktu kontrolnego; dalej skompresowany zlib pickle stanu
+CHECKPOINT_INTERVAL = 600.0 # domyślnie co ile sekund symulacji zapisywany jest punkt kontrolny
+COMPRESSION_LEVEL = 1 # szybka kompresja - stan to głównie liczby, wyższy poziom niewiele zmniejsza plik
+_RANDOM_MODULE = "random" # moduł random (domyślne źródło losowości Maintenance) zapisywany jako odwołanie, a jego stan osobno
+
+class _StatePickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return _RANDOM_MODULE if obj is random else None
+
+class _StateUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        if pid == _RANDOM_MODULE:
+            return random
+        raise pickle.UnpicklingError(f"nieznany obiekt w punkcie kontrolnym: {pid}")
+
+def dump_state(simulation) -> bytes: # cały stan symulacji (pojazdy, kierowcy, trasy, awarie, koszty, pasażerowie, generatory liczb losowych) jako bajty; wspólne obiekty (np. generator Maintenance i FleetState) zostają wspólne
+    buffer = io.BytesIO()
+    _StatePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump({'simulation': simulation, 'random_state': random.getstate()})
+    return buffer.getvalue()
+
+def encode_checkpoint(state: bytes) -> bytes:
+    return CHECKPOINT_MAGIC + zlib.compress(state, COMPRESSION_LEVEL)
+
+def write_checkpoint(data: bytes, path: str): # zapis przez plik tymczasowy, więc przerwany zapis nie niszczy poprzedniego punktu kontrolnego
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def save_checkpoint(simulation, path: str):
+    write_checkpoint(encode_checkpoint(dump_state(simulation)), path)
+
+def read_checkpoint(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def load_checkpoint(source: Union[str, bytes], restore_random: bool = True): # odtwarza symulację z pliku (lub bajtów z read_checkpoint); dalszy przebieg jest identyczny jak bez przerwy. restore_random - czy przywrócić stan globalnego modułu random. Tylko dla zaufanych plików (pickle)
+    data = read_checkpoint(source) if isinstance(source, str) else source
+    if data[:len(CHECKPOINT_MAGIC)] != CHECKPOINT_MAGIC:
+        raise ValueError("to nie jest punkt kontrolny symulacji")
+    state = _StateUnpickler(io.BytesIO(zlib.decompress(data[len(CHECKPOINT_MAGIC):]))).load()
+    if restore_random:
+        random.setstate(state['random_state'])
+    return state['simulation']
+
+def _reseed(rng, sequence: np.random.SeedSequence): # nowe ziarno dla generatora w miejscu - obiekt jest współdzielony (np. Maintenance i FleetState), więc nie może być podmieniony
+    if isinstance(rng, BufferedRandom):
+        rng.generator = np.random.default_rng(sequence)
+        rng._block, rng._position = [], 0
+    elif isinstance(rng, np.random.Generator):
+        rng.bit_generator.state = np.random.default_rng(sequence).bit_generator.state
+    else: # random.Random lub moduł random
+        rng.seed(int(sequence.generate_state(1)[0]))
+
+def reseed(simulation, streams: RandomStreams): # nowe strumienie losowe dla dalszego przebiegu (awarie, naprawy, pasażerowie); stan pojazdów zostaje
+    components = [(simulation.maintenance.rng, "failures"), (simulation.maintenance.repair_rng, "repairs")]
+    fleet = getattr(simulation, "fleet_state", None)
+    if fleet is not None:
+        components += [(fleet.rng, "failures"), (fleet.repair_rng, "repairs")]
+    if simulation.passengers is not None:
+        components.append((simulation.passengers.rng, "passengers"))
+    seen = set()
+    for rng, name in components:
+        if id(rng) not in seen:
+            seen.add(id(rng))
+            _reseed(rng, streams.seed_sequence(name))
+
+def fork_checkpoint(source: Union[str, bytes], count: int, seed: Optional[int] = None) -> list: # count niezależnych kopii symulacji z jednego punktu kontrolnego (np. po rozgrzewce), każda z własnymi strumieniami losowymi wyprowadzonymi z seed
+    data = read_checkpoint(source) if isinstance(source, str) else source
+    simulations = []
+    for streams in RandomStreams(seed).spawn(count):
+        simulation = load_checkpoint(data, restore_random=False)
+        reseed(simulation, streams)
+        simulations.append(simulation)
+    return simulations
+
+
+class Checkpointer: # zapisuje punkt kontrolny co interval sekund symulacji; można go przekazać jako on_step do run. Stan jest serializowany w wątku symulacji (spójna chwila), a kompresja i zapis odbywają się w wątku w tle
+    def __init__(self, path: str, interval: float = CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.next_time = None
+        self.saved = 0
+        self._thread = None
+        self._error = None
+
+    def __call__(self, simulation):
+        if self.next_time is None:
+            self.next_time = (simulation.current_time // self.interval + 1) * self.interval
+        if simulation.current_time >= self.next_time:
+            self.save(simulation)
+            self.next_time = (simulation.current_time // self.interval + 1) * self.interval
+
+    def save(self, simulation):
+        state = dump_state(simulation)
+        self.wait() # najwyżej jeden zapis naraz; kolejny punkt kontrolny zastępuje poprzedni
+        self._thread = threading.Thread(target=self._write, args=(state,), name="Checkpointer", daemon=True)
+        self._thread.start()
+
+    def _write(self, state: bytes):
+        try:
+            write_checkpoint(encode_checkpoint(state), self.path)
+            self.saved += 1
+        except Exception as error: # zgłaszany w wątku symulacji przy kolejnym zapisie lub close
+            self._error = error
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        self.wait()
@@ -1,4 +1,3 @@
-import pygame
 import os
 
 # Kolory
@@ -16,6 +15,9 @@ SCREEN_HEIGHT = 600
 PANEL_WIDTH = 140
 PANEL_LEFT_X = SCREEN_WIDTH - PANEL_WIDTH
 
+# Krok, dla którego prędkość pojazdu (Vehicle.speed) jest przesunięciem w px na krok; przy innym kroku przesunięcie jest proporcjonalne do dt
+REFERENCE_DT = 1000.0 / 60.0 # ms - jedna klatka przy 60 FPS
+
 # Granice tras
 TRACK_LEFT_BOUND = 50
 TRACK_RIGHT_BOUND = PANEL_LEFT_X - 10
@@ -0,0 +1,218 @@
+import os
+import csv
+import atexit
+import threading
+import time
+from typing import List, Optional
+
+COST_FIELDNAMES = ['czas_s', 'pojazd', 'typ', 'paliwo_energia', 'pensja', 'naprawy', 'suma']
+DEFAULT_COST_PATH = os.path.join(os.path.dirname(__file__), '..', '..', "koszty.csv") # Ścieżka do koszty.csv w katalogu głównym projektu
+DEFAULT_BINARY_COST_PATH = os.path.join(os.path.dirname(__file__), '..', '..', "koszty.bin")
+EXPORT_INTERVAL = 10 # co ile sekund symulacji zapisywane są koszty
+COST_FORMATS = ("csv", "binary")
+
+BINARY_MAGIC = b"MPKCOST1" # nagłówek pliku binarnego: znacznik formatu + rozmiar rekordu (razem BINARY_HEADER_SIZE bajtów)
+BINARY_HEADER_SIZE = 16
+VEHICLE_ID_BYTES = 16 # długość pola 'pojazd' w rekordzie binarnym - identyfikator w UTF-8
+
+def cost_record_dtype(): # typ rekordu w pliku binarnym - te same kolumny co w CSV, ale bez zaokrągleń; 'pojazd' i 'typ' to bajty UTF-8 (odczyt przez .decode())
+    import numpy as np
+    return np.dtype([
+        ('czas_s', '<f8'),
+        ('pojazd', f'S{VEHICLE_ID_BYTES}'),
+        ('typ', 'S4'),
+        ('paliwo_energia', '<f8'),
+        ('pensja', '<f8'),
+        ('naprawy', '<f8'),
+        ('suma', '<f8'),
+    ])
+
+def encode_vehicle_id(vehicle_id: str) -> bytes: # identyfikator do pola 'pojazd'; numpy sam koduje tylko ASCII, a dłuższy napis obcina bez ostrzeżenia
+    encoded = str(vehicle_id).encode('utf-8')
+    if len(encoded) > VEHICLE_ID_BYTES:
+        raise ValueError(f"Identyfikator pojazdu {vehicle_id!r} ma {len(encoded)} bajtów w UTF-8, a pole 'pojazd' w pliku binarnym mieści {VEHICLE_ID_BYTES}")
+    return encoded
+
+class BufferedCostSink: # wspólna część ujść kosztów: bufor w pamięci zapisywany przez wątek w tle, więc zapis nie blokuje kroków symulacji
+    def __init__(self, path: str, flush_rows: int = 10000, flush_interval: float = 5.0): # Argumenty: path - plik (dopisywanie), flush_rows - liczba wierszy w buforze, po której wątek zapisuje od razu, flush_interval - maksymalny czas w s (rzeczywisty) między zapisami
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+
+        self._file = self._open()
+        self._buffer = []
+        self._buffered_rows = 0
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock() # flush() z wątku symulacji i wątek w tle nie mogą pisać jednocześnie
+        self._closed = False
+        self._error = None # wyjątek z wątku zapisującego, zgłaszany przy kolejnym write/close
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        atexit.register(self.close) # końcowy zapis również przy zamykaniu programu
+
+    def _open(self):
+        raise NotImplementedError()
+
+    def _write_chunks(self, chunks: list): # zapisuje do pliku elementy bufora (wywoływane pod blokadą zapisu)
+        raise NotImplementedError()
+
+    def write_snapshot(self, time_seconds: float, trackers: list): # dodaje do bufora koszty podanych CostTrackerów w chwili time_seconds
+        raise NotImplementedError()
+
+    def _append(self, chunk, rows: int): # dodaje element bufora zawierający rows wierszy; nie wykonuje operacji na pliku
+        self._raise_error()
+        with self._condition:
+            if self._closed:
+                raise ValueError(f"{type(self).__name__} jest zamknięty")
+            self._buffer.append(chunk)
+            self._buffered_rows += rows
+            if self._buffered_rows >= self.flush_rows:
+                self._condition.notify()
+
+    def _take(self): # zabiera zawartość bufora (wywoływane pod self._condition)
+        chunks, rows = self._buffer, self._buffered_rows
+        self._buffer, self._buffered_rows = [], 0
+        return chunks, rows
+
+    def flush(self): # zapisuje bufor natychmiast, w wątku wywołującym
+        with self._condition:
+            chunks, rows = self._take()
+        self._write(chunks, rows)
+        self._raise_error()
+
+    def close(self): # zapisuje resztę bufora, kończy wątek i zamyka plik; można wywołać wielokrotnie
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        atexit.unregister(self.close)
+        self._file.close()
+        self._raise_error()
+
+    def _run(self): # pętla wątku: czeka na zapełnienie bufora, upływ flush_interval albo zamknięcie
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            with self._condition:
+                while not self._closed and self._buffered_rows < self.flush_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                chunks, rows = self._take()
+                closed = self._closed
+            self._write(chunks, rows)
+            deadline = time.monotonic() + self.flush_interval
+            if closed:
+                return
+
+    def _write(self, chunks: list, rows: int):
+        if not chunks:
+            return
+        with self._write_lock:
+            try:
+                self._write_chunks(chunks)
+                self._file.flush()
+                self.rows_written += rows
+            except (OSError, ValueError) as e:
+                self._error = e
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvCostSink(BufferedCostSink): # koszty jako tekstowy CSV (koszty.csv), wartości zaokrąglone jak w CostTracker.to_dict
+    def _open(self):
+        csvfile = open(self.path, "a", newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(csvfile, fieldnames=COST_FIELDNAMES)
+        if csvfile.tell() == 0: # nagłówek tylko dla nowego/pustego pliku
+            self._writer.writeheader()
+        return csvfile
+
+    def write_rows(self, rows: List[dict]): # dodaje wiersze (słowniki z CostTracker.to_dict) do bufora
+        self._append(rows, len(rows))
+
+    def write_snapshot(self, time_seconds: float, trackers: list):
+        self.write_rows([t.to_dict(time_seconds) for t in trackers])
+
+    def _write_chunks(self, chunks: list):
+        for rows in chunks:
+            self._writer.writerows(rows)
+
+
+class BinaryCostSink(BufferedCostSink): # koszty jako plik binarny ze stałą długością rekordu (cost_record_dtype), który można wczytać przez np.memmap bez parsowania wierszy
+    def _open(self):
+        self._dtype = cost_record_dtype()
+        binfile = open(self.path, "ab")
+        header = BINARY_MAGIC + self._dtype.itemsize.to_bytes(BINARY_HEADER_SIZE - len(BINARY_MAGIC), "little")
+        if binfile.tell() == 0:
+            binfile.write(header)
+        else:
+            with open(self.path, "rb") as existing:
+                if existing.read(BINARY_HEADER_SIZE) != header:
+                    binfile.close()
+                    raise ValueError(f"{self.path} nie jest plikiem kosztów w formacie binarnym")
+        return binfile
+
+    def write_snapshot(self, time_seconds: float, trackers: list): # zapisuje kolumny jednego odczytu jako tablicę rekordów; zbyt długi identyfikator pojazdu to ValueError już tutaj, nie w wątku zapisującym
+        import numpy as np
+        chunk = np.empty(len(trackers), dtype=self._dtype)
+        chunk['czas_s'] = time_seconds
+        chunk['pojazd'] = [encode_vehicle_id(t.vehicle_id) for t in trackers]
+        chunk['typ'] = ['Tram' if t.is_tram else 'Bus' for t in trackers]
+        chunk['paliwo_energia'] = [t.fuel_electricity_cost for t in trackers]
+        chunk['pensja'] = [t.salary for t in trackers]
+        chunk['naprawy'] = [t.repair_cost for t in trackers]
+        chunk['suma'] = chunk['pensja'] + chunk['paliwo_energia'] + chunk['naprawy']
+        self._append(chunk, len(chunk))
+
+    def _write_chunks(self, chunks: list):
+        import numpy as np
+        np.concatenate(chunks).tofile(self._file)
+
+
+def load_binary_costs(path: str): # wczytuje plik z BinaryCostSink jako tablicę rekordów numpy (memmap, tylko do odczytu); kolumny: data['pensja'], data['pojazd'] itd.
+    import numpy as np
+    dtype = cost_record_dtype()
+    with open(path, "rb") as binfile:
+        header = binfile.read(BINARY_HEADER_SIZE)
+    if header[:len(BINARY_MAGIC)] != BINARY_MAGIC or int.from_bytes(header[len(BINARY_MAGIC):], "little") != dtype.itemsize:
+        raise ValueError(f"{path} nie jest plikiem kosztów w formacie binarnym")
+    if os.path.getsize(path) == BINARY_HEADER_SIZE:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=BINARY_HEADER_SIZE)
+
+def open_cost_sink(path: Optional[str] = None, format: str = "csv", **options) -> BufferedCostSink: # tworzy ujście kosztów w wybranym formacie ("csv" lub "binary"); options trafiają do konstruktora (flush_rows, flush_interval)
+    if format == "csv":
+        return CsvCostSink(path or DEFAULT_COST_PATH, **options)
+    if format == "binary":
+        return BinaryCostSink(path or DEFAULT_BINARY_COST_PATH, **options)
+    raise ValueError(f"Nieznany format kosztów: {format} (dostępne: {', '.join(COST_FORMATS)})")
+
+
+class CostExporter: # zbiera koszty co EXPORT_INTERVAL sekund symulacji i przekazuje je do ujścia (CSV lub binarnego); można go przekazać jako on_step do Simulation.run
+    def __init__(self, path: Optional[str] = None, interval: int = EXPORT_INTERVAL, sink: Optional[BufferedCostSink] = None, format: str = "csv"):
+        self.interval = interval
+        self.sink = sink if sink is not None else open_cost_sink(path, format)
+        self.path = self.sink.path
+        self.last_write_time = 0 # Śledzenie czasu ostatniego zapisu do CSV
+
+    def __call__(self, simulation): # current_time // interval * interval zaokrągla czas w dół do najbliższej wielokrotności interwału
+        rounded_current_time = int(simulation.current_time // self.interval * self.interval)
+        if rounded_current_time > self.last_write_time:
+            simulation.sync_vehicles()
+            self.sink.write_snapshot(simulation.current_time, [v.cost_tracker for v in simulation.vehicles if v.active and v.cost_tracker])
+            self.last_write_time = rounded_current_time
+
+    def close(self): # końcowy zapis wszystkich zebranych kosztów
+        self.sink.close()
@@ -0,0 +1,153 @@
+import os
+import csv
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from symulacja_mpk.core.vehicles import Vehicle
+
+LEDGER_GROUPS = ('linia', 'typ', 'kierowca', 'flota') # grupy sumowane na bieżąco; koszty pojedynczych pojazdów są w ich CostTrackerach
+LEDGER_WINDOW = 3600.0 # długość okna zestawień w s
+COST_COMPONENTS = ('paliwo_energia', 'pensja', 'naprawy')
+HOURLY_FIELDNAMES = ['od_s', 'do_s', 'grupa', 'klucz', *COST_COMPONENTS, 'suma']
+DEFAULT_HOURLY_PATH = os.path.join(os.path.dirname(__file__), '..', '..', "koszty_godzinowe.csv")
+
+def vehicle_groups(vehicle: Vehicle) -> Dict[str, str]: # klucze grup, do których należy pojazd
+    stops = vehicle.route.get_stops()
+    return {
+        'linia': f"{stops[0]} - {stops[-1]}",
+        'typ': 'Tram' if vehicle.cost_tracker.is_tram else 'Bus',
+        'kierowca': type(vehicle.driver).__name__.replace('Driver', ''),
+        'flota': 'razem',
+    }
+
+class CostLedger: # księga kosztów floty: sumy dla linii, typów pojazdów, klas kierowców i całej floty aktualizowane przy każdym naliczeniu kosztu (CostTracker.update, add_repair_cost), więc zapytanie o sumę to O(1); na granicach okien (domyślnie co godzinę) zapamiętuje stan, z którego liczone są koszty w przedziałach czasu
+    def __init__(self, vehicles: List[Vehicle], window: float = LEDGER_WINDOW): # vehicles - pojazdy z CostTrackerami, które zaczną zgłaszać koszty do księgi, window - długość okna w s
+        self.vehicles = vehicles
+        self.window = window
+        self.rows = {} # (grupa, klucz) -> wiersz sum
+        self.fuel, self.salary, self.repair = [], [], []
+        self.trackers = [v.cost_tracker for v in vehicles]
+        self.vehicle_index = {} # identyfikator pojazdu (CostTracker.vehicle_id) -> indeks
+        vehicle_rows = []
+        for i, v in enumerate(vehicles):
+            if v.cost_tracker is None:
+                vehicle_rows.append(())
+                continue
+            self.vehicle_index.setdefault(v.cost_tracker.vehicle_id, i)
+            rows = tuple(self._row(group, key) for group, key in vehicle_groups(v).items())
+            v.cost_tracker.ledger = self
+            v.cost_tracker.ledger_rows = rows
+            vehicle_rows.append(rows)
+
+        # w trybie wektorowym koszty są w tablicach FleetState; sumy grup rosną o przyrosty między krokami (record_fleet)
+        self.fleet = None
+        self._fleet_rows = np.array([r for rows in vehicle_rows for r in rows], dtype=np.int64)
+        self._fleet_owner = np.repeat(np.arange(len(vehicles)), [len(rows) for rows in vehicle_rows])
+        self._fleet_last = None
+        n_rows = len(self.fuel)
+        self._fleet_component_rows = np.concatenate((self._fleet_rows, self._fleet_rows + n_rows, self._fleet_rows + 2 * n_rows)) # jedno sumowanie dla trzech składników
+
+        self.windows_closed = 0
+        self._snapshots = [self._snapshot()] # stan na początku kolejnych okien
+
+    def _row(self, group: str, key: str) -> int:
+        row = self.rows.get((group, key))
+        if row is None:
+            row = self.rows[(group, key)] = len(self.fuel)
+            self.fuel.append(0.0)
+            self.salary.append(0.0)
+            self.repair.append(0.0)
+        return row
+
+    def add(self, rows: tuple, fuel: float, salary: float): # przyrost kosztów jazdy pojazdu (z CostTracker.update)
+        fuel_totals, salary_totals = self.fuel, self.salary
+        for r in rows:
+            fuel_totals[r] += fuel
+            salary_totals[r] += salary
+
+    def add_repair(self, rows: tuple, cost: float): # koszt naprawy pojazdu (z CostTracker.add_repair_cost)
+        repair_totals = self.repair
+        for r in rows:
+            repair_totals[r] += cost
+
+    def record_fleet(self, fleet): # tryb wektorowy: dolicza przyrosty kosztów z tablic FleetState od poprzedniego wywołania
+        totals = np.stack((fleet.fuel_electricity_cost, fleet.salary, fleet.repair_cost))
+        if self.fleet is not fleet:
+            self.fleet = fleet
+            self._fleet_last = np.stack([[getattr(t, name) if t else 0.0 for t in self.trackers] for name in ('fuel_electricity_cost', 'salary', 'repair_cost')])
+        delta = totals - self._fleet_last
+        self._fleet_last = totals
+        n_rows = len(self.fuel)
+        sums = np.bincount(self._fleet_component_rows, delta[:, self._fleet_owner].ravel(), 3 * n_rows)
+        components = (self.fuel, self.salary, self.repair)
+        for r in np.flatnonzero(sums).tolist():
+            components[r // n_rows][r % n_rows] += float(sums[r])
+
+    def _vehicle_totals(self) -> np.ndarray: # koszty pojazdów (3 x n) - z tablic floty w trybie wektorowym, inaczej z CostTrackerów
+        if self.fleet is not None:
+            return np.stack((self.fleet.fuel_electricity_cost, self.fleet.salary, self.fleet.repair_cost))
+        return np.array([[getattr(t, name) if t else 0.0 for t in self.trackers] for name in ('fuel_electricity_cost', 'salary', 'repair_cost')], dtype=float).reshape(3, len(self.trackers))
+
+    def _snapshot(self): # stan księgi: sumy grup i koszty pojazdów
+        return (list(self.fuel), list(self.salary), list(self.repair), self._vehicle_totals())
+
+    def advance(self, now: float): # zamyka okna, które skończyły się przed chwilą now
+        while now >= (self.windows_closed + 1) * self.window:
+            self.windows_closed += 1
+            self._snapshots.append(self._snapshot())
+
+    def next_window(self) -> float: # czas końca bieżącego okna w s
+        return (self.windows_closed + 1) * self.window
+
+    @staticmethod
+    def _costs(fuel: float, salary: float, repair: float) -> dict:
+        return {'paliwo_energia': fuel, 'pensja': salary, 'naprawy': repair, 'suma': fuel + salary + repair}
+
+    def _values(self, state, group: str, key: str): # (paliwo, pensja, naprawy) grupy albo pojazdu w zapamiętanym stanie
+        fuel, salary, repair, vehicles = state
+        if group == 'pojazd':
+            i = self.vehicle_index[key]
+            return float(vehicles[0, i]), float(vehicles[1, i]), float(vehicles[2, i])
+        r = self.rows[(group, key)]
+        return fuel[r], salary[r], repair[r]
+
+    def total(self, group: str, key: str = 'razem') -> dict: # obecne sumy kosztów grupy (LEDGER_GROUPS) lub pojazdu (grupa 'pojazd', klucz - identyfikator). O(1) dla grup
+        if group == 'pojazd':
+            i = self.vehicle_index[key]
+            if self.fleet is not None:
+                return self._costs(float(self.fleet.fuel_electricity_cost[i]), float(self.fleet.salary[i]), float(self.fleet.repair_cost[i]))
+            t = self.trackers[i]
+            return self._costs(t.fuel_electricity_cost, t.salary, t.repair_cost)
+        r = self.rows[(group, key)]
+        return self._costs(self.fuel[r], self.salary[r], self.repair[r])
+
+    def between(self, group: str, key: str, start: float, end: Optional[float] = None) -> dict: # koszty grupy naliczone między granicami okien start i end (w s czasu symulacji, zaokrąglane w dół do granicy okna); end=None - do teraz
+        first = int(start // self.window)
+        if first > self.windows_closed:
+            raise ValueError(f"okno zaczynające się w {start} s jeszcze się nie zaczęło")
+        begin = self._values(self._snapshots[first], group, key)
+        last = None if end is None else int(end // self.window)
+        if last is None or last > self.windows_closed:
+            finish = tuple(self.total(group, key)[name] for name in COST_COMPONENTS)
+        else:
+            finish = self._values(self._snapshots[last], group, key)
+        return self._costs(*(b - a for a, b in zip(begin, finish)))
+
+    def hourly_rows(self, groups=LEDGER_GROUPS) -> List[dict]: # zamknięte okna jako wiersze (koszty naliczone w oknie) dla każdej grupy i klucza
+        rows = []
+        for k in range(self.windows_closed):
+            for (group, key), r in self.rows.items():
+                if group not in groups:
+                    continue
+                before, after = self._snapshots[k], self._snapshots[k + 1]
+                fuel, salary, repair = (after[c][r] - before[c][r] for c in range(3))
+                rows.append({'od_s': int(k * self.window), 'do_s': int((k + 1) * self.window), 'grupa': group, 'klucz': key,
+                             **{name: round(value, 2) for name, value in self._costs(fuel, salary, repair).items()}})
+        return rows
+
+def write_hourly_costs(rows: List[dict], path: Optional[str] = None): # zapisuje wiersze z CostLedger.hourly_rows do CSV
+    with open(path or DEFAULT_HOURLY_PATH, "w", newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=HOURLY_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
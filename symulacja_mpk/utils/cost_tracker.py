@@ -1,6 +1,7 @@
 from symulacja_mpk.core.vehicles import Vehicle
 
 class CostTracker: # klasa, która śledzi i oblicza koszty operacyjne dla pojazdu
+    __slots__ = ('vehicle_id', 'salary', 'fuel_electricity_cost', 'driver_salary_per_hour', 'consumption_per_km', 'is_tram', 'last_x', 'repair_cost', 'ledger', 'ledger_rows')
     def __init__(self, vehicle_id: str, driver_salary_per_hour: float, consumption_per_km: float, is_tram: bool = False): # inicjalizacja obiektu CostTracker. Jako argumenty przyjmuje: vehicle_id, czyli identyfikator danego pojazdu, driver_salary..., czyli stawka za godzinę dla kierowcy, consumption..., zużycie paliwa/prądu na km, is_tram, czyli stwierdzenie, jaki to pojazd
         self.vehicle_id = vehicle_id
         self.salary = 0.0
@@ -10,14 +11,20 @@ class CostTracker: # klasa, która śledzi i oblicza koszty operacyjne dla pojaz
         self.is_tram = is_tram
         self.last_x = 50 # Startowa pozycja pojazdu
         self.repair_cost = 0.0 # całkowity koszt napraw
+        self.ledger = None # CostLedger, do którego zgłaszane są przyrosty kosztów (ustawia CostLedger)
+        self.ledger_rows = ()
 
     def update(self, v: Vehicle, dt: float): # metoda, która aktualizuje koszty pojazdu; oblicza pensję i zużycia. Argumenty przyjmowane: v - obiekt pojazdu do aktualizacji kosztów, dt - analogicznie jak wyżej opisane
         seconds = dt / 1000.0
-        self.salary += (self.driver_salary_per_hour / 3600.0) * seconds
+        salary = (self.driver_salary_per_hour / 3600.0) * seconds
+        self.salary += salary
 
         distance_moved = abs(v.x - self.last_x) / 1000.0 # Przeliczanie na km - /1000.0, zakładając że 1 jednostka na osi X to 1 metr
-        self.fuel_electricity_cost += self.consumption_per_km * distance_moved
+        fuel = self.consumption_per_km * distance_moved
+        self.fuel_electricity_cost += fuel
         self.last_x = v.x
+        if self.ledger is not None:
+            self.ledger.add(self.ledger_rows, fuel, salary)
 
     def to_dict(self, time_seconds: float) -> dict: # formatuje dane kosztów do słownika, by zapisać do pliku CSV. Arg.: time_sec - aktualny czas symulacji w s. Zwraca słownik, który zawiera obecne kosty danego pojazdu
         return {
@@ -30,5 +37,7 @@ class CostTracker: # klasa, która śledzi i oblicza koszty operacyjne dla pojaz
             'suma': round(self.salary + self.fuel_electricity_cost + self.repair_cost, 2)
         }
 
-    def add_repair_cost(self, seconds: float): # metoda kosztu naprawy do wszystkich kosztów i jako argument przyjmuje czas trwania awarii w s
-        self.repair_cost += seconds * 1.0  # 1 zł kosztu naprawy za sekundę zepsucia
\ No newline at end of file
+    def add_repair_cost(self, seconds: float, rate: float = 1.0): # metoda kosztu naprawy do wszystkich kosztów i jako argument przyjmuje czas trwania awarii w s oraz koszt sekundy (Depot - koszt stanowiska)
+        self.repair_cost += seconds * rate  # domyślnie 1 zł kosztu naprawy za sekundę zepsucia
+        if self.ledger is not None:
+            self.ledger.add_repair(self.ledger_rows, seconds * rate)
\ No newline at end of file
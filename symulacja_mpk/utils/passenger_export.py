@@ -0,0 +1,13 @@
+import os
+import csv
+from typing import List, Optional
+
+PASSENGER_FIELDNAMES = ['trasa', 'przystanek', 'kierunek', 'przyszli', 'wsiedli', 'wysiedli', 'czekają', 'nie_zmieścili_się',
+                        'śr_oczekiwanie_s', 'p95_oczekiwanie_s', 'odjazdy', 'śr_obciążenie', 'max_obciążenie']
+DEFAULT_PASSENGER_PATH = os.path.join(os.path.dirname(__file__), '..', '..', "pasazerowie.csv") # statystyki przystanków obok koszty.csv
+
+def write_passenger_statistics(rows: List[dict], path: Optional[str] = None): # zapisuje wiersze z PassengerDemand.statistics do CSV (plik jest nadpisywany - to podsumowanie całego przebiegu)
+    with open(path or DEFAULT_PASSENGER_PATH, "w", newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=PASSENGER_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
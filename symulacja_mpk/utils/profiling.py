@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+PROFILE_WINDOW = 600 # ile ostatnich pomiarów każdej fazy trzymać dla percentyli (10 s przy 60 FPS)
+PROFILE_PERCENTILES = (50, 95, 99)
+TRACE_LIMIT = 200_000 # ile ostatnich faz trzymać w śladzie (starsze są odrzucane, więc długi przebieg nie zajmuje coraz więcej pamięci)
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', "profil.json")
+
+class PhaseProfiler: # czasy faz kroku (awarie, ruch, koszty, zapis, rysowanie...): silnik i pętla GUI wywołują begin na początku kroku i lap po każdej fazie. Bez profilera (None) silnik sprawdza tylko jeden warunek na fazę
+    def __init__(self, window: int = PROFILE_WINDOW, trace: bool = False, trace_limit: int = TRACE_LIMIT): # window - liczba pomiarów fazy w percentylach, trace - czy zapamiętywać kolejne fazy do pliku śladu (chrome://tracing, Perfetto)
+        self.window = window
+        self.samples: Dict[str, deque] = {} # faza -> ostatnie czasy w s
+        self.total: Dict[str, float] = {} # faza -> suma czasu w s od początku
+        self.count: Dict[str, int] = {} # faza -> liczba pomiarów od początku
+        self.trace = deque(maxlen=trace_limit) if trace else None # (faza, początek, czas trwania) w s od utworzenia profilera
+        self.origin = time.perf_counter()
+        self._last = self.origin
+
+    def begin(self): # początek kroku - od tej chwili liczona jest pierwsza faza
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str): # kończy fazę trwającą od begin lub od poprzedniego lap
+        now = time.perf_counter()
+        self.record(phase, self._last, now)
+        self._last = now
+
+    def record(self, phase: str, start: float, end: float): # pomiar fazy zmierzonej przez wywołującego (czasy z time.perf_counter)
+        duration = end - start
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.window)
+            self.total[phase] = 0.0
+            self.count[phase] = 0
+        samples.append(duration)
+        self.total[phase] += duration
+        self.count[phase] += 1
+        if self.trace is not None:
+            self.trace.append((phase, start - self.origin, duration))
+
+    def percentiles(self, phase: str, q=PROFILE_PERCENTILES) -> Dict[int, float]: # percentyle czasu fazy w ms z ostatnich window pomiarów
+        samples = self.samples.get(phase)
+        if not samples:
+            return {p: 0.0 for p in q}
+        values = np.percentile(np.fromiter(samples, float, len(samples)), q) * 1000.0
+        return {p: float(v) for p, v in zip(q, values)}
+
+    def summary(self) -> List[dict]: # wiersz na fazę w kolejności pierwszego pomiaru: liczba pomiarów, suma i średnia od początku oraz percentyle z okna (w ms)
+        rows = []
+        overall = sum(self.total.values())
+        for phase, samples in self.samples.items():
+            count = self.count[phase]
+            row = {'faza': phase, 'pomiary': count, 'suma_ms': round(self.total[phase] * 1000.0, 3),
+                   'śr_ms': round(self.total[phase] * 1000.0 / count, 4), 'udział': round(self.total[phase] / overall, 4) if overall else 0.0}
+            for p, value in self.percentiles(phase).items():
+                row[f'p{p}_ms'] = round(value, 4)
+            row['max_ms'] = round(max(samples) * 1000.0, 4)
+            rows.append(row)
+        return rows
+
+    def report(self) -> str:
+        lines = [f"{'faza':>14} {'pomiary':>9} {'suma [ms]':>11} {'śr [ms]':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'udział':>7}"]
+        for row in self.summary():
+            lines.append(f"{row['faza']:>14} {row['pomiary']:>9} {row['suma_ms']:>11.1f} {row['śr_ms']:>9.4f} {row['p50_ms']:>8.4f} {row['p95_ms']:>8.4f} {row['p99_ms']:>8.4f} {row['udział']:>7.1%}")
+        return "\n".join(lines)
+
+    def trace_events(self) -> List[dict]: # zdarzenia w formacie Trace Event (czasy w µs)
+        if self.trace is None:
+            return []
+        return [{'name': phase, 'ph': 'X', 'ts': round(start * 1e6, 3), 'dur': round(duration * 1e6, 3), 'pid': os.getpid(), 'tid': 0} for phase, start, duration in self.trace]
+
+    def write(self, path: Optional[str] = None): # plik JSON z podsumowaniem faz; ze śladem (trace=True) można go otworzyć w chrome://tracing lub Perfetto
+        with open(path or DEFAULT_PROFILE_PATH, "w", encoding="utf-8") as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms', 'fazy': self.summary()}, f, ensure_ascii=False)
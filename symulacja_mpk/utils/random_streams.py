@@ -0,0 +1,74 @@
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+class RandomStreams: # niezależne, powtarzalne generatory dla poszczególnych komponentów (np. "drivers", "failures", f"vehicle/{id}") wyprowadzone z jednego ziarna przebiegu
+    def __init__(self, seed: Optional[int] = None, spawn_key: tuple = ()): # seed - ziarno przebiegu (None - losowe), spawn_key - ścieżka w drzewie SeedSequence (używane przez spawn)
+        self.sequence = np.random.SeedSequence(seed, spawn_key=spawn_key)
+        self.seed = self.sequence.entropy
+
+    def seed_sequence(self, name: str) -> np.random.SeedSequence: # ziarno komponentu zależy tylko od ziarna przebiegu i nazwy, nie od kolejności wywołań
+        key = zlib.crc32(name.encode('utf-8')) # stały skrót, w przeciwieństwie do hash() nie zależy od procesu
+        return np.random.SeedSequence(self.seed, spawn_key=self.sequence.spawn_key + (key,))
+
+    def generator(self, name: str) -> np.random.Generator:
+        return np.random.default_rng(self.seed_sequence(name))
+
+    def buffered(self, name: str, block_size: int = 4096) -> "BufferedRandom":
+        return BufferedRandom(self.generator(name), block_size)
+
+    def spawn(self, count: int) -> List["RandomStreams"]: # strumienie dla kolejnych replikacji / procesów; nie nakładają się ze sobą ani z komponentami
+        return [RandomStreams(self.seed, self.sequence.spawn_key + (0xFFFFFFFF + 1 + i,)) for i in range(count)]
+
+
+class BufferedRandom: # generator losujący liczby blokami; pojedyncze wywołania random()/uniform() czytają z bufora. Daje dokładnie ten sam ciąg liczb co generator NumPy, z którego korzysta
+    def __init__(self, generator: Optional[np.random.Generator] = None, block_size: int = 4096):
+        self.generator = generator if generator is not None else np.random.default_rng()
+        self.block_size = block_size
+        self._block = []
+        self._position = 0
+
+    def random(self, size=None): # liczba (size=None) lub tablica liczb z [0, 1)
+        if size is None:
+            if self._position >= len(self._block):
+                self._block = self.generator.random(self.block_size).tolist()
+                self._position = 0
+            value = self._block[self._position]
+            self._position += 1
+            return value
+
+        count = int(np.prod(size))
+        remaining = len(self._block) - self._position
+        if count <= remaining:
+            values = np.array(self._block[self._position:self._position + count])
+            self._position += count
+        else:
+            values = np.concatenate((self._block[self._position:], self.generator.random(count - remaining)))
+            self._block, self._position = [], 0
+        return values.reshape(size)
+
+    def uniform(self, low=0.0, high=1.0, size=None): # ten sam wzór co numpy.random.Generator.uniform i random.uniform: low + (high - low) * u
+        if size is None:
+            return low + (high - low) * self.random()
+        low = np.asarray(low, dtype=float)
+        high = np.asarray(high, dtype=float)
+        return low + (high - low) * self.random(size)
+
+
+def choice(rng, items: list, weights: Optional[List[float]] = None): # losowy element listy dla random.Random / modułu random oraz generatorów NumPy; weights - opcjonalne wagi elementów
+    if isinstance(rng, np.random.Generator):
+        if weights is None:
+            return items[int(rng.integers(len(items)))]
+        p = np.asarray(weights, dtype=float)
+        return items[int(rng.choice(len(items), p=p / p.sum()))]
+    if weights is None:
+        return rng.choice(items)
+    return rng.choices(items, weights=weights)[0]
+
+def shuffle(rng, items: list): # tasowanie listy w miejscu, jak choice
+    if isinstance(rng, np.random.Generator):
+        order = rng.permutation(len(items))
+        items[:] = [items[i] for i in order]
+    else:
+        rng.shuffle(items)
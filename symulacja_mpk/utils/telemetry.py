@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from symulacja_mpk.core.vehicles import BROKEN
+
+TELEMETRY_RATE = 10.0 # ile razy na sekundę (czasu rzeczywistego) wysyłany jest stan floty
+DROP_AFTER = 5.0 # klient, który przez tyle sekund nie odebrał jednej wiadomości, jest rozłączany
+TELEMETRY_FIELDS = { # pole wiadomości -> dokładność (wartości są zaokrąglane, więc niezmienione pola nie trafiają do zmian)
+    'x': 0.1,
+    'kierunek': 1,
+    'aktywny': 1,
+    'awaria': 1,
+    'kondycja': 1,
+    'paliwo_energia': 0.01,
+    'pensja': 0.01,
+    'naprawy': 0.01,
+}
+
+def parse_address(address: str) -> dict: # "unix:/ścieżka", "host:port" lub sam port -> argumenty TelemetryServer
+    if address.startswith("unix:"):
+        return {'path': address[len("unix:"):]}
+    host, _, port = address.rpartition(":")
+    return {'host': host or "127.0.0.1", 'port': int(port)}
+
+def fleet_snapshot(simulation) -> dict: # obecne wartości pól TELEMETRY_FIELDS wszystkich pojazdów; tablice FleetState / pamięci współdzielonej czytane bez przepisywania do obiektów
+    fleet = getattr(simulation, 'fleet_state', None) or getattr(simulation, 'shared_fleet', None) # FleetState lub tablice ShardedSimulation (te same nazwy)
+    if fleet is not None:
+        values = {'x': fleet.x, 'kierunek': fleet.direction, 'aktywny': fleet.active, 'awaria': fleet.broken, 'kondycja': fleet.condition,
+                  'paliwo_energia': fleet.fuel_electricity_cost, 'pensja': fleet.salary, 'naprawy': fleet.repair_cost}
+    else:
+        simulation.sync_vehicles() # w symulacji zdarzeń pozycje i koszty są liczone leniwie
+        vehicles = simulation.vehicles
+        trackers = [v.cost_tracker for v in vehicles]
+        values = {'x': [v.x for v in vehicles], 'kierunek': [v.direction for v in vehicles], 'aktywny': [v.active for v in vehicles],
+                  'awaria': [v.state is BROKEN for v in vehicles], 'kondycja': [v.condition for v in vehicles],
+                  'paliwo_energia': [t.fuel_electricity_cost if t else 0.0 for t in trackers], 'pensja': [t.salary if t else 0.0 for t in trackers],
+                  'naprawy': [t.repair_cost if t else 0.0 for t in trackers]}
+    snapshot = {}
+    for name, step in TELEMETRY_FIELDS.items():
+        array = np.asarray(values[name], dtype=float)
+        snapshot[name] = np.round(array / step).astype(np.int64) # liczby całkowite w jednostkach dokładności - porównanie bez błędów zaokrągleń
+    return snapshot
+
+def _values(name: str, units: np.ndarray) -> list:
+    step = TELEMETRY_FIELDS[name]
+    return units.tolist() if step == 1 else np.round(units * step, 2).tolist()
+
+def encode_message(previous: Optional["TelemetryFrame"], frame: "TelemetryFrame") -> bytes: # wiersz JSON: pełny stan (previous=None lub inna lista pojazdów) albo tylko pola pojazdów zmienione od previous jako pary [indeks, wartość]
+    if previous is None or previous.vehicle_ids != frame.vehicle_ids:
+        message = {'typ': 'pełny', 'seq': frame.seq, 'czas_s': frame.time, 'pojazdy': frame.vehicle_ids, 'linie': frame.lines,
+                   'pola': {name: _values(name, units) for name, units in frame.fields.items()}}
+    else:
+        changes = {}
+        for name, units in frame.fields.items():
+            changed = np.flatnonzero(units != previous.fields[name])
+            if changed.size:
+                changes[name] = [list(pair) for pair in zip(changed.tolist(), _values(name, units[changed]))]
+        message = {'typ': 'zmiany', 'seq': frame.seq, 'czas_s': frame.time, 'pominięte': frame.seq - previous.seq - 1, 'pola': changes}
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+
+def apply_message(view: dict, message: dict) -> dict: # stan floty u odbiorcy po wiadomości: {'czas_s', 'pojazdy', 'pola': {pole: lista wartości}}
+    if message['typ'] == 'pełny':
+        view.clear()
+        view.update({'pojazdy': message['pojazdy'], 'linie': message['linie'], 'pola': {name: list(values) for name, values in message['pola'].items()}})
+    else:
+        for name, pairs in message['pola'].items():
+            column = view['pola'][name]
+            for i, value in pairs:
+                column[i] = value
+    view['czas_s'] = message['czas_s']
+    view['seq'] = message['seq']
+    return view
+
+
+class TelemetryFrame: # jeden odczyt stanu floty (wspólny dla wszystkich klientów)
+    __slots__ = ('seq', 'time', 'fields', 'vehicle_ids', 'lines')
+    def __init__(self, seq: int, time_seconds: float, fields: dict, vehicle_ids: list, lines: list):
+        self.seq = seq
+        self.time = time_seconds
+        self.fields = fields
+        self.vehicle_ids = vehicle_ids
+        self.lines = lines
+
+
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.task = asyncio.current_task()
+        self.wake = asyncio.Event()
+        self.last = None # ostatnia wysłana klatka - od niej liczone są zmiany
+        self.sent = 0
+        self.skipped = 0
+
+
+class TelemetryServer: # serwer asyncio (TCP lub gniazdo Unix, wiersze JSON) z bieżącym stanem pojazdów i kosztów; działa w osobnym wątku, więc symulacja tylko podmienia najnowszą klatkę i nigdy nie czeka na odbiorców. Wolny klient dostaje po zakończeniu zapisu od razu najnowszą klatkę (zmiany od tego, co już ma), a pośrednie są pomijane; jeśli nie odbiera przez drop_after s, jest rozłączany. Można go przekazać jako on_step do run
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None, rate: float = TELEMETRY_RATE, drop_after: float = DROP_AFTER): # port=0 - wolny port (zob. address), path - gniazdo Unix zamiast TCP, rate - maksymalna liczba klatek na sekundę czasu rzeczywistego
+        self.host = host
+        self.port = port
+        self.path = path
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.drop_after = drop_after
+        self.address = None
+        self.frames = 0
+        self.dropped_clients = 0
+        self._clients = set()
+        self._latest = None
+        self._closing = False
+        self._last_publish = -float('inf')
+        self._meta = None
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="TelemetryServer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            if self.path is not None:
+                self._server = self._loop.run_until_complete(asyncio.start_unix_server(self._serve, self.path))
+                self.address = self.path
+            else:
+                self._server = self._loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+                self.address = self._server.sockets[0].getsockname()[:2]
+        except OSError as error:
+            self._error = error
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def __call__(self, simulation): # on_step: co najwyżej rate razy na sekundę i tylko gdy ktoś słucha
+        now = time.monotonic()
+        if now - self._last_publish < self.interval or not self._clients:
+            return
+        self._last_publish = now
+        self.publish(simulation)
+
+    def publish(self, simulation): # nowa klatka ze stanem symulacji dla wszystkich klientów
+        if self._meta is None or len(self._meta[0]) != len(simulation.vehicles):
+            self._meta = ([v.cost_tracker.vehicle_id if v.cost_tracker else v.line_number for v in simulation.vehicles], [v.line_number for v in simulation.vehicles])
+        self.frames += 1
+        frame = TelemetryFrame(self.frames, round(simulation.current_time, 3), fleet_snapshot(simulation), *self._meta)
+        self._loop.call_soon_threadsafe(self._broadcast, frame)
+
+    def _broadcast(self, frame: TelemetryFrame):
+        self._latest = frame
+        for client in self._clients:
+            client.wake.set()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Client(writer)
+        self._clients.add(client)
+        if self._latest is not None:
+            client.wake.set()
+        try:
+            while True:
+                await client.wake.wait()
+                client.wake.clear()
+                frame = self._latest
+                if frame is None or frame is client.last:
+                    if self._closing:
+                        break
+                    continue
+                if client.last is not None:
+                    client.skipped += frame.seq - client.last.seq - 1
+                writer.write(encode_message(client.last, frame))
+                client.last = frame
+                client.sent += 1
+                try:
+                    await asyncio.wait_for(writer.drain(), self.drop_after) # w tym czasie nowe klatki tylko podmieniają _latest
+                except asyncio.TimeoutError:
+                    self.dropped_clients += 1
+                    break
+                if self._closing and frame is self._latest:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(client)
+            if writer.transport.get_write_buffer_size():
+                writer.transport.abort() # rozłączany klient nie czeka na resztę bufora
+            else:
+                writer.close()
+
+    def close(self): # zamyka serwer i połączenia po wysłaniu klientom ostatniej klatki (najdłużej drop_after s); można wywołać wielokrotnie
+        if not self._thread.is_alive():
+            return
+        async def shutdown():
+            self._server.close()
+            self._closing = True
+            tasks = [client.task for client in self._clients]
+            for client in self._clients:
+                client.wake.set()
+            if tasks:
+                _, pending = await asyncio.wait(tasks, timeout=self.drop_after)
+                for task in pending:
+                    task.cancel()
+                await asyncio.sleep(0)
+            self._loop.stop()
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        self._thread.join()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path) # serwer asyncio nie usuwa pliku gniazda
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()